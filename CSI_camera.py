@@ -23,6 +23,9 @@ class CameraStream:
         self.running = False
         self.thread = None
         self.frame = None
+        self.frame_time = 0.0 # time.monotonic() when 'frame' was captured
+        self.frame_count = 0
+        self.drop_count = 0 # Failed captures
         self.lock = threading.Lock()
 
     def start(self):
@@ -64,10 +67,14 @@ class CameraStream:
                         # Fallback if format changes
                         frame = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
                     
+                    now = time.monotonic()
                     with self.lock:
                         self.frame = frame
+                        self.frame_time = now
+                        self.frame_count += 1
                         
             except Exception as e:
+                self.drop_count += 1
                 print(f"Error reading from Camera {self.camera_num}: {e}")
                 time.sleep(0.1)
 
@@ -75,6 +82,11 @@ class CameraStream:
         with self.lock:
             return self.frame
 
+    def get_frame_info(self):
+        """Returns (frame, capture time, frame count) as one consistent snapshot."""
+        with self.lock:
+            return self.frame, self.frame_time, self.frame_count
+
     def stop(self):
         self.running = False
         if self.thread:
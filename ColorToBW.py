@@ -1,9 +1,80 @@
 import cv2
 import os
+import sys
+import json
 import shutil
-import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from crop_images import VALID_EXTS
 
-def convert_to_bw():
+# Manifest of converted sources, stored next to the outputs
+MANIFEST_NAME = ".manifest.json"
+
+def file_hash(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def load_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def save_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+def convert_one(input_path, output_path):
+    """
+    Worker: decodes straight to grayscale (no BGR decode + cvtColor) and saves.
+    Returns (ok, message).
+    """
+    gray_img = cv2.imread(input_path, cv2.IMREAD_GRAYSCALE)
+    if gray_img is None:
+        return False, "Load Failed"
+    try:
+        if not cv2.imwrite(output_path, gray_img):
+            return False, "Write Failed"
+    except Exception as e:
+        return False, str(e)
+    return True, ""
+
+def plan_conversion(input_dir, output_dir, files, manifest):
+    """
+    Splits 'files' into the ones that need converting and the ones whose output is current.
+    A source is current when its output exists and either its (mtime, size) or,
+    failing that, its content hash matches the manifest entry.
+    Returns (todo, manifest) where todo is a list of (filename, source_entry).
+    """
+    todo = []
+    for filename in files:
+        input_path = os.path.join(input_dir, filename)
+        output_path = os.path.join(output_dir, filename)
+        st = os.stat(input_path)
+        entry = {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+        old = manifest.get(filename)
+
+        if old and os.path.exists(output_path):
+            if old.get("mtime_ns") == entry["mtime_ns"] and old.get("size") == entry["size"]:
+                continue
+            # Touched but maybe not changed (e.g. git checkout): compare content
+            entry["sha1"] = file_hash(input_path)
+            if old.get("sha1") == entry["sha1"]:
+                manifest[filename] = entry
+                continue
+        todo.append((filename, entry))
+    return todo, manifest
+
+def convert_to_bw(full=False, workers=None):
     # Define paths (Root of Repo)
     # The script assumes it runs from the repo root or these folders are in the CWD.
     input_dir = "Color"
@@ -14,46 +85,73 @@ def convert_to_bw():
         print(f"Error: Input folder '{input_dir}' does not exist.")
         return
 
-    # 2. Setup Output Folder (Overwrite/Clear)
-    if os.path.exists(output_dir):
+    # 2. Setup Output Folder (only cleared on a full rebuild)
+    if full and os.path.exists(output_dir):
         print(f"Clearing existing output folder '{output_dir}'...")
         shutil.rmtree(output_dir)
-    
-    os.makedirs(output_dir)
-    print(f"Created output folder '{output_dir}'.")
+
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+        print(f"Created output folder '{output_dir}'.")
 
     # 3. Process Images
-    valid_exts = ('.jpg', '.jpeg', '.png', '.bmp')
-    files = [f for f in os.listdir(input_dir) if f.lower().endswith(valid_exts)]
-    
+    files = sorted(f for f in os.listdir(input_dir) if f.lower().endswith(VALID_EXTS))
+    manifest = load_manifest(output_dir)
+
+    # Drop outputs whose source no longer exists (all of them if Color/ is empty)
+    for filename in list(manifest):
+        if filename not in files:
+            stale = os.path.join(output_dir, filename)
+            if os.path.exists(stale):
+                os.remove(stale)
+                print(f"  Removed stale: {filename}")
+            del manifest[filename]
+
     if not files:
+        save_manifest(output_dir, manifest)
         print("No images found in Color folder.")
         return
 
-    print(f"Processing {len(files)} images...")
-    
-    for filename in sorted(files):
-        # Read
-        input_path = os.path.join(input_dir, filename)
-        img = cv2.imread(input_path)
-        
-        if img is None:
-            print(f"  Skipping {filename} (Load Failed)")
-            continue
-            
-        # Convert to Grayscale
-        gray_img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
-        # Save
-        output_path = os.path.join(output_dir, filename)
-        try:
-            cv2.imwrite(output_path, gray_img)
-            print(f"  Converted: {filename}")
-        except Exception as e:
-            print(f"  Failed to save {filename}: {e}")
+    todo, manifest = plan_conversion(input_dir, output_dir, files, manifest)
+    print(f"{len(files)} images, {len(files) - len(todo)} up to date, {len(todo)} to convert.")
+
+    if todo:
+        workers = workers or os.cpu_count() or 1
+        workers = min(workers, len(todo))
+        print(f"Processing {len(todo)} images with {workers} worker(s)...")
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {}
+            for filename, entry in todo:
+                input_path = os.path.join(input_dir, filename)
+                output_path = os.path.join(output_dir, filename)
+                futures[filename] = (pool.submit(convert_one, input_path, output_path), entry)
+
+            for filename, (future, entry) in futures.items():
+                try:
+                    ok, message = future.result()
+                except Exception as e:
+                    ok, message = False, str(e)
+                if ok:
+                    if "sha1" not in entry:
+                        entry["sha1"] = file_hash(os.path.join(input_dir, filename))
+                    manifest[filename] = entry
+                    print(f"  Converted: {filename}")
+                else:
+                    manifest.pop(filename, None)
+                    print(f"  Skipping {filename} ({message})")
+
+    save_manifest(output_dir, manifest)
 
     print("\nConversion Complete.")
     print(f"Black and White images are in: {output_dir}")
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Convert Color/ images to grayscale in BlackAndWhite/.")
+    parser.add_argument("--full", action="store_true", help="Clear the output folder and reconvert everything")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    convert_to_bw()
+    args = parse_args(sys.argv[1:])
+    convert_to_bw(full=args.full, workers=args.workers)
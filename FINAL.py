@@ -1,24 +1,31 @@
 import time
 import threading
-import cv2
+import numpy as np
 import socket
-import board
-import neopixel
 import os
 import sys
-import random
 import datetime
+import argparse
 import subprocess
-from flask import Flask, Response, render_template_string
-from gpiozero import Button
-from adafruit_servokit import ServoKit
-from rgb1602 import RGB1602
-
-# Import CSI Camera Class
-try:
-    from CSI_camera import CameraStream as CSICameraStream
-except ImportError:
-    print("Error: Could not import CameraStream (CSI)")
+# Hardware / web modules (board, neopixel, adafruit_servokit, gpiozero,
+# rgb1602, flask, picamera2) are imported lazily by the subsystem that needs
+# them, so the start screen doesn't wait for all of them to load.
+from shard_writer import TarShardWriter
+from frame_archive import FrameArchiveWriter
+from background_cache import BackgroundCache, BackgroundPrefetcher
+from scene_confirm import DisplayConfirmer, LightingConfirmer
+from display_renderer import DisplayRenderer
+from led_frame import LEDFrameBuffer, ParallelShow
+from led_animation import LEDAnimator
+from led_patterns import PatternLibrary, parse_pattern_id
+from motion_planner import MotionPlanner
+from step_scheduler import StepScheduler
+from session_plan import make_plan, next_plan_index, pending_points
+from crop_images import cropped_path, VALID_EXTS
+from startup import Startup
+from orchestrator import Orchestrator, PAUSED, RUNNING
+from telemetry import Telemetry, RollingStat, FrameRateMeter
+from metrics import Counter, Gauge, Histogram, REGISTRY, CONTENT_TYPE
 
 # ==============================================================================
 # GIT INTEGRATION
@@ -27,19 +34,29 @@ def git_push_changes():
     """
     Adds, commits, and pushes changes in the 'Color' folder to the remote repository.
     """
+    with sync_lock:
+        pending = sync_status["unsynced"]
+        sync_status.update(stage="add", started=time.time(), error=None)
     try:
         print("  [Git] Starting sync...")
         # Add changes in Color folder (Root of repo)
         subprocess.run(["git", "add", "Color/"], check=True)
         
         # Commit (will fail if nothing to commit, so check=False is safer)
+        with sync_lock: sync_status["stage"] = "commit"
         subprocess.run(["git", "commit", "-m", "Auto-save Color images"], check=False)
         
         # Push
+        with sync_lock: sync_status["stage"] = "push"
         subprocess.run(["git", "push"], check=True)
         print("  [Git] Pushed images to remote successfully.")
+        with sync_lock:
+            sync_status["unsynced"] -= pending
+            sync_status.update(stage="done", finished=time.time(), pushed=sync_status["pushed"] + pending)
     except Exception as e:
         print(f"  [Git] Error during sync: {e}")
+        with sync_lock:
+            sync_status.update(stage="failed", finished=time.time(), error=str(e))
 
 # REDEFINE USB CAMERA CLASS LOCALLY (Robust Version)
 class USBCameraStream:
@@ -49,10 +66,14 @@ class USBCameraStream:
         self.running = False
         self.thread = None
         self.frame = None
+        self.frame_time = 0.0 # time.monotonic() when 'frame' was captured
+        self.frame_count = 0
+        self.drop_count = 0 # Failed reads (frames the camera didn't deliver)
         self.lock = threading.Lock()
         self.error_count = 0 
 
     def start(self):
+        import cv2
         try:
             self.cap = cv2.VideoCapture(self.camera_index)
             if not self.cap.isOpened():
@@ -75,22 +96,32 @@ class USBCameraStream:
             try:
                 ret, frame = self.cap.read()
                 if ret:
+                    now = time.monotonic()
                     with self.lock:
                         self.frame = frame
+                        self.frame_time = now
+                        self.frame_count += 1
                     self.error_count = 0
                 else:
                     self.error_count += 1
+                    self.drop_count += 1
                     if self.error_count % 100 == 1:
                          # Suppress spam
                          pass
                     time.sleep(0.1)
             except Exception:
+                self.drop_count += 1
                 time.sleep(0.1)
 
     def get_frame(self):
         with self.lock:
             return self.frame
 
+    def get_frame_info(self):
+        """Returns (frame, capture time, frame count) as one consistent snapshot."""
+        with self.lock:
+            return self.frame, self.frame_time, self.frame_count
+
     def stop(self):
         self.running = False
         if self.thread:
@@ -101,60 +132,166 @@ class USBCameraStream:
 # ==============================================================================
 # GLOBAL CONFIGURATION
 # ==============================================================================
-LED_PIN_1 = board.D12
+LED_PIN_1 = "D12" # board pin names, resolved when the LEDs are initialized
 LED_COUNT_1 = 120
-LED_PIN_2 = board.D18
+LED_PIN_2 = "D18"
 LED_COUNT_2 = 32
+LED_FPS = 60.0        # Animation tick rate
+LED_FADE_TIME = 0.3   # Cross-fade between lighting patterns (s)
+LED_PATTERN_KINDS = ("seeds", "gradient", "noise", "sweep")
+
+SERVO_PROFILE = "scurve" # "scurve" (jerk-limited) or "trapezoid"
+SERVO_ACCEL = 360.0      # Acceleration limit (deg/s^2)
+SERVO_RATE = 100.0       # Position command rate (Hz)
+SERVO_WAIT_MARGIN = 2.0  # Extra wait beyond a move's planned duration before giving up (s)
 
 BUTTON_PIN = 4
 IMAGE_FOLDER = 'images'
+CROPPED_FOLDER = 'images_16_9' # crop_images.py output; used instead of the original when up to date
+BG_CACHE_ITEMS = 12 # Display-sized backgrounds kept in RAM (~6 MB each at 1080p)
+BG_PREFETCH_DEPTH = 3 # Upcoming backgrounds decoded ahead of the step loop
+DISPLAY_CONFIRM_TIMEOUT = 1.5 # Max wait for cameras to see a new background (s)
+SETTLE_TIME = 1.0 # Fixed settle before snapshots, used when the cameras can't confirm it
+LIGHTING_CONFIRM_TIMEOUT = 1.5 # Max wait for new lighting + pose to look stable on every camera (s)
+
+# Tar shard sink for training (sequential I/O); Color/ JPEGs are kept as well
+SHARD_FOLDER = 'Shards'
+ENABLE_SHARDS = True
+SHARD_MAX_BYTES = 64 * 1024 * 1024
+
+# Optional memory-mapped raw frame archive (cropped uint8 frames, no JPEG decode on load)
+ARCHIVE_FOLDER = 'Archive'
+ENABLE_ARCHIVE = False
+
+# Session plan: angle x background x lighting from a low-discrepancy sequence
+PLAN_FOLDER = 'Plans'
+SESSION_STEPS = 10
+SCREEN_IMAGES = ("Start.jpeg", "Finished.jpeg") # UI screens, never used as backgrounds
+
+# Button: press = start / next step (unattended: pause/resume), hold = stop the session
+BUTTON_HOLD_TIME = 2.0 # Seconds the button must be held to stop
+
+# Startup: subsystems initialize concurrently, each with a timeout (s)
+INIT_TIMEOUT = 10.0
+CAMERA_INIT_TIMEOUT = 8.0
+NUM_CSI_CAMERAS = 2
+NUM_USB_PROBES = 10
+
+# Per-stage step timeline (JSON, also opens in chrome://tracing)
+TIMELINE_FOLDER = 'Timelines'
+PERSIST_WORKERS = 2 # Threads for background prepare/persist stages
+
+# Live telemetry pushed to the dashboard (Server-Sent Events on /api/telemetry)
+TELEMETRY_INTERVAL = 1.0 # Seconds between snapshots
 
 # Global State
 system_running = threading.Event()
-app = Flask(__name__)
+app = None # Flask app, created by create_app() during startup
 active_cameras = {}
 led_update_event = threading.Event() # Signal to change LEDs
+session_id = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+shard_writer = None
+frame_archives = {} # view -> FrameArchiveWriter
+archive_lock = threading.Lock() # Persist workers and ad-hoc API snapshots append concurrently
+orchestrator = Orchestrator() # Event queue + run state machine (button, HTTP, timers)
+current_rig = None # Set by init_rig (control API needs the backgrounds, servo, LEDs)
+run_status = {}    # Current step of the running session (control API / status)
+step_overrides = {} # angle / led_pattern / background for the next step, set over HTTP
+control_lock = threading.Lock()
+session_scheduler = None # StepScheduler of the running session (write queue depth)
+# Git sync progress: images written since the last push, current stage
+sync_status = {"stage": "idle", "unsynced": 0, "pushed": 0, "started": None, "finished": None, "error": None}
+sync_lock = threading.Lock()
+# Live telemetry (SSE): recent JPEG encode times and per-camera capture rate
+snapshot_encode = RollingStat()
+stream_encode = RollingStat()
+camera_rates = FrameRateMeter()
+telemetry = None # Telemetry, started by init_rig
+
+# Prometheus metrics (/metrics, see metrics.py). Cheap enough to stay on.
+frames_captured_total = Counter("dab_frames_captured_total", "Frames read from each camera", ["camera"])
+frames_dropped_total = Counter("dab_frames_dropped_total", "Failed camera reads", ["camera"])
+capture_to_publish_seconds = Histogram("dab_capture_to_publish_seconds",
+                                       "Camera capture to frame sent on the MJPEG stream", ["camera"])
+jpeg_encode_seconds = Histogram("dab_jpeg_encode_seconds", "JPEG encode time", ["use"])
+stream_clients = Gauge("dab_stream_clients", "Connected MJPEG stream clients", ["camera"])
+stream_bytes_total = Counter("dab_stream_bytes_sent_total", "MJPEG bytes sent", ["camera"])
+snapshot_write_seconds = Histogram("dab_snapshot_write_seconds", "Encode and write of one set of snapshots")
+servo_move_seconds = Histogram("dab_servo_move_seconds", "Servo move duration",
+                               buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0))
+step_seconds = Histogram("dab_step_seconds", "Step duration, step start to snapshots captured",
+                         buckets=(0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 20.0, 30.0, 60.0))
+sync_queue_images = Gauge("dab_sync_queue_images", "Images written but not yet pushed by git sync")
+write_queue_depth = Gauge("dab_write_queue_depth", "Pending prepare/persist stages of the running session")
+# Read at scrape time from the state that already tracks them
+frames_captured_total.set_function(
+    lambda: {(name,): getattr(cam, "frame_count", None) for name, cam in list(active_cameras.items())})
+frames_dropped_total.set_function(
+    lambda: {(name,): getattr(cam, "drop_count", None) for name, cam in list(active_cameras.items())})
+sync_queue_images.set_function(lambda: sync_status["unsynced"])
+write_queue_depth.set_function(lambda: len(session_scheduler.pending) if session_scheduler is not None else 0)
 
 # ==============================================================================
 # FLASK APP
 # ==============================================================================
 def generate_frames(cam_key):
+    import cv2
     cam = active_cameras.get(cam_key)
     if not cam: return
-    while True:
-        frame = cam.get_frame()
-        if frame is None:
-            time.sleep(0.1)
-            continue
-            
-        # Optimize for Web Stream: Resize to max width 640px
-        # This reduces bandwidth significantly for 3 simultaneous streams
-        h, w = frame.shape[:2]
-        if w > 640:
-            scale = 640 / w
-            new_h = int(h * scale)
-            frame = cv2.resize(frame, (640, new_h), interpolation=cv2.INTER_AREA)
-            
-        # Encode with slightly lower quality (80) for speed
-        ret, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), 80])
-        if not ret: continue
-        
-        # DEBUG: Print every 100 frames
-        if hasattr(cam, 'debug_frame_count'):
-            cam.debug_frame_count += 1
-        else:
-            cam.debug_frame_count = 1
-            print(f"[DEBUG] Stream started for {cam_key}. Frame shape: {frame.shape}")
+    clients = stream_clients.labels(cam_key)
+    sent = stream_bytes_total.labels(cam_key)
+    latency = capture_to_publish_seconds.labels(cam_key)
+    encode = jpeg_encode_seconds.labels("stream")
+    clients.inc()
+    try:
+        while True:
+            if hasattr(cam, "get_frame_info"):
+                frame, frame_time, _ = cam.get_frame_info()
+            else:
+                frame, frame_time = cam.get_frame(), None
+            if frame is None:
+                time.sleep(0.1)
+                continue
 
-        if cam.debug_frame_count % 100 == 0:
-            print(f"[DEBUG] Stream {cam_key} alive: {cam.debug_frame_count} frames sent")
+            # Optimize for Web Stream: Resize to max width 640px
+            # This reduces bandwidth significantly for 3 simultaneous streams
+            h, w = frame.shape[:2]
+            if w > 640:
+                scale = 640 / w
+                new_h = int(h * scale)
+                frame = cv2.resize(frame, (640, new_h), interpolation=cv2.INTER_AREA)
 
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
-        time.sleep(0.03) 
+            # Encode with slightly lower quality (80) for speed
+            t0 = time.monotonic()
+            ret, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), 80])
+            encoded = time.monotonic() - t0
+            stream_encode.add(encoded)
+            encode.observe(encoded)
+            if not ret: continue
+
+            # DEBUG: Print every 100 frames
+            if hasattr(cam, 'debug_frame_count'):
+                cam.debug_frame_count += 1
+            else:
+                cam.debug_frame_count = 1
+                print(f"[DEBUG] Stream started for {cam_key}. Frame shape: {frame.shape}")
+
+            if cam.debug_frame_count % 100 == 0:
+                print(f"[DEBUG] Stream {cam_key} alive: {cam.debug_frame_count} frames sent")
+
+            chunk = (b'--frame\r\n'
+                     b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+            if frame_time:
+                latency.observe(time.monotonic() - frame_time)
+            sent.inc(len(chunk))
+            yield chunk
+            time.sleep(0.03)
+    finally:
+        # Client disconnected (the server closes the generator)
+        clients.dec()
 
-@app.route('/')
 def index():
+    from flask import render_template_string
     active_keys = sorted(list(active_cameras.keys()))
     print(f"[DEBUG] Index Page Requested. Active Cameras: {active_keys}")
     html = """
@@ -300,6 +437,32 @@ def index():
                 padding-bottom: 60%; /* Taller than 16:9 to fit better or shorter? 16:9 = 56.25% */
             }
 
+            .status-badge.stale {
+                color: #f59e0b;
+                background: rgba(245, 158, 11, 0.15);
+            }
+
+            .status-badge.stale .status-dot {
+                background-color: #f59e0b;
+                box-shadow: 0 0 6px #f59e0b;
+            }
+
+            .telemetry-bar {
+                display: flex;
+                flex-wrap: wrap;
+                gap: 24px;
+                padding: 8px 20px;
+                border-bottom: 1px solid var(--border);
+                font-size: 0.8rem;
+                color: var(--text-muted);
+                flex-shrink: 0;
+            }
+
+            .telemetry-bar b {
+                color: var(--text-main);
+                font-weight: 600;
+            }
+
             .card-body img {
                 position: absolute;
                 top: 0;
@@ -315,13 +478,20 @@ def index():
         <header>
             <div>
                 <h1>DCB Control</h1>
-                <div class="subtitle">System Online</div>
+                <div class="subtitle" id="t-state">Connecting...</div>
             </div>
-            <div style="font-size:0.8rem; color:var(--text-muted);">
+            <div style="font-size:0.8rem; color:var(--text-muted);" id="t-step">
                 Network Stream
             </div>
         </header>
 
+        <div class="telemetry-bar">
+            <div>Servo <b id="t-angle">-</b></div>
+            <div>Encode (snapshot / stream) <b id="t-encode">-</b></div>
+            <div>Write queue <b id="t-queue">-</b></div>
+            <div>Sync <b id="t-sync">-</b></div>
+        </div>
+
         <div class="main-content">
             <div class="grid-container">
                 {% for key in active_keys %}
@@ -332,7 +502,7 @@ def index():
                             <svg width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round" style="color:var(--accent)"><path d="M23 19a2 2 0 0 1-2 2H3a2 2 0 0 1-2-2V8a2 2 0 0 1 2-2h4l2-3h6l2 3h4a2 2 0 0 1 2-2z"/><circle cx="12" cy="13" r="4"/></svg>
                             {{ key }}
                         </div>
-                        <div class="status-badge"><div class="status-dot"></div> LIVE</div>
+                        <div class="status-badge" id="cam-{{ loop.index0 }}" data-cam="{{ key }}"><div class="status-dot"></div> <span>LIVE</span></div>
                     </div>
                     <div class="card-body">
                         <img src="{{ url_for('video_feed', cam_key=key) }}">
@@ -341,86 +511,408 @@ def index():
                 {% endfor %}
             </div>
         </div>
+
+        <script>
+            // Live telemetry (Server-Sent Events from /api/telemetry)
+            const STALE_MS = 1000;
+            const text = (id, value) => { document.getElementById(id).textContent = value; };
+            const source = new EventSource("{{ url_for('api_telemetry') }}");
+
+            source.addEventListener("telemetry", (msg) => {
+                const t = JSON.parse(msg.data);
+                const run = t.run || {};
+                text("t-state", `${t.box} \u00b7 ${t.state} \u00b7 session ${t.session}`);
+                text("t-step", run.step ? `Step ${run.step}/${run.steps_planned} \u00b7 ${run.images} images` : "No step yet");
+                text("t-angle", t.servo_angle === null ? "-" : `${t.servo_angle}\u00b0`);
+                text("t-encode", `${t.encode.snapshot.mean_ms} / ${t.encode.stream.mean_ms} ms`);
+                text("t-queue", t.write_queue);
+                const sync = t.sync;
+                text("t-sync", `${sync.stage} \u00b7 ${sync.unsynced} unsynced` + (sync.error ? ` (${sync.error})` : ""));
+
+                document.querySelectorAll(".status-badge[data-cam]").forEach((badge) => {
+                    const cam = t.cameras[badge.dataset.cam];
+                    if (!cam) return;
+                    const stale = cam.frame_age_ms === null || cam.frame_age_ms > STALE_MS;
+                    badge.classList.toggle("stale", stale);
+                    badge.querySelector("span").textContent = cam.fps === null
+                        ? "LIVE" : `${cam.fps} fps \u00b7 ${cam.frame_age_ms === null ? "-" : Math.round(cam.frame_age_ms)} ms`;
+                });
+            });
+
+            source.onerror = () => text("t-state", "Disconnected, retrying...");
+        </script>
     </body>
     </html>
     """
     return render_template_string(html, active_keys=active_keys)
 
-@app.route('/video_feed/<cam_key>')
+def session_start():
+    """Daemon mode: starts the next session as if the button was pressed."""
+    from flask import jsonify
+    orchestrator.post("api.start")
+    return jsonify({"requested": True, "state": orchestrator.state, "session": session_id})
+
 def video_feed(cam_key):
+    from flask import Response
     print(f"[DEBUG] Processing video_feed request for key: '{cam_key}'")
     return Response(generate_frames(cam_key),
                     mimetype='multipart/x-mixed-replace; boundary=frame')
 
+# ==============================================================================
+# CONTROL API
+# ==============================================================================
+# JSON endpoints so one script can drive several boxes:
+#   GET  /api/status
+#   POST /api/session/<start|stop|pause|resume>
+#   POST /api/step/next                  (attended: same as a button press)
+#   POST /api/next   {"angle", "led_pattern", "background"}  (override the next step)
+#   DELETE /api/next                     (drop pending overrides)
+#   POST /api/snapshot {"request_id"}    (ad-hoc capture of every camera)
+# Commands are idempotent: repeating one reports "changed": false instead of
+# doing it twice, and a snapshot with a known request_id returns the first
+# result. Every response carries the box name and the server-side timing.
+
+SESSION_ACTIONS = {
+    "start": "api.start",
+    "stop": "api.stop",
+    "pause": "api.pause",
+    "resume": "api.resume",
+}
+API_REQUEST_TIMEOUT = 2.0 # Max wait for the orchestrator to dispatch a command (s)
+API_RESPONSE_CACHE = 64   # Snapshot responses remembered per request_id
+API_SNAPSHOT_TIMEOUT = 10.0 # Max wait for a duplicate request's snapshot to finish (s)
+snapshot_responses = {}   # request_id -> response body, or an Event while it is being taken
+snapshot_lock = threading.Lock()
+
+def api_response(start, status=200, **fields):
+    from flask import jsonify
+    body = {"ok": status < 400, "box": socket.gethostname(), "session": session_id,
+            "state": orchestrator.state}
+    body.update(fields)
+    body["server_time"] = time.time()
+    body["elapsed_ms"] = round((time.monotonic() - start) * 1000, 3)
+    return jsonify(body), status
+
+def api_request_data():
+    from flask import request
+    return request.get_json(silent=True) or request.form.to_dict() or {}
+
+def post_command(kind, start, **data):
+    """Posts a command and answers once it has been dispatched (old/new state, latency)."""
+    transition = orchestrator.request(kind, timeout=API_REQUEST_TIMEOUT, **data)
+    if transition is None:
+        return api_response(start, 503, error=f"{kind} not dispatched within {API_REQUEST_TIMEOUT} s")
+    old, new = transition
+    return api_response(start, command=kind, previous=old, changed=old != new)
+
+def api_session(action):
+    start = time.monotonic()
+    kind = SESSION_ACTIONS.get(action)
+    if kind is None:
+        return api_response(start, 404, error=f"Unknown action '{action}'", actions=sorted(SESSION_ACTIONS))
+    return post_command(kind, start, reason=f"{action} requested over HTTP")
+
+def api_step_next():
+    return post_command("api.next", time.monotonic())
+
+def api_status():
+    start = time.monotonic()
+    rig = current_rig
+    servo = rig.servo_ctrl if rig else None
+    with control_lock:
+        overrides = dict(step_overrides)
+    return api_response(start,
+                        run=dict(run_status),
+                        overrides=overrides,
+                        servo_angle=round(servo.planner.position, 2) if servo else None,
+                        led_pattern=rig.led_ctrl.current_pattern if rig and rig.led_ctrl else None,
+                        cameras=sorted(active_cameras),
+                        readiness=rig.readiness if rig else {},
+                        orchestrator=orchestrator.stats())
+
+def parse_overrides(data):
+    """Validates the next-step overrides in 'data'. Returns (overrides, error)."""
+    overrides = {}
+    if data.get("angle") not in (None, ""):
+        try:
+            angle = float(data["angle"])
+        except (TypeError, ValueError):
+            return None, f"angle must be a number, got {data['angle']!r}"
+        if not 0.0 <= angle <= 180.0:
+            return None, f"angle {angle} outside 0..180"
+        overrides["angle"] = angle
+    if data.get("led_pattern"):
+        try:
+            parse_pattern_id(str(data["led_pattern"]))
+        except ValueError as e:
+            return None, f"led_pattern: {e}"
+        overrides["led_pattern"] = str(data["led_pattern"])
+    if data.get("background"):
+        backgrounds = current_rig.backgrounds if current_rig else []
+        name = str(data["background"])
+        match = [p for p in backgrounds if p == name or os.path.basename(p) == name]
+        if not match:
+            return None, f"Unknown background '{name}'"
+        overrides["background"] = match[0]
+    if not overrides:
+        return None, "Nothing to set (angle, led_pattern, background)"
+    return overrides, None
+
+def api_next():
+    """Sets (POST) or clears (DELETE) what the next step shows. Applied once, then dropped."""
+    from flask import request
+    start = time.monotonic()
+    if request.method == "DELETE":
+        with control_lock:
+            changed = bool(step_overrides)
+            step_overrides.clear()
+        return api_response(start, overrides={}, changed=changed)
+    overrides, error = parse_overrides(api_request_data())
+    if error:
+        return api_response(start, 400, error=error)
+    with control_lock:
+        changed = any(step_overrides.get(k) != v for k, v in overrides.items())
+        step_overrides.update(overrides)
+        pending = dict(step_overrides)
+    return api_response(start, overrides=pending, changed=changed)
+
+def take_overrides():
+    """Returns and clears the pending next-step overrides (session thread)."""
+    with control_lock:
+        overrides = dict(step_overrides)
+        step_overrides.clear()
+    return overrides
+
+def take_adhoc_snapshot(request_id=None):
+    """Captures every camera and writes the frames under an ad-hoc name. Returns the result, or None if no frames."""
+    start = time.monotonic()
+    name = "adhoc-" + datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    rig = current_rig
+    meta = {"adhoc": True, "request_id": request_id, "step": run_status.get("step"),
+            "angle": rig.servo_ctrl.planner.position if rig and rig.servo_ctrl else None,
+            "led_pattern": rig.led_ctrl.current_pattern if rig and rig.led_ctrl else None,
+            "background": run_status.get("background")}
+    captured = capture_snapshots()
+    capture_ms = round((time.monotonic() - start) * 1000, 3)
+    if not captured:
+        return None
+    write_snapshots(name, captured, meta)
+    return {"name": name, "views": [view for _, view, _ in captured], "capture_ms": capture_ms,
+            "write_ms": round((time.monotonic() - start) * 1000 - capture_ms, 3)}
+
+def api_snapshot():
+    from flask import request
+    start = time.monotonic()
+    data = api_request_data()
+    request_id = data.get("request_id") or request.headers.get("Idempotency-Key")
+
+    result = None
+    if request_id:
+        # Check-and-claim atomically: a duplicate of a request in progress waits for its result
+        with snapshot_lock:
+            entry = snapshot_responses.get(request_id)
+            if entry is None:
+                snapshot_responses[request_id] = in_progress = threading.Event()
+        if isinstance(entry, threading.Event):
+            entry.wait(API_SNAPSHOT_TIMEOUT)
+            with snapshot_lock:
+                entry = snapshot_responses.get(request_id)
+            if not isinstance(entry, dict):
+                return api_response(start, 409, request_id=request_id,
+                                    error=f"Snapshot {request_id} still in progress or failed")
+        if entry is not None:
+            return api_response(start, replayed=True, **entry)
+
+        try:
+            result = take_adhoc_snapshot(request_id)
+        finally:
+            with snapshot_lock:
+                if result is not None:
+                    snapshot_responses[request_id] = result
+                else:
+                    snapshot_responses.pop(request_id, None) # Failed: a retry takes a new one
+                finished = [k for k, v in snapshot_responses.items() if isinstance(v, dict)]
+                for k in finished[:max(0, len(finished) - API_RESPONSE_CACHE)]:
+                    del snapshot_responses[k]
+            in_progress.set()
+    else:
+        result = take_adhoc_snapshot()
+
+    if result is None:
+        return api_response(start, 503, error="No camera delivered a frame")
+    return api_response(start, replayed=False, **result)
+
+# ==============================================================================
+# LIVE TELEMETRY
+# ==============================================================================
+def camera_telemetry():
+    """Per camera: capture rate since the last sample and age of the newest frame."""
+    now = time.monotonic()
+    cams = {}
+    for name, cam in list(active_cameras.items()):
+        if not hasattr(cam, "get_frame_info"):
+            cams[name] = {"fps": None, "frame_age_ms": None, "frames": None}
+            continue
+        frame, frame_time, count = cam.get_frame_info()
+        cams[name] = {
+            "fps": round(camera_rates.update(name, count, now), 1),
+            "frame_age_ms": round((now - frame_time) * 1000, 1) if frame is not None else None,
+            "frames": count,
+        }
+    return cams
+
+def telemetry_sample():
+    """One telemetry snapshot (JSON-able), built on the telemetry thread."""
+    rig = current_rig
+    servo = rig.servo_ctrl if rig else None
+    scheduler = session_scheduler
+    with sync_lock:
+        sync = dict(sync_status)
+    return {
+        "time": time.time(),
+        "box": socket.gethostname(),
+        "session": session_id,
+        "state": orchestrator.state,
+        "run": dict(run_status),
+        "servo_angle": round(servo.planner.position, 1) if servo else None,
+        "led_pattern": rig.led_ctrl.current_pattern if rig and rig.led_ctrl else None,
+        "cameras": camera_telemetry(),
+        "encode": {"snapshot": snapshot_encode.summary(), "stream": stream_encode.summary()},
+        "write_queue": len(scheduler.pending) if scheduler is not None else 0,
+        "sync": sync,
+    }
+
+def api_telemetry():
+    """Server-Sent Events stream of telemetry snapshots (see telemetry.py)."""
+    from flask import Response
+    if telemetry is None:
+        return Response("telemetry not running\n", status=503, mimetype="text/plain")
+    return Response(telemetry.stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def metrics_endpoint():
+    """Prometheus scrape target (text exposition format)."""
+    from flask import Response
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+def create_app():
+    """Imports Flask and registers the routes (done on a startup thread)."""
+    from flask import Flask
+    flask_app = Flask(__name__)
+    flask_app.add_url_rule('/', 'index', index)
+    flask_app.add_url_rule('/session/start', 'session_start', session_start, methods=['POST'])
+    flask_app.add_url_rule('/video_feed/<cam_key>', 'video_feed', video_feed)
+    flask_app.add_url_rule('/api/status', 'api_status', api_status)
+    flask_app.add_url_rule('/api/session/<action>', 'api_session', api_session, methods=['POST'])
+    flask_app.add_url_rule('/api/step/next', 'api_step_next', api_step_next, methods=['POST'])
+    flask_app.add_url_rule('/api/next', 'api_next', api_next, methods=['POST', 'DELETE'])
+    flask_app.add_url_rule('/api/snapshot', 'api_snapshot', api_snapshot, methods=['POST'])
+    flask_app.add_url_rule('/api/telemetry', 'api_telemetry', api_telemetry)
+    flask_app.add_url_rule('/metrics', 'metrics', metrics_endpoint)
+    return flask_app
+
+def start_web_server():
+    global app
+    app = create_app()
+    flask_thread = threading.Thread(target=lambda: app.run(host='0.0.0.0', port=5000, debug=False, use_reloader=False, threaded=True), daemon=True)
+    flask_thread.start()
+    return app
+
 # ==============================================================================
 # LED CONTROLLER (Seed Logic)
 # ==============================================================================
+def led_pins():
+    import board
+    return getattr(board, LED_PIN_1), getattr(board, LED_PIN_2)
+
 class LEDController:
-    def __init__(self):
+    def __init__(self, pattern_seed=None):
+        import neopixel
         self.running = False
         self.thread = None
-        self.pixels_1 = neopixel.NeoPixel(LED_PIN_1, LED_COUNT_1, brightness=0.4, auto_write=False)
-        self.pixels_2 = neopixel.NeoPixel(LED_PIN_2, LED_COUNT_2, brightness=1.0, auto_write=False)
+        pin_1, pin_2 = led_pins()
+        # Strip-wide brightness stays at 1.0; per-seed brightness lives in the frame buffers
+        self.pixels_1 = neopixel.NeoPixel(pin_1, LED_COUNT_1, brightness=1.0, auto_write=False)
+        self.pixels_2 = neopixel.NeoPixel(pin_2, LED_COUNT_2, brightness=1.0, auto_write=False)
+        # STRIP: Max Brightness 0.35 to keep current under limit (120*0.06*0.35 = 2.52A)
+        self.strip_1 = LEDFrameBuffer(self.pixels_1, LED_COUNT_1, max_brightness=0.35)
+        # RING: Max Brightness 0.8 (32*0.04*0.8 = 1.02A)
+        self.strip_2 = LEDFrameBuffer(self.pixels_2, LED_COUNT_2, max_brightness=0.8)
+        self.strips = [self.strip_1, self.strip_2]
+        # Both strips are pushed concurrently and latch together
+        self.pusher = ParallelShow(self.strips)
+        # Fixed-rate animation thread; only changed strips are pushed each tick
+        self.animator = LEDAnimator(self.strips, fps=LED_FPS, show_strips=self.pusher)
+        self.transitions = []
+
+        # Pre-rendered, replayable patterns (recorded with every snapshot)
+        if pattern_seed is None:
+            pattern_seed = int(np.random.default_rng().integers(0, 2**31))
+        self.pattern_seed = pattern_seed
+        self.library = PatternLibrary([(s.count, s.max_brightness) for s in self.strips],
+                                      kinds=LED_PATTERN_KINDS, base_seed=pattern_seed)
+        self.current_pattern = None
+        self.requested_pattern = None # Set to a pattern ID to replay it on the next update
+        self.prepared = None          # (pid, frames) to use on the next update instead of the library
 
     def start(self):
         if self.running: return
         self.running = True
+        self.library.start()
+        self.animator.start()
         self.thread = threading.Thread(target=self._animate, daemon=True)
         self.thread.start()
 
     def _animate(self):
         # Initial Light Up
-        self._set_seeds()
+        self._next_pattern()
         
         while self.running:
-            # Wait for signal OR just update
+            # Wait for signal
             if led_update_event.wait(timeout=0.1):
-                self._set_seeds()
                 led_update_event.clear()
-            
-            if not self.running: break
-
-    def _set_seeds(self):
-        # STRIP: 1 to 3 seeds
-        # Max Brightness 0.35 to keep current under limit (120*0.06*0.35 = 2.52A)
-        self._apply_seed_logic(self.pixels_1, LED_COUNT_1, random.randint(1, 3), max_brightness=0.35)
-        # RING: 2 seeds
-        # Max Brightness 0.8 (32*0.04*0.8 = 1.02A)
-        self._apply_seed_logic(self.pixels_2, LED_COUNT_2, 2, max_brightness=0.8)
-
-    def _apply_seed_logic(self, pixels, num_leds, num_seeds, max_brightness=1.0):
-        pixels.fill((0, 0, 0)) # Clear
-        
-        # Avoid division by zero
-        if num_seeds < 1: num_seeds = 1
-        max_lit = num_leds // num_seeds 
-        if max_lit < 1: max_lit = 1
-
-        for _ in range(num_seeds):
-            # 1. Random Seed Position
-            pos = random.randint(0, num_leds - 1)
-            
-            # 2. Random number of LEDs to light up (1 to max_lit)
-            lit_count = random.randint(1, max_lit)
-            
-            # 3. Random Color (Yellow to White) & Brightness
-            # Scaled to safety limit
-            safe_b = random.uniform(0.1, max_brightness)
-            pixels.brightness = safe_b 
-            
-            # Colors: Yellow(255,255,0) -> White(255,255,255)
-            # R=255, G=255, B=0-255
-            blue_val = random.randint(0, 255)
-            
-            color = (255, 255, blue_val)
+                if not self.running: break
+                self._next_pattern()
 
-            # 4. Light up neighbors to the right
-            for i in range(lit_count):
-                idx = pos + i
-                if idx < num_leds:
-                    pixels[idx] = color
-        
-        pixels.show()
+    def prepare_pattern(self):
+        """Returns the next (pid, frames): a requested replay, else the library's next pattern."""
+        if self.requested_pattern:
+            pid, frames = self.library.get(self.requested_pattern)
+            self.requested_pattern = None
+            return pid, frames
+        return self.library.next()
+
+    def _next_pattern(self):
+        prepared, self.prepared = self.prepared, None
+        pid, frames = prepared if prepared else self.prepare_pattern()
+        self.show_pattern(pid, frames)
+
+    def show_pattern(self, pid, frames):
+        """Cross-fades every strip to a pre-rendered pattern."""
+        self.transitions = [self.animator.fade_to(i, rgb, level, duration=LED_FADE_TIME)
+                            for i, (rgb, level) in enumerate(frames)]
+        self.current_pattern = pid
+
+    def fade_off(self, duration=LED_FADE_TIME):
+        """Fades every strip to dark (threads keep running, unlike stop())."""
+        self.transitions = [self.animator.fade_to(i, s.rgb.copy(), np.zeros(s.count, np.float32), duration=duration)
+                            for i, s in enumerate(self.strips)]
+        self.current_pattern = None
+
+    def wait_settled(self, timeout=2.0):
+        """Blocks until the latest lighting transition has been fully shown."""
+        deadline = time.monotonic() + timeout
+        for t in list(self.transitions):
+            if not t.done.wait(max(0.0, deadline - time.monotonic())):
+                return False
+        return True
+
+    def settled_time(self):
+        """time.monotonic() when the latest transition finished showing (None if still running)."""
+        times = [t.done_time for t in list(self.transitions)]
+        if not times or any(t is None for t in times):
+            return None
+        return max(times)
 
     def stop(self):
         self.running = False
@@ -428,15 +920,73 @@ class LEDController:
         if self.thread: 
             self.thread.join()
             self.thread = None
+        self.library.stop()
+        self.animator.stop()
+        self.pusher.stop()
         try:
-            self.pixels_1.fill((0,0,0)); self.pixels_1.show()
-            self.pixels_2.fill((0,0,0)); self.pixels_2.show()
+            self.strip_1.off()
+            self.strip_2.off()
         except: pass
 
 # ==============================================================================
 # SNAPSHOT LOGIC
 # ==============================================================================
-def save_snapshots(counter):
+def crop_for_camera(name, frame):
+    """
+    Applies the per-camera crop and returns (view, frame).
+    'view' is the file prefix, e.g. 'USB0', 'CSI45', 'CSI90'.
+    """
+    h, w = frame.shape[:2]
+
+    if "USB" in name:
+        # Crop Upper 30%, Left 15%, Right 15%
+        # Result: y[0.3h : h], x[0.15w : 0.85w]
+        y_start = int(0.3 * h)
+        x_start = int(0.15 * w)
+        x_end = int(0.85 * w)
+        idx = name.split()[-1]
+        return f"USB{idx}", frame[y_start:h, x_start:x_end]
+
+    elif "CSI" in name:
+        idx = name.split()[-1]
+
+        if idx == "1": # Specific Request for CSI 1
+            # Crop Lower 30%, Left 10%, Right 10%
+            # Result: y[0 : 0.7h], x[0.1w : 0.9w]
+            y_end = int(0.7 * h)
+            x_start = int(0.1 * w)
+            x_end = int(0.9 * w)
+            return "CSI45", frame[0:y_end, x_start:x_end]
+
+        elif idx == "0":
+            # No Crop for CSI 0
+            return "CSI90", frame
+        else:
+            return "CSI_Unknown", frame
+
+    return None, frame
+
+def capture_snapshots():
+    """Grabs the current frame of every camera, cropped. Returns a list of (camera, view, frame)."""
+    captured = []
+    for name, cam in list(active_cameras.items()):
+        frame = cam.get_frame()
+        if frame is None:
+            continue
+        view, frame = crop_for_camera(name, frame)
+        if view:
+            captured.append((name, view, frame))
+    return captured
+
+def write_snapshots(counter, captured, metadata=None):
+    """
+    Encodes and writes captured frames (JPEG files, archive, shard). Safe to
+    run off the main thread. 'counter' is the step number, or a name for
+    ad-hoc snapshots.
+    """
+    import cv2
+    write_start = time.monotonic()
+    encode = jpeg_encode_seconds.labels("snapshot")
     # Save to 'Color' folder in Repo Root
     base_path = 'Color'
     
@@ -445,52 +995,63 @@ def save_snapshots(counter):
         except: pass
         
     print(f"  [Snap] Saving images to {base_path}...")
+
+    # Encoded once, shared by the JPEG files and the shard sink
+    views = {}
+    view_info = {}
     
-    for name, cam in active_cameras.items():
-        frame = cam.get_frame()
-        if frame is not None:
-            filename = ""
-            h, w = frame.shape[:2]
-            
-            # ------------------------------------------------------------------
-            # CROPPING LOGIC
-            # ------------------------------------------------------------------
-            if "USB" in name:
-                # Crop Upper 30%, Left 15%, Right 15%
-                # Result: y[0.3h : h], x[0.15w : 0.85w]
-                y_start = int(0.3 * h)
-                x_start = int(0.15 * w)
-                x_end = int(0.85 * w)
-                frame = frame[y_start:h, x_start:x_end]
-                
-                idx = name.split()[-1]
-                filename = f"USB{idx}_{counter}.jpg"
-                
-            elif "CSI" in name:
-                idx = name.split()[-1]
-                
-                if idx == "1": # Specific Request for CSI 1
-                    # Crop Lower 30%, Left 10%, Right 10%
-                    # Result: y[0 : 0.7h], x[0.1w : 0.9w]
-                    y_end = int(0.7 * h)
-                    x_start = int(0.1 * w)
-                    x_end = int(0.9 * w)
-                    frame = frame[0:y_end, x_start:x_end]
-                    filename = f"CSI45_{counter}.jpg"
-                    
-                elif idx == "0": 
-                    # No Crop for CSI 0
-                    filename = f"CSI90_{counter}.jpg"
-                else: 
-                    filename = f"CSI_Unknown_{counter}.jpg"
-            
-            # Save
-            if filename:
-                full_path = os.path.join(base_path, filename)
-                try:
-                    cv2.imwrite(full_path, frame)
-                except Exception as e:
-                    print(f"    Failed to save {filename}: {e}")
+    for name, view, frame in captured:
+        filename = f"{view}_{counter}.jpg"
+
+        t0 = time.monotonic()
+        ret, buffer = cv2.imencode('.jpg', frame)
+        encoded = time.monotonic() - t0
+        snapshot_encode.add(encoded)
+        encode.observe(encoded)
+        if not ret:
+            print(f"    Failed to encode {filename}")
+            continue
+        data = buffer.tobytes()
+
+        # Save
+        full_path = os.path.join(base_path, filename)
+        try:
+            with open(full_path, 'wb') as f:
+                f.write(data)
+            with sync_lock:
+                sync_status["unsynced"] += 1
+        except Exception as e:
+            print(f"    Failed to save {filename}: {e}")
+
+        views[f"{view.lower()}.jpg"] = data
+        view_info[view] = {"camera": name, "shape": list(frame.shape)}
+
+        # Raw Archive (one memory-mapped file per session/camera)
+        if ENABLE_ARCHIVE:
+            try:
+                with archive_lock:
+                    archive = frame_archives.get(view)
+                    if archive is None:
+                        archive = FrameArchiveWriter(ARCHIVE_FOLDER, session_id, view, frame.shape)
+                        frame_archives[view] = archive
+                    archive.append(frame, {"step": counter})
+            except Exception as e:
+                print(f"    Failed to archive {filename}: {e}")
+
+    # Shard Sink (one sample = all views of this step)
+    if shard_writer is not None and views:
+        meta = {"step": counter, "time": time.time(), "session": session_id, "views": view_info}
+        if metadata:
+            meta.update(metadata)
+        try:
+            key = f"{session_id}_{counter:06d}" if isinstance(counter, int) else f"{session_id}_{counter}"
+            shard_writer.write_sample(key, views, meta)
+        except Exception as e:
+            print(f"    Failed to write shard sample: {e}")
+    snapshot_write_seconds.observe(time.monotonic() - write_start)
+
+def save_snapshots(counter, metadata=None):
+    write_snapshots(counter, capture_snapshots(), metadata)
 
 # ==============================================================================
 # SERVO CONTROLLER (10-Step Random)
@@ -499,32 +1060,44 @@ class ServoController:
     def __init__(self, kit):
         self.kit = kit
         self.servo = self.kit.servo[0]
-
-    def move_to(self, target, speed):
         start = self.servo.angle
         if start is None: start = 0
-        dist = abs(target - start)
-        duration = dist / speed
-        steps = int(duration * 50) 
-        if steps < 1: steps = 1
-        
-        delta = (target - start) / steps
-        curr = start
-        
-        for _ in range(steps):
-            curr += delta
-            if curr < 0: curr = 0
-            if curr > 180: curr = 180
-            self.servo.angle = curr
-            time.sleep(0.02)
-        self.servo.angle = target
+        # Profiled moves run on the planner thread (absolute deadlines)
+        self.planner = MotionPlanner(self._set_angle, position=start, rate=SERVO_RATE,
+                                     profile=SERVO_PROFILE, accel=SERVO_ACCEL)
+        self.planner.start()
+        self.last_move = None
+
+    def _set_angle(self, angle):
+        self.servo.angle = angle
+
+    def move_to(self, target, speed, wait=True):
+        """
+        Moves to 'target' with the speed limit 'speed' (deg/s). Returns the
+        Move handle (planned/actual duration); with wait=False it returns
+        right away and move.done is set on arrival.
+        """
+        self.planner.start() # No-op unless stopped by release()
+        move = self.planner.move_to(target, speed)
+        self.last_move = move
+        if wait:
+            # Bounded: a stop()/release() mid-move cancels it, a stalled planner must not hang us
+            if not move.wait(timeout=move.planned + SERVO_WAIT_MARGIN):
+                print(f"  [Servo] Move not finished in time: {move}")
+            if move.actual is not None:
+                servo_move_seconds.observe(move.actual)
+        return move
 
     def return_to_zero(self):
         SPEED = 180.0 / 5.0
         self.move_to(0, SPEED)
 
+    def stop(self):
+        self.planner.stop()
+
     def release(self):
         """Stops sending pulses to the servo, allowing it to move freely."""
+        self.planner.stop()
         try:
             self.servo.angle = None
             print("  [Servo] Released (Motor free).")
@@ -533,6 +1106,10 @@ class ServoController:
 # ==============================================================================
 # MAIN LOGIC
 # ==============================================================================
+def display_path(path):
+    """The 16:9 cropped copy of a source image (crop_images.py), or the source if there is none yet."""
+    return cropped_path(path, CROPPED_FOLDER)
+
 def get_all_ips():
     try:
         result = subprocess.run(['hostname', '-I'], capture_output=True, text=True)
@@ -540,84 +1117,372 @@ def get_all_ips():
         return [ip for ip in ips if ip]
     except: return []
 
-def main():
-    lcd = None
+# ==============================================================================
+# UNATTENDED MODE
+# ==============================================================================
+def parse_duration(text):
+    """'90' -> 90 s, '45m', '8h', '1h30m', '2h15m10s' -> seconds."""
+    text = text.strip().lower()
     try:
-        lcd = RGB1602(16, 2)
-    except: print("LCD Init Failed")
+        return float(text)
+    except ValueError:
+        pass
+    total, number = 0.0, ""
+    units = {"h": 3600, "m": 60, "s": 1}
+    for ch in text:
+        if ch.isdigit() or ch == ".":
+            number += ch
+        elif ch in units and number:
+            total += float(number) * units[ch]
+            number = ""
+        else:
+            raise argparse.ArgumentTypeError(f"Invalid duration '{text}'")
+    if number:
+        raise argparse.ArgumentTypeError(f"Invalid duration '{text}' (missing unit)")
+    return total
 
-    button = Button(BUTTON_PIN, pull_up=False)
+class RunBudget:
+    """Stops a run after 'steps' steps, 'duration' seconds or 'count' captured images (None = no limit)."""
+    def __init__(self, steps=None, duration=None, count=None):
+        self.steps = steps
+        self.duration = duration
+        self.count = count
+        self.start_time = None
 
-    kit = None
-    try: kit = ServoKit(channels=16)
-    except: print("ServoKit Init Failed")
+    def start(self):
+        self.start_time = time.monotonic()
 
-    led_ctrl = LEDController()
-    servo_ctrl = ServoController(kit) if kit else None
+    def elapsed(self):
+        return time.monotonic() - self.start_time if self.start_time else 0.0
 
-    # Start Cameras
-    for i in range(2):
-        try:
-            cam = CSICameraStream(i)
-            if cam.start(): active_cameras[f"CSI Camera {i}"] = cam
-        except: pass
-    for i in range(10): 
+    def exhausted(self, steps_done, images_done):
+        """Returns why the run should stop, or None."""
+        if self.steps is not None and steps_done >= self.steps:
+            return f"{steps_done} steps done"
+        if self.duration is not None and self.elapsed() >= self.duration:
+            return f"time budget ({self.duration:.0f} s) reached"
+        if self.count is not None and images_done >= self.count:
+            return f"image budget ({self.count}) reached"
+        return None
+
+    def status(self, steps_done, images_done):
+        """Two 16-character LCD lines of progress."""
+        line1 = f"Step {steps_done}" + (f"/{self.steps}" if self.steps is not None else "")
+        if self.duration is not None:
+            left = max(0, int(self.duration - self.elapsed()))
+            line2 = f"{left // 3600}:{left // 60 % 60:02d}:{left % 60:02d} left"
+        elif self.count is not None:
+            line2 = f"Img {images_done}/{self.count}"
+        else:
+            line2 = f"Img {images_done}"
+        return line1[:16].ljust(16), line2[:16].ljust(16)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Dataset capture box.")
+    parser.add_argument("--unattended", action="store_true",
+                        help="Run without button presses (press = pause/resume, hold = stop)")
+    parser.add_argument("--steps", type=int, default=None,
+                        help=f"Number of steps (default {SESSION_STEPS}; unattended: no limit if another budget is set)")
+    parser.add_argument("--duration", type=parse_duration, default=None,
+                        help="Unattended time budget, e.g. 3600, 45m, 8h")
+    parser.add_argument("--count", type=int, default=None,
+                        help="Unattended budget of captured images")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Keep the hardware up and run sessions back to back (button or POST /session/start)")
+    return parser.parse_args(argv)
+
+# ==============================================================================
+# SESSION / DAEMON
+# ==============================================================================
+class Rig:
+    """Hardware and long-lived services. Initialized once; daemon mode reuses it for every session."""
+    def __init__(self):
+        self.lcd = None
+        self.button = None
+        self.kit = None
+        self.led_ctrl = None
+        self.servo_ctrl = None
+        self.renderer = None
+        self.bg_cache = None
+        self.images = []
+        self.backgrounds = []
+        self.readiness = {}   # Startup report: subsystem -> status / init time
+
+def show_run_state(lcd, event, old, new):
+    """Orchestrator listener: pause/resume feedback on the LCD."""
+    if not lcd or old == new:
+        return
+    try:
+        if new == PAUSED:
+            lcd.setCursor(0,0); lcd.print("Paused          ")
+            lcd.setCursor(0,1); lcd.print("Press=go Hold=x ")
+        elif old == PAUSED and new == RUNNING:
+            lcd.setCursor(0,0); lcd.print("Running...      ")
+            lcd.setCursor(0,1); lcd.print("                ")
+    except: pass
+
+def stop_started(startup):
+    """Startup failed: stops every subsystem that did come up (cameras, LEDs, servo, display, button)."""
+    for name, task in startup.tasks.items():
+        result = task.result
+        if result is None:
+            continue
         try:
-            cam = USBCameraStream(i)
-            if cam.start():
-                print(f"  -> USB Camera {i} is VALID.")
-                active_cameras[f"USB Camera {i}"] = cam
-        except: pass
+            if name.startswith(("csi", "usb")) or name == "leds":
+                result.stop()
+            elif name == "servo":
+                result.release()
+            elif name == "display":
+                result[0].stop()
+            elif name == "button":
+                result.close()
+        except Exception as e:
+            print(f"  [Startup] Stopping {name} failed: {e}")
 
-    # Flask
-    flask_thread = threading.Thread(target=lambda: app.run(host='0.0.0.0', port=5000, debug=False, use_reloader=False, threaded=True), daemon=True)
-    flask_thread.start()
+def init_rig():
+    """
+    Initializes every subsystem concurrently (see startup.py). The LCD greets
+    as soon as it is up; slow devices (cameras, I2C) don't hold up the rest.
+    """
+    global current_rig, telemetry
+    rig = Rig()
+    startup = Startup(default_timeout=INIT_TIMEOUT)
+    if "DISPLAY" not in os.environ: os.environ["DISPLAY"] = ":0"
+
+    def init_lcd():
+        from rgb1602 import RGB1602
+        lcd = RGB1602(16, 2)
+        lcd.setRGB(200, 200, 200)
+        lcd.clear()
+        lcd.setCursor(0,0); lcd.print("Hello! Press to")
+        lcd.setCursor(0,1); lcd.print("start ----->")
+        return lcd
+
+    def init_display():
+        # Display: all window handling lives on the renderer thread
+        renderer = DisplayRenderer("Slideshow")
+        renderer.start()
+        # Background Cache: pre-scaled to the display, RAM LRU + disk (.bg_cache)
+        bg_cache = BackgroundCache(max_items=BG_CACHE_ITEMS)
+        print(f"  [BG Cache] Display {bg_cache.display_size[0]}x{bg_cache.display_size[1]}")
+        start_img_path = display_path(os.path.join(IMAGE_FOLDER, "Start.jpeg"))
+        if os.path.exists(start_img_path):
+            img = bg_cache.get(start_img_path)
+            if img is not None:
+                renderer.present(img, timeout=0)
+        return renderer, bg_cache
+
+    def init_button():
+        from gpiozero import Button
+        return Button(BUTTON_PIN, pull_up=False)
+
+    def init_servo():
+        from adafruit_servokit import ServoKit
+        return ServoController(ServoKit(channels=16))
+
+    def import_picamera():
+        import CSI_camera # Picamera2 is the slowest import; done once, off the main thread
+        return CSI_camera
+
+    def init_csi(i):
+        cam = startup.result("picamera").CameraStream(i)
+        return cam if cam.start() else None
+
+    def init_usb(i):
+        cam = USBCameraStream(i)
+        return cam if cam.start() else None
+
+    def stop_late(cam):
+        cam.stop()
+
+    startup.add("lcd", init_lcd)
+    startup.add("display", init_display)
+    startup.add("button", init_button)
+    startup.add("servo", init_servo)
+    startup.add("leds", LEDController)
+    startup.add("web", start_web_server)
+    startup.add("picamera", import_picamera)
+    for i in range(NUM_CSI_CAMERAS):
+        startup.add(f"csi{i}", lambda i=i: init_csi(i), timeout=CAMERA_INIT_TIMEOUT, after=["picamera"],
+                    on_late=stop_late)
+    for i in range(NUM_USB_PROBES):
+        startup.add(f"usb{i}", lambda i=i: init_usb(i), timeout=CAMERA_INIT_TIMEOUT, on_late=stop_late)
+    startup.run()
+
+    rig.lcd = startup.result("lcd")
+    if rig.lcd is None: print("LCD Init Failed")
+    rig.servo_ctrl = startup.result("servo")
+    if rig.servo_ctrl is None: print("ServoKit Init Failed")
+    else: rig.kit = rig.servo_ctrl.kit
+    rig.button = startup.result("button")
+    rig.led_ctrl = startup.result("leds")
+    for name in ("button", "leds"):
+        if not startup.ok(name):
+            # main()'s cleanup never sees this rig: stop what is already running here
+            stop_started(startup)
+            raise RuntimeError(f"{name} init failed: {startup.tasks[name].error or startup.tasks[name].status}")
+    # The slideshow is optional: without it, sessions run with the LEDs and servo only
+    if startup.ok("display"):
+        rig.renderer, rig.bg_cache = startup.result("display")
+    else:
+        print("Display Init Failed (running without the slideshow)")
+
+    # Button presses, 'q' in the window and HTTP commands all go through the orchestrator
+    orchestrator.attach_button(rig.button, hold_time=BUTTON_HOLD_TIME)
+    if rig.renderer is not None:
+        orchestrator.attach_renderer(rig.renderer)
+    orchestrator.listeners.append(lambda ev, old, new: show_run_state(rig.lcd, ev, old, new))
+    orchestrator.start()
+
+    # Dashboard telemetry; state changes are pushed right away
+    telemetry = Telemetry(telemetry_sample, interval=TELEMETRY_INTERVAL)
+    orchestrator.listeners.append(lambda ev, old, new: telemetry.publish_now() if old != new else None)
+    telemetry.start()
+
+    # Cameras keep streaming until shutdown_rig (same naming/order as before)
+    for i in range(NUM_CSI_CAMERAS):
+        cam = startup.result(f"csi{i}")
+        if cam is not None: active_cameras[f"CSI Camera {i}"] = cam
+    for i in range(NUM_USB_PROBES):
+        cam = startup.result(f"usb{i}")
+        if cam is not None:
+            print(f"  -> USB Camera {i} is VALID.")
+            active_cameras[f"USB Camera {i}"] = cam
 
     # Images
     if os.path.exists(IMAGE_FOLDER):
-        exts = ('.jpg', '.jpeg', '.png', '.bmp')
-        images = [os.path.join(IMAGE_FOLDER, f) for f in os.listdir(IMAGE_FOLDER) if f.lower().endswith(exts)]
-        images.sort() # Alphabetical order
+        rig.images = [display_path(os.path.join(IMAGE_FOLDER, f)) for f in os.listdir(IMAGE_FOLDER) if f.lower().endswith(VALID_EXTS)]
+        rig.images.sort(key=os.path.basename) # Alphabetical order (mix of cropped and original paths)
+    rig.backgrounds = [p for p in rig.images if os.path.basename(p) not in SCREEN_IMAGES]
+    if rig.bg_cache is not None and rig.images:
+        # Decode + scale every background to the disk cache while waiting for the first session
+        print(f"  [BG Cache] Warming {len(rig.images)} images")
+        rig.bg_cache.warm_async(rig.images)
 
-    if "DISPLAY" not in os.environ: os.environ["DISPLAY"] = ":0"
-    window_name = "Slideshow"
+    rig.readiness = startup.report()
+    if rig.renderer is None:
+        rig.readiness["display"]["warning"] = "no slideshow: backgrounds are not shown"
+    current_rig = rig
 
     # Network Debug
     ips = get_all_ips()
     print("\n" + "="*40); print("       NETWORK DIAGNOSTICS"); print("="*40)
     for i, ip in enumerate(ips): print(f"  {i+1}. http://{ip}:5000")
     print("="*40 + "\n")
+    return rig
+
+def begin_session():
+    """Resets per-session state: new session ID, shard writer and archives."""
+    global session_id, shard_writer, frame_archives
+    session_id = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    shard_writer = None
+    with archive_lock:
+        frame_archives = {}
+    run_status.clear()
+    if ENABLE_SHARDS:
+        try: shard_writer = TarShardWriter(SHARD_FOLDER, prefix=f"dab-{session_id}", max_bytes=SHARD_MAX_BYTES)
+        except Exception as e: print(f"Shard Writer Init Failed: {e}")
+    print(f"[Session] {session_id}")
+
+def end_session():
+    """Closes the session's shard writer and archives."""
+    global shard_writer
+    if shard_writer is not None:
+        try: shard_writer.close()
+        except Exception as e: print(f"  -> Shard close failed: {e}")
+        shard_writer = None
+    with archive_lock:
+        for archive in frame_archives.values():
+            try: archive.close()
+            except Exception as e: print(f"  -> Archive close failed: {e}")
+        frame_archives.clear()
+
+def show_start_screen(rig, args):
+    # LCD: White (200, 200, 200)
+    # "Hello! Press to // start ----->"
+    if rig.lcd:
+        try:
+            rig.lcd.setRGB(200, 200, 200)
+            rig.lcd.clear()
+            if args.unattended and not args.daemon:
+                rig.lcd.setCursor(0,0); rig.lcd.print("Unattended run")
+                rig.lcd.setCursor(0,1); rig.lcd.print("Hold btn = stop")
+            else:
+                rig.lcd.setCursor(0,0); rig.lcd.print("Hello! Press to")
+                rig.lcd.setCursor(0,1); rig.lcd.print("start ----->")
+        except: pass
+    
+    # Show Start.jpeg
+    start_img_path = display_path(os.path.join(IMAGE_FOLDER, "Start.jpeg"))
+    if rig.renderer is not None and os.path.exists(start_img_path):
+        img = rig.bg_cache.get(start_img_path)
+        if img is not None:
+            rig.renderer.present(img, timeout=0)
+
+def run_session(rig, args, wait_start=True):
+    """
+    One capture session on an initialized rig: plan, start screen, steps,
+    finish screen. Hardware is left running (cameras streaming, LEDs faded
+    off, servo at 0) so the next session can start right away.
+    """
+    global session_scheduler
+    lcd, renderer, bg_cache = rig.lcd, rig.renderer, rig.bg_cache
+    led_ctrl, servo_ctrl = rig.led_ctrl, rig.servo_ctrl
+    backgrounds = rig.backgrounds
+    begin_session()
+
+    # Run budget: attended runs are a fixed number of steps
+    if args.unattended:
+        steps = args.steps
+        if steps is None and args.duration is None and args.count is None:
+            steps = SESSION_STEPS
+        budget = RunBudget(steps, args.duration, args.count)
+        print(f"  [Run] Unattended: steps={budget.steps} duration={budget.duration} count={budget.count}")
+    else:
+        budget = RunBudget(args.steps or SESSION_STEPS)
+
+    # Session planned up front (continues the sequence of earlier sessions,
+    # starting with the points stopped sessions never reached).
+    # Unattended runs plan one sweep at a time and grow the plan as they go.
+    first_block = budget.steps if not args.unattended else min(SESSION_STEPS, budget.steps or SESSION_STEPS)
+    pending = pending_points(PLAN_FOLDER)
+    plan = make_plan(first_block, backgrounds, index=next_plan_index(PLAN_FOLDER), kinds=LED_PATTERN_KINDS,
+                     pending=pending)
+    plan.executed = 0 # Counted up as steps run; saved at the end of the session
+    plan_path = os.path.join(PLAN_FOLDER, f"{session_id}_plan.json")
+    try:
+        plan.save(plan_path)
+        print(f"  [Plan] #{plan.index}: {len(plan)} steps ({plan.params['reused']} re-planned), "
+              f"servo travel {plan.travel():.0f} deg -> {plan_path}")
+    except Exception as e:
+        print(f"  [Plan] Save failed: {e}")
+
+    bg_prefetch = None
+    display_confirm = None
+    lighting_confirm = None
+    scheduler = None
 
     try:
         # ==========================================
         # PHASE 1: START SCREEN
         # ==========================================
-        print("PHASE 1: Waiting for Button...")
-        
-        # LCD: White (200, 200, 200)
-        # "Hello! Press to // start ----->"
-        if lcd:
-            lcd.setRGB(200, 200, 200)
-            lcd.clear()
-            lcd.setCursor(0,0); lcd.print("Hello! Press to")
-            lcd.setCursor(0,1); lcd.print("start ----->")
+        show_start_screen(rig, args)
         
-        # Show Start.jpeg
-        start_img_path = os.path.join(IMAGE_FOLDER, "Start.jpeg")
-        if os.path.exists(start_img_path):
-            img = cv2.imread(start_img_path)
-            if img is not None:
-                cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
-                cv2.setWindowProperty(window_name, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
-                cv2.imshow(window_name, img)
-                cv2.waitKey(10)
-        
-        # Wait for button with 'q' check
-        while not button.is_pressed:
-            if cv2.waitKey(50) == ord('q'):
-                raise KeyboardInterrupt
-        
-        print("Button Pressed! Starting...")
+        # Decode the first backgrounds while waiting, then stay ahead of the steps
+        if bg_cache is not None:
+            step_order = [s["background"] for s in plan.steps if s["background"]]
+            bg_prefetch = BackgroundPrefetcher(bg_cache, step_order, depth=BG_PREFETCH_DEPTH)
+            bg_prefetch.start()
+
+        if wait_start:
+            print("PHASE 1: Waiting for Button...")
+            # Button press or POST /session/start ('q' raises KeyboardInterrupt)
+            orchestrator.wait_start()
+            print("Button Pressed! Starting...")
+        else:
+            print("PHASE 1: Starting...")
+        # Unattended: no one presses to advance, so a press pauses instead
+        orchestrator.begin(pause_on_press=args.unattended)
 
         # ==========================================
         # PHASE 2: SEQUENTIAL WORKFLOW
@@ -634,75 +1499,182 @@ def main():
         if servo_ctrl:
             servo_ctrl.return_to_zero()
 
-        current_angle = 0.0
-        direction = 1 # 1=Up, -1=Down
+        img_path = None
+        shown_path = None
+        display_confirm = DisplayConfirmer(active_cameras, timeout=DISPLAY_CONFIRM_TIMEOUT)
+        lighting_confirm = LightingConfirmer(active_cameras, timeout=LIGHTING_CONFIRM_TIMEOUT)
         SPEED = 180.0 / 5.0 # deg/sec
-        
-        # 10 Steps
-        for step_idx in range(1, 11):
+        # Planned steps, pipelined: step N+1's background decode and lighting render
+        # (prepare) and step N's encode/write (persist) run on worker threads
+        scheduler = StepScheduler(workers=PERSIST_WORKERS)
+        session_scheduler = scheduler
+        timeline = scheduler.timeline
+
+        def prepare_step(idx):
+            """Decoded background and rendered LED pattern for step idx."""
+            step = plan.steps[idx - 1]
+            bg = bg_prefetch.get(idx - 1) if step["background"] and bg_prefetch is not None else None
+            return bg, led_ctrl.library.get(step["led_pattern"])
+
+        def extend_plan(n):
+            """Unattended: plans further sweeps until 'n' steps are planned. Returns True if step n exists."""
+            while args.unattended and len(plan) < n:
+                block = SESSION_STEPS if budget.steps is None else min(SESSION_STEPS, budget.steps - len(plan))
+                if block <= 0:
+                    break
+                plan.extend(make_plan(block, backgrounds, index=plan.end_index, kinds=LED_PATTERN_KINDS,
+                                      start_angle=plan.steps[-1]["angle"] if plan.steps else 0.0,
+                                      pending=pending[len(plan):]))
+                if bg_prefetch is not None:
+                    bg_prefetch.set_order([s["background"] for s in plan.steps if s["background"]],
+                                          position=bg_prefetch.position)
+                try: plan.save(plan_path)
+                except Exception as e: print(f"  [Plan] Save failed: {e}")
+            return len(plan) >= n
+
+        prepared = scheduler.submit(1, "prepare", prepare_step, 1) if len(plan) else None
+        persist = None
+        images_captured = 0
+        budget.start()
+        if budget.duration is not None:
+            orchestrator.call_later(budget.duration, "budget.expired",
+                                    reason=f"time budget ({budget.duration:.0f} s) reached")
+        step_idx = 0
+        while step_idx < len(plan):
+            # Between steps: budget, then pause/abort (unattended)
+            reason = budget.exhausted(step_idx, images_captured) or orchestrator.checkpoint()
+            if reason:
+                print(f"  [Run] Stopping: {reason}")
+                break
+            step_start = time.monotonic()
+            step = plan.steps[step_idx]
+            step_idx = step["step"]
+            try:
+                raw_img, pattern = prepared.result()
+            except Exception as e:
+                print(f"  [Step {step_idx}] Prepare failed: {e}")
+                raw_img, pattern = None, None
+            if extend_plan(step_idx + 1):
+                prepared = scheduler.submit(step_idx + 1, "prepare", prepare_step, step_idx + 1)
+
+            # Overrides from the control API replace the planned values (recorded in the plan)
+            override = take_overrides()
+            if override:
+                step.update(override)
+                step["override"] = sorted(override)
+                print(f"  [Step {step_idx}] Override: {override}")
+                try:
+                    if "background" in override and bg_cache is not None:
+                        raw_img = bg_cache.get(override["background"])
+                    if "led_pattern" in override:
+                        pattern = led_ctrl.library.get(override["led_pattern"])
+                except Exception as e:
+                    print(f"  [Step {step_idx}] Override failed: {e}")
+                try: plan.save(plan_path)
+                except Exception as e: print(f"  [Plan] Save failed: {e}")
+            run_status.update({"step": step_idx, "steps_planned": len(plan), "angle": step["angle"],
+                               "background": step["background"], "led_pattern": step["led_pattern"],
+                               "images": images_captured})
             
-            # 1. Update Background (Alphabetical)
-            if images:
-                # Use modulo if we have fewer images than steps
-                img_idx = (step_idx - 1) % len(images)
-                img_path = images[img_idx]
+            # 1. Update Background (from the plan)
+            display_result = None
+            if step["background"]:
+                img_path = step["background"]
                 
                 # Show Image
                 try:
-                    raw_img = cv2.imread(img_path)
                     if raw_img is not None:
-                        cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
-                        cv2.setWindowProperty(window_name, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
-                        cv2.imshow(window_name, raw_img)
-                        cv2.waitKey(10)
+                        with timeline.span(step_idx, "display"):
+                            # Baseline before presenting (skip if the background doesn't change)
+                            token = display_confirm.arm() if img_path != shown_path else None
+                            renderer.present(raw_img)
+                            shown_path = img_path
+
+                            # Wait until the cameras actually see the new background
+                            if token is not None and token["baseline"]:
+                                display_result = display_confirm.wait(token)
+                                print(f"  [Step {step_idx}] Display {display_result}")
                 except: pass
             
             print(f"  [Step {step_idx}] Image Updated. Moving Servo...")
             
             # 2. Move Servo
+            lighting_result = None
+            move_start = time.monotonic()
             if servo_ctrl:
-                # Trigger LED change
+                # Trigger LED change (luminance baseline first)
+                light_token = lighting_confirm.arm()
+                # Same pattern again: nothing new to see, only wait for stability
+                light_changes = pattern is None or pattern[0] != led_ctrl.current_pattern
+                led_ctrl.prepared = pattern
                 led_update_event.set()
                 
-                # Calculate next angle
-                step_size = random.randint(3, 30)
-                next_angle = current_angle + (step_size * direction)
-                
-                # Bounce Logic
-                if next_angle > 180:
-                    next_angle = 180 - (next_angle - 180)
-                    direction = -1
-                    if current_angle > 150: direction = -1
-                    next_angle = current_angle - step_size if direction == -1 else current_angle + step_size
-                elif next_angle < 0:
-                    direction = 1
-                    next_angle = current_angle + step_size
-                
-                # Clamp
-                next_angle = max(0, min(180, next_angle))
-                
-                servo_ctrl.move_to(next_angle, SPEED)
-                current_angle = next_angle
+                move = scheduler.run(step_idx, "move", servo_ctrl.move_to, step["angle"], SPEED)
+                print(f"  [Step {step_idx}] {move}")
                 
             # 3. Take Snapshots
+            # Settle: wait until the new lighting and pose look stable on every camera
+            with timeline.span(step_idx, "settle"):
+                if servo_ctrl:
+                    moved = time.monotonic()
+                    led_ctrl.wait_settled(timeout=LED_FADE_TIME + 1.0)
+                    since = max(moved, led_ctrl.settled_time() or moved)
+                    if light_token["baseline"]:
+                        lighting_result = lighting_confirm.wait(light_token, since, expect_change=light_changes)
+                        print(f"  [Step {step_idx}] Lighting {lighting_result}")
+                if lighting_result is None or not lighting_result.confirmed:
+                    remaining = SETTLE_TIME - (time.monotonic() - move_start)
+                    if remaining > 0:
+                        time.sleep(remaining) # Fall back to the fixed settle time
             print(f"  [Step {step_idx}] Taking Snapshots...")
-            time.sleep(1.0) # Settle time
-            save_snapshots(step_idx)
+            captured = scheduler.run(step_idx, "capture", capture_snapshots)
+            images_captured += len(captured)
+            plan.executed = step_idx
+            run_status["images"] = images_captured
+            step_seconds.observe(time.monotonic() - step_start)
+            meta = {"angle": step["angle"], "background": img_path, "led_pattern": led_ctrl.current_pattern,
+                    "plan_index": plan.index, "halton_index": step["halton"]}
+            if override:
+                meta["override"] = sorted(override)
+            if display_result is not None:
+                meta["display_confirmed"] = display_result.confirmed
+                meta["display_latency"] = round(display_result.latency, 4)
+            if servo_ctrl and servo_ctrl.last_move is not None:
+                meta["move_planned"] = round(servo_ctrl.last_move.planned, 4)
+                meta["move_actual"] = round(servo_ctrl.last_move.actual or 0.0, 4)
+            if lighting_result is not None:
+                meta["lighting_confirmed"] = lighting_result.confirmed
+                meta["lighting_latency"] = round(lighting_result.latency, 4)
+                meta["lighting_delta"] = {n: c["delta"] for n, c in lighting_result.cameras.items()}
+            # Encode + write in the background, in step order
+            persist = scheduler.submit(step_idx, "persist", write_snapshots, step_idx, captured, meta,
+                                       after=[persist])
+            persist.add_done_callback(lambda f, n=step_idx: orchestrator.post("step.persisted", step=n))
             
+            # 4. Unattended: show progress and go on
+            if args.unattended:
+                if lcd:
+                    try:
+                        line1, line2 = budget.status(step_idx, images_captured)
+                        lcd.setCursor(0,0); lcd.print(line1)
+                        lcd.setCursor(0,1); lcd.print(line2)
+                    except: pass
+                continue
+
             # 4. Wait for Button Press
             print(f"  [Step {step_idx}] Waiting for Button Press to continue...")
             if lcd:
                 lcd.setCursor(0,0); lcd.print(f"Step {step_idx} Done   ")
                 lcd.setCursor(0,1); lcd.print("Press -> Next ")
 
-            while not button.is_pressed:
-                # Keep window responsive
-                if cv2.waitKey(50) == ord('q'):
-                    raise KeyboardInterrupt
-            
+            with timeline.span(step_idx, "button"):
+                advance = orchestrator.step_done()
+            if not advance:
+                continue # Stopping: the checkpoint at the top of the loop ends the run
             print("  -> Button Pressed. Continuing...")
-            # Wait for release to avoid double-trigger
-            button.wait_for_release()
+
+        # Every snapshot must be on disk before the Git push
+        scheduler.drain()
             
         # End of sequence
         if servo_ctrl:
@@ -715,7 +1687,7 @@ def main():
         # ==========================================
         # PHASE 3: FINISH & EXIT
         # ==========================================
-        print("Sequence Finished. Shutting down...")
+        print("Sequence Finished.")
         
         # 1. IMMEDIATE UI UPDATE (Prioritize this before any crash risk)
         if lcd:
@@ -726,100 +1698,165 @@ def main():
                 lcd.setCursor(0,1); lcd.print("good bye")
             except: pass
 
-        # 2. Turn off lights (Gentle stop)
+        # 2. Turn off lights (Gentle fade; the LED threads keep running for the next session)
         try:
-            led_ctrl.stop()
+            led_ctrl.fade_off()
         except: pass
 
         # 3. Show Finished.jpeg
-        fin_img_path = os.path.join(IMAGE_FOLDER, "Finished.jpeg")
-        if os.path.exists(fin_img_path):
+        fin_img_path = display_path(os.path.join(IMAGE_FOLDER, "Finished.jpeg"))
+        if renderer is not None and os.path.exists(fin_img_path):
             try:
-                img = cv2.imread(fin_img_path)
+                img = bg_cache.get(fin_img_path)
                 if img is not None:
-                    try:
-                        cv2.imshow(window_name, img)
-                        cv2.waitKey(10)
-                    except: pass
+                    renderer.present(img)
             except: pass
         
         # Wait 5 seconds to let user see "Finished" and Git to complete if lagging
-        time.sleep(5)
+        # (daemon: the next session's start screen replaces it right away)
+        if not args.daemon:
+            time.sleep(5)
+
+    finally:
+        # Per-session cleanup (hardware stays up)
+        orchestrator.end()
+        if scheduler is not None:
+            # Let pending writes finish before the shard/archive files are closed
+            if not scheduler.shutdown(timeout=10.0):
+                print("  [Scheduler] Pending stages did not finish in time")
+            session_scheduler = None
+            try:
+                path = scheduler.timeline.export(os.path.join(TIMELINE_FOLDER, f"{session_id}_timeline.json"))
+                print(f"  [Timeline] {scheduler.timeline.summary()} -> {path}")
+            except Exception as e:
+                print(f"  [Timeline] Export failed: {e}")
+        if bg_prefetch is not None:
+            bg_prefetch.stop()
+            print(f"  [Prefetch] Stalls: {bg_prefetch.stall_count}")
+        if display_confirm is not None:
+            print(f"  [Display] Confirmation: {display_confirm.stats()}")
+        if lighting_confirm is not None:
+            print(f"  [Lighting] Confirmation: {lighting_confirm.stats()}")
+        # Record how far the session got (the rest is planned again next time)
+        try: plan.save(plan_path)
+        except Exception as e: print(f"  [Plan] Save failed: {e}")
+        end_session()
+
+def run_daemon(rig, args):
+    """
+    Runs sessions back to back on the same rig. Each one starts on a
+    button press or a POST to /session/start; Ctrl+C / 'q' ends the daemon.
+    """
+    count = 0
+    while True:
+        print(f"[Daemon] Ready for session {count + 1} (button or POST /session/start)")
+        show_start_screen(rig, args)
+        orchestrator.wait_start()
+        try:
+            run_session(rig, args, wait_start=False)
+        except KeyboardInterrupt:
+            raise
+        except Exception as e:
+            # A failed session shouldn't take the daemon down
+            print(f"ERROR: {e}")
+            show_error(rig.lcd)
+            if rig.servo_ctrl:
+                try: rig.servo_ctrl.return_to_zero()
+                except: pass
+        count += 1
+        print(f"[Daemon] {count} session(s) done")
+
+def show_error(lcd):
+    # LCD: Red (255, 0, 0) "Something is // wrong"
+    if lcd:
+        try:
+            lcd.setRGB(255, 0, 0)
+            lcd.clear()
+            lcd.setCursor(0,0); lcd.print("Something is")
+            lcd.setCursor(0,1); lcd.print("wrong")
+        except: pass
+    time.sleep(10)
+
+def shutdown_rig(rig):
+    # CLEANUP
+    print("[System] Cleaning up resources...")
+    print(f"  [Orchestrator] {orchestrator.stats()}")
+    orchestrator.stop()
+    if telemetry is not None:
+        print(f"  [Telemetry] {telemetry.stats()}")
+        telemetry.stop()
+    led_ctrl, servo_ctrl = rig.led_ctrl, rig.servo_ctrl
+    if led_ctrl is not None:
+        print(f"  [LED] Animation: {led_ctrl.animator.stats()}")
+        print(f"  [LED] Transfer: {led_ctrl.pusher.stats()}")
+    if servo_ctrl:
+        print(f"  [Servo] Motion: {servo_ctrl.planner.stats()}")
+        servo_ctrl.release()
+    
+    # Release cameras
+    for cam in active_cameras.values():
+        try: cam.stop()
+        except: pass
+        
+    if rig.renderer is not None:
+        rig.renderer.stop()
+    print("Final Cleanup...")
+    try: led_ctrl.stop()
+    except: pass
+    
+    # ----------------------------------------------------
+    # FORCE LEDS OFF (Robust Method)
+    # ----------------------------------------------------
+    try:
+        print("  -> Forcing LEDs OFF...")
+        import neopixel
+        pin_1, pin_2 = led_pins()
+        # Re-init simply to flush buffer
+        p1 = neopixel.NeoPixel(pin_1, LED_COUNT_1, auto_write=False)
+        p1.fill((0,0,0)); p1.show()
+        
+        p2 = neopixel.NeoPixel(pin_2, LED_COUNT_2, auto_write=False)
+        p2.fill((0,0,0)); p2.show()
+    except Exception as e:
+        print(f"  -> LED Force Off Failed: {e}")
+    # ----------------------------------------------------
+    
+    if servo_ctrl: 
+        try: servo_ctrl.stop()
+        except: pass
+    
+    # LCD Off (Optional, user might want "Good bye" to stay? 
+    # User said "Show... good bye", usually implies persistent until power off or restart.
+    # But script exits. If script exits, LCD state might persist or clear. 
+    # Let's LEAVE it asking "Thank you" (Green) and not clear it to black.
+    # Only clear if error? No, let's leave it Green.
+
+def main(args=None):
+    args = args or parse_args([])
+    rig = init_rig()
+    try:
+        if args.daemon:
+            run_daemon(rig, args)
+        else:
+            run_session(rig, args, wait_start=not args.unattended)
             
     except KeyboardInterrupt:
         print("\n[User] Ctrl+C / Quit Caught.")
-        if servo_ctrl:
+        if rig.servo_ctrl:
             print("  [Servo] Interrupted! Returning to 0 safely...")
             try:
-                servo_ctrl.return_to_zero()
+                rig.servo_ctrl.return_to_zero()
             except Exception as e:
                 print(f"  [Error] Return to 0 failed: {e}")
 
     except Exception as e:
         print(f"ERROR: {e}")
-        # LCD: Red (255, 0, 0) "Something is // wrong"
-        if lcd:
-            try:
-                lcd.setRGB(255, 0, 0)
-                lcd.clear()
-                lcd.setCursor(0,0); lcd.print("Something is")
-                lcd.setCursor(0,1); lcd.print("wrong")
-            except: pass
-        time.sleep(10)
+        show_error(rig.lcd)
 
     finally:
-        # CLEANUP
-        print("[System] Cleaning up resources...")
-        if servo_ctrl:
-            servo_ctrl.release()
-        
-        # Release cameras
-        for cam in active_cameras.values():
-            cam.stop()
-            
-        cv2.destroyAllWindows()
-        print("Final Cleanup...")
-        try: led_ctrl.stop()
-        except: pass
-        
-        # ----------------------------------------------------
-        # FORCE LEDS OFF (Robust Method)
-        # ----------------------------------------------------
-        try:
-            print("  -> Forcing LEDs OFF...")
-            # Re-init simply to flush buffer
-            p1 = neopixel.NeoPixel(LED_PIN_1, LED_COUNT_1, auto_write=False)
-            p1.fill((0,0,0)); p1.show()
-            
-            p2 = neopixel.NeoPixel(LED_PIN_2, LED_COUNT_2, auto_write=False)
-            p2.fill((0,0,0)); p2.show()
-        except Exception as e:
-            print(f"  -> LED Force Off Failed: {e}")
-        # ----------------------------------------------------
-        
-        if servo_ctrl: 
-            try: servo_ctrl.stop()
-            except: pass
-        
-        # Stop Cameras
-        for cam in active_cameras.values(): 
-            try: cam.stop()
-            except: pass
-        
-        # Close Window
-        try:
-            cv2.destroyAllWindows()
-            for _ in range(5): cv2.waitKey(1)
-        except: pass
-        
-        # LCD Off (Optional, user might want "Good bye" to stay? 
-        # User said "Show... good bye", usually implies persistent until power off or restart.
-        # But script exits. If script exits, LCD state might persist or clear. 
-        # Let's LEAVE it asking "Thank you" (Green) and not clear it to black.
-        # Only clear if error? No, let's leave it Green.
-        
+        shutdown_rig(rig)
         print("Exited.")
         sys.exit(0)
 
 if __name__ == "__main__":
-    main()
+    main(parse_args())
@@ -0,0 +1,355 @@
+import os
+import sys
+import json
+import zlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+import numpy as np
+from crop_images import VALID_EXTS
+
+# ==============================================================================
+# AUGMENTATION PIPELINE ENGINE
+# ==============================================================================
+# A pipeline is a set of outputs, each declared as a chain of stages:
+#
+#   {
+#       "Augmented/gray": [{"stage": "grayscale"}],
+#       "Jitter":        [{"stage": "color_jitter", "brightness": 0.2},
+#                         {"stage": "noise", "sigma": 5}]
+#   }
+#
+# Every source image is decoded ONCE; images of the same shape are stacked
+# into an (N, H, W, C) uint8 batch and fanned out to every output chain.
+# Adding an augmentation = adding a Stage subclass to STAGES.
+
+# ==============================================================================
+# STAGES
+# ==============================================================================
+class Stage:
+    """
+    Base class. 'apply' gets a stacked uint8 batch (N, H, W, C) and one
+    numpy Generator per sample (seeded from the file name, so reruns match),
+    and returns the transformed batch.
+    """
+    name = None
+    requires_color = False  # Needs a 3-channel BGR batch
+    output_channels = None  # Channels of the result (None: same as the input)
+
+    def __init__(self, **params):
+        self.params = params
+
+    def apply(self, batch, rngs):
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.params})"
+
+
+class Grayscale(Stage):
+    """BGR -> single-channel luma."""
+    name = "grayscale"
+    output_channels = 1
+    # ITU-R BT.601, same weights as cv2.COLOR_BGR2GRAY
+    WEIGHTS = np.array([0.114, 0.587, 0.299], dtype=np.float32)
+
+    def apply(self, batch, rngs):
+        if batch.shape[-1] == 1:
+            return batch
+        gray = batch.astype(np.float32) @ self.WEIGHTS
+        return np.clip(gray + 0.5, 0, 255).astype(np.uint8)[..., None]
+
+
+class Crop(Stage):
+    """Crops by fractions of the frame: top/bottom/left/right in [0, 1)."""
+    name = "crop"
+
+    def __init__(self, top=0.0, bottom=0.0, left=0.0, right=0.0):
+        super().__init__(top=top, bottom=bottom, left=left, right=right)
+
+    def apply(self, batch, rngs):
+        h, w = batch.shape[1:3]
+        p = self.params
+        y0, y1 = int(p["top"] * h), h - int(p["bottom"] * h)
+        x0, x1 = int(p["left"] * w), w - int(p["right"] * w)
+        return batch[:, y0:y1, x0:x1]
+
+
+class CropAspect(Stage):
+    """Rotates portrait frames to landscape, then center-crops to 'ratio' (like crop_images.py)."""
+    name = "crop_aspect"
+
+    def __init__(self, ratio=16 / 9, landscape=True):
+        super().__init__(ratio=ratio, landscape=landscape)
+
+    def apply(self, batch, rngs):
+        if self.params["landscape"] and batch.shape[1] > batch.shape[2]:
+            # Clockwise, same as cv2.ROTATE_90_CLOCKWISE
+            batch = np.rot90(batch, k=-1, axes=(1, 2))
+        h, w = batch.shape[1:3]
+        target = self.params["ratio"]
+        if w / h > target:
+            new_w = int(h * target)
+            off = (w - new_w) // 2
+            batch = batch[:, :, off:off + new_w]
+        elif w / h < target:
+            new_h = int(w / target)
+            off = (h - new_h) // 2
+            batch = batch[:, off:off + new_h]
+        return batch
+
+
+class Rotate(Stage):
+    """Rotation by a multiple of 90 degrees (clockwise), done as a strided view."""
+    name = "rotate"
+
+    def __init__(self, degrees=90):
+        if degrees % 90 != 0:
+            raise ValueError("Rotate only supports multiples of 90 degrees")
+        super().__init__(degrees=degrees)
+
+    def apply(self, batch, rngs):
+        return np.rot90(batch, k=-(self.params["degrees"] // 90) % 4, axes=(1, 2))
+
+
+class Resize(Stage):
+    """Resizes to width x height (INTER_AREA when shrinking)."""
+    name = "resize"
+
+    def __init__(self, width, height):
+        super().__init__(width=width, height=height)
+
+    def apply(self, batch, rngs):
+        size = (self.params["width"], self.params["height"])
+        h, w = batch.shape[1:3]
+        interp = cv2.INTER_AREA if size[0] < w else cv2.INTER_LINEAR
+        out = np.empty((batch.shape[0], size[1], size[0], batch.shape[3]), dtype=np.uint8)
+        for i in range(batch.shape[0]):
+            resized = cv2.resize(np.ascontiguousarray(batch[i]), size, interpolation=interp)
+            out[i] = resized.reshape(out.shape[1:])
+        return out
+
+
+class ColorJitter(Stage):
+    """Random brightness (additive, fraction of 255), contrast and saturation factors per sample."""
+    name = "color_jitter"
+
+    def __init__(self, brightness=0.2, contrast=0.2, saturation=0.2):
+        super().__init__(brightness=brightness, contrast=contrast, saturation=saturation)
+
+    def apply(self, batch, rngs):
+        p = self.params
+        n = batch.shape[0]
+        b = np.array([r.uniform(-p["brightness"], p["brightness"]) for r in rngs], dtype=np.float32) * 255
+        c = np.array([r.uniform(1 - p["contrast"], 1 + p["contrast"]) for r in rngs], dtype=np.float32)
+        s = np.array([r.uniform(1 - p["saturation"], 1 + p["saturation"]) for r in rngs], dtype=np.float32)
+
+        x = batch.astype(np.float32)
+        if x.shape[-1] == 3:
+            gray = (x @ Grayscale.WEIGHTS)[..., None]
+            x = gray + (x - gray) * s.reshape(n, 1, 1, 1)
+        mean = x.mean(axis=(1, 2, 3), keepdims=True)
+        x = (x - mean) * c.reshape(n, 1, 1, 1) + mean + b.reshape(n, 1, 1, 1)
+        return np.clip(x, 0, 255).astype(np.uint8)
+
+
+class Blur(Stage):
+    """Gaussian blur with a ksize x ksize kernel."""
+    name = "blur"
+
+    def __init__(self, ksize=5, sigma=0):
+        super().__init__(ksize=ksize, sigma=sigma)
+
+    def apply(self, batch, rngs):
+        k = self.params["ksize"]
+        out = np.empty_like(batch)
+        for i in range(batch.shape[0]):
+            blurred = cv2.GaussianBlur(np.ascontiguousarray(batch[i]), (k, k), self.params["sigma"])
+            out[i] = blurred.reshape(out.shape[1:])
+        return out
+
+
+class Noise(Stage):
+    """Additive Gaussian noise, sigma in pixel levels."""
+    name = "noise"
+
+    def __init__(self, sigma=5.0):
+        super().__init__(sigma=sigma)
+
+    def apply(self, batch, rngs):
+        noise = np.stack([r.standard_normal(batch.shape[1:], dtype=np.float32) for r in rngs])
+        x = batch.astype(np.float32) + noise * self.params["sigma"]
+        return np.clip(x, 0, 255).astype(np.uint8)
+
+
+class Photometric(Stage):
+    """Vectorized brightness/contrast/gamma/hue/noise/cutout (see batch_augment.py)."""
+    name = "photometric"
+    requires_color = True
+
+    def __init__(self, **params):
+        from batch_augment import PhotometricAugment
+        super().__init__(**params)
+        self.augment = PhotometricAugment(**params)
+
+    def apply(self, batch, rngs):
+        seeds = np.array([r.integers(0, 2**32) for r in rngs], dtype=np.uint32)
+        return self.augment(batch, seeds)
+
+
+STAGES = {cls.name: cls for cls in (Grayscale, Crop, CropAspect, Rotate, Resize, ColorJitter, Blur, Noise, Photometric)}
+
+
+def build_stage(spec):
+    spec = dict(spec)
+    name = spec.pop("stage")
+    if name not in STAGES:
+        raise ValueError(f"Unknown stage '{name}'. Available: {', '.join(sorted(STAGES))}")
+    return STAGES[name](**spec)
+
+
+# ==============================================================================
+# PIPELINE
+# ==============================================================================
+class Pipeline:
+    def __init__(self, outputs, seed=0, jpeg_quality=95):
+        """
+        :param outputs: dict of output folder -> list of Stage instances or stage specs
+        """
+        self.outputs = {}
+        for out_dir, chain in outputs.items():
+            self.outputs[out_dir] = [s if isinstance(s, Stage) else build_stage(s) for s in chain]
+            self.check_chain(out_dir, self.outputs[out_dir])
+        self.seed = seed
+        self.jpeg_quality = jpeg_quality
+
+    @staticmethod
+    def check_chain(out_dir, chain, channels=3):
+        """Raises ValueError if a stage gets a channel count it can't handle (checked before any work starts)."""
+        for i, stage in enumerate(chain):
+            if stage.requires_color and channels != 3:
+                raise ValueError(f"Output '{out_dir}': stage {i + 1} '{stage.name}' needs a color image, "
+                                 f"but gets {channels} channel(s) from the stages before it")
+            channels = stage.output_channels or channels
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        with open(path, "r") as f:
+            return cls(json.load(f), **kwargs)
+
+    def sample_seed(self, filename, out_dir):
+        # Stable across runs and processes (unlike hash())
+        return zlib.crc32(f"{self.seed}:{out_dir}:{filename}".encode("utf-8"))
+
+    def run_batch(self, names, images):
+        """
+        Applies every output chain to one stacked batch of same-shape images.
+        Returns {out_dir: batch}.
+        """
+        results = {}
+        for out_dir, chain in self.outputs.items():
+            rngs = [np.random.default_rng(self.sample_seed(n, out_dir)) for n in names]
+            batch = images
+            for stage in chain:
+                batch = stage.apply(batch, rngs)
+            results[out_dir] = batch
+        return results
+
+    def process_chunk(self, input_dir, filenames):
+        """Worker entry point: decode once, group by shape, run, encode + write. Returns (done, failed)."""
+        decoded = {}
+        failed = []
+        for filename in filenames:
+            img = cv2.imread(os.path.join(input_dir, filename), cv2.IMREAD_COLOR)
+            if img is None:
+                failed.append(filename)
+                continue
+            decoded.setdefault(img.shape, []).append((filename, img))
+
+        done = 0
+        params = [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality]
+        for group in decoded.values():
+            names = [n for n, _ in group]
+            batch = np.stack([img for _, img in group])
+            for out_dir, out_batch in self.run_batch(names, batch).items():
+                for name, out_img in zip(names, out_batch):
+                    if out_img.shape[-1] == 1:
+                        out_img = out_img[..., 0]
+                    out_path = os.path.join(out_dir, name)
+                    if not cv2.imwrite(out_path, np.ascontiguousarray(out_img), params):
+                        failed.append(f"{out_dir}/{name}")
+            done += len(names)
+        return done, failed
+
+    def run(self, input_dir, workers=None, chunk_size=16):
+        """Streams 'input_dir' through the pipeline in chunks over a worker pool."""
+        files = sorted(f for f in os.listdir(input_dir) if f.lower().endswith(VALID_EXTS))
+        if not files:
+            print(f"No images found in '{input_dir}'.")
+            return 0
+
+        for out_dir in self.outputs:
+            os.makedirs(out_dir, exist_ok=True)
+
+        chunks = [files[i:i + chunk_size] for i in range(0, len(files), chunk_size)]
+        workers = min(workers or os.cpu_count() or 1, len(chunks))
+        print(f"Processing {len(files)} images -> {', '.join(self.outputs)} with {workers} worker(s)...")
+
+        total = 0
+        if workers <= 1:
+            results = (self.process_chunk(input_dir, c) for c in chunks)
+            for done, failed in results:
+                total += done
+                for name in failed: print(f"  Failed: {name}")
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Bounded in-flight chunks keep memory flat on the Pi
+                pending = []
+                chunk_iter = iter(chunks)
+                for chunk in chunk_iter:
+                    pending.append(pool.submit(self.process_chunk, input_dir, chunk))
+                    if len(pending) >= 2 * workers:
+                        done, failed = pending.pop(0).result()
+                        total += done
+                        for name in failed: print(f"  Failed: {name}")
+                for future in pending:
+                    done, failed = future.result()
+                    total += done
+                    for name in failed: print(f"  Failed: {name}")
+
+        print(f"Done: {total} images.")
+        return total
+
+
+# ColorToBW.py's conversion plus a couple of photometric variants. Written
+# under Augmented/: BlackAndWhite/ and its .manifest.json belong to ColorToBW.py
+DEFAULT_PIPELINE = {
+    "Augmented/gray": [{"stage": "grayscale"}],
+    "Augmented/jitter": [{"stage": "color_jitter", "brightness": 0.15, "contrast": 0.2, "saturation": 0.3}],
+    "Augmented/blur_noise": [{"stage": "blur", "ksize": 5}, {"stage": "noise", "sigma": 6}],
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run an augmentation pipeline over a folder of images.")
+    parser.add_argument("--input", default="Color", help="Source folder (default: Color)")
+    parser.add_argument("--config", default=None, help="JSON file: {output_dir: [stage specs]}")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk", type=int, default=16, help="Images per worker task")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--list-stages", action="store_true")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    if args.list_stages:
+        for name, cls in sorted(STAGES.items()):
+            print(f"  {name:14s} {(cls.__doc__ or '').strip()}")
+        sys.exit(0)
+
+    if args.config:
+        pipeline = Pipeline.from_file(args.config, seed=args.seed)
+    else:
+        pipeline = Pipeline(DEFAULT_PIPELINE, seed=args.seed)
+    pipeline.run(args.input, workers=args.workers, chunk_size=args.chunk)
@@ -0,0 +1,344 @@
+import os
+import sys
+import json
+import hashlib
+import threading
+import subprocess
+from collections import OrderedDict
+import numpy as np
+from crop_images import read_image_size, VALID_EXTS
+
+# ==============================================================================
+# BACKGROUND IMAGE CACHE
+# ==============================================================================
+# Slideshow backgrounds are decoded once, letterboxed to the display
+# resolution and kept:
+#   - in RAM, in an LRU bounded by 'max_items'
+#   - on disk as raw .npy, keyed by source hash + display size, so the next
+#     run loads them with a plain file read instead of a JPEG decode + resize
+# Showing a cached background is then just handing the array to imshow.
+
+DEFAULT_DISPLAY_SIZE = (1920, 1080)
+CACHE_FOLDER = '.bg_cache'
+
+
+def detect_display_size(default=DEFAULT_DISPLAY_SIZE):
+    """Returns (width, height) of the X display, via xrandr; 'default' if unavailable."""
+    env = os.environ.get("DAB_DISPLAY_SIZE") # e.g. "1920x1080"
+    if env:
+        try:
+            w, h = env.lower().split("x")
+            return int(w), int(h)
+        except ValueError:
+            pass
+    try:
+        out = subprocess.run(["xrandr", "--current"], capture_output=True, text=True, timeout=2).stdout
+        for line in out.splitlines():
+            if " current " in line:
+                # "Screen 0: minimum 320 x 200, current 1920 x 1080, maximum ..."
+                current = line.split(" current ")[1].split(",")[0]
+                w, h = current.split(" x ")
+                return int(w), int(h)
+    except Exception:
+        pass
+    return default
+
+
+def fit_to_display(img, display_size):
+    """Scales 'img' to fit inside display_size (aspect kept) and centers it on black."""
+    import cv2
+    dw, dh = display_size
+    h, w = img.shape[:2]
+    if (w, h) == (dw, dh):
+        return img
+    scale = min(dw / w, dh / h)
+    nw, nh = max(1, int(round(w * scale))), max(1, int(round(h * scale)))
+    interp = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+    resized = cv2.resize(img, (nw, nh), interpolation=interp)
+    canvas = np.zeros((dh, dw, 3), dtype=np.uint8)
+    y0, x0 = (dh - nh) // 2, (dw - nw) // 2
+    canvas[y0:y0 + nh, x0:x0 + nw] = resized
+    return canvas
+
+
+# JPEG DCT-domain downscaling: decoding at 1/2, 1/4 or 1/8 is much cheaper
+# than a full decode followed by a resize (cv2 flag names)
+REDUCED_MODES = ((8, "IMREAD_REDUCED_COLOR_8"), (4, "IMREAD_REDUCED_COLOR_4"), (2, "IMREAD_REDUCED_COLOR_2"))
+
+
+def read_for_display(path, display_size):
+    """
+    Decodes 'path' at the smallest reduced resolution that is still at least
+    as large as the image will be shown on 'display_size'.
+    """
+    import cv2
+    size = read_image_size(path)
+    flags = cv2.IMREAD_COLOR
+    if size is not None:
+        w, h = size
+        dw, dh = display_size
+        scale = min(dw / w, dh / h)
+        for factor, mode in REDUCED_MODES:
+            if scale * factor <= 1.0:
+                flags = getattr(cv2, mode)
+                break
+    return cv2.imread(path, flags)
+
+
+class BackgroundCache:
+    def __init__(self, display_size=None, cache_dir=CACHE_FOLDER, max_items=12):
+        self.display_size = tuple(display_size or detect_display_size())
+        self.cache_dir = cache_dir
+        self.max_items = max_items
+        self.lock = threading.Lock()
+        self.items = OrderedDict() # source hash -> display-sized BGR array
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+        try:
+            with open(self.index_path, "r") as f:
+                self.index = json.load(f) # abspath -> {"mtime_ns", "size", "sha1"}
+        except Exception:
+            self.index = {}
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+    def source_hash(self, path):
+        """SHA-1 of the source file; re-hashed only when its mtime/size change."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        with self.lock:
+            entry = self.index.get(path)
+            if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+                return entry["sha1"]
+
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+
+        with self.lock:
+            self.index[path] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha1": digest}
+            self._save_index()
+        return digest
+
+    def _save_index(self):
+        tmp = self.index_path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self.index, f)
+            os.replace(tmp, self.index_path)
+        except Exception as e:
+            print(f"  [BG Cache] Could not save index: {e}")
+
+    def _disk_path(self, digest):
+        w, h = self.display_size
+        return os.path.join(self.cache_dir, f"{digest}_{w}x{h}.npy")
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+    def _remember(self, digest, img):
+        with self.lock:
+            self.items[digest] = img
+            self.items.move_to_end(digest)
+            while len(self.items) > self.max_items:
+                self.items.popitem(last=False)
+
+    def decode(self, path):
+        """Decodes + fits a source image (no caching). Returns None if unreadable."""
+        img = read_for_display(path, self.display_size)
+        if img is None:
+            return None
+        return fit_to_display(img, self.display_size)
+
+    def get(self, path):
+        """Returns the display-sized background for 'path' (RAM -> disk -> decode)."""
+        try:
+            digest = self.source_hash(path)
+        except OSError:
+            return None
+
+        with self.lock:
+            img = self.items.get(digest)
+            if img is not None:
+                self.items.move_to_end(digest)
+                self.hits += 1
+                return img
+            self.misses += 1
+
+        disk_path = self._disk_path(digest)
+        img = None
+        if os.path.exists(disk_path):
+            try:
+                img = np.load(disk_path)
+            except Exception:
+                img = None
+
+        if img is None:
+            img = self.decode(path)
+            if img is None:
+                return None
+            try:
+                # Per-thread temp name: warm_async and the prefetcher may write the same entry
+                tmp = f"{disk_path}.{threading.get_ident()}.tmp.npy"
+                np.save(tmp, img)
+                os.replace(tmp, disk_path)
+            except Exception as e:
+                print(f"  [BG Cache] Could not write {disk_path}: {e}")
+
+        self._remember(digest, img)
+        return img
+
+    def contains(self, path):
+        """True if 'path' is already in RAM (no I/O beyond a stat)."""
+        try:
+            digest = self.source_hash(path)
+        except OSError:
+            return False
+        with self.lock:
+            return digest in self.items
+
+    def warm(self, paths):
+        """
+        Builds the disk cache for 'paths'. Walks them in reverse so the LRU
+        ends up holding the first max_items (the ones shown next).
+        """
+        for path in reversed(paths):
+            if self.get(path) is None:
+                print(f"  [BG Cache] Failed to load {path}")
+
+    def warm_async(self, paths):
+        """warm() on a daemon thread (e.g. at startup, before the first session)."""
+        thread = threading.Thread(target=self.warm, args=(list(paths),), daemon=True)
+        thread.start()
+        return thread
+
+
+# ==============================================================================
+# PREFETCHER
+# ==============================================================================
+class BackgroundPrefetcher:
+    """
+    Background thread that knows the slideshow order and keeps the next
+    'depth' backgrounds decoded in the cache, so get(i) is a RAM lookup while
+    the current step's servo move / snapshot run.
+    """
+    def __init__(self, cache, order, depth=3):
+        self.cache = cache
+        self.order = list(order)
+        # Never prefetch more than the LRU can hold
+        self.depth = max(1, min(depth, cache.max_items - 1))
+        self.position = 0
+        self.running = False
+        self.thread = None
+        self.cond = threading.Condition()
+        self.in_flight = {} # path -> Event set when decoded
+        self.failed = set() # (path, mtime_ns) that could not be loaded; retried once the file changes
+        self.version = 0    # Bumped on every order/position change (wakes the thread)
+        self.stall_count = 0
+
+    def start(self):
+        if self.running: return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def set_order(self, order, position=0):
+        with self.cond:
+            self.order = list(order)
+            self.position = position
+            self.version += 1
+            self.cond.notify()
+
+    def _failed_key(self, path):
+        try:
+            return path, os.stat(path).st_mtime_ns
+        except OSError:
+            return path, None # Vanished; retried if it comes back
+
+    def _next_missing(self, candidates):
+        # Called without self.cond: contains() may hash a file for the first time
+        for path in candidates:
+            if self._failed_key(path) in self.failed:
+                continue
+            if not self.cache.contains(path):
+                return path
+        return None
+
+    def _run(self):
+        while True:
+            with self.cond:
+                if not self.running:
+                    return
+                version = self.version
+                window = self.order[self.position:self.position + self.depth]
+                candidates = [p for p in window if p not in self.in_flight]
+
+            path = self._next_missing(candidates)
+
+            with self.cond:
+                if not self.running:
+                    return
+                if path is None:
+                    # Window complete: sleep until the order or position changes
+                    if self.version == version:
+                        self.cond.wait()
+                    continue
+                done = threading.Event()
+                self.in_flight[path] = done
+
+            img = None
+            try:
+                img = self.cache.get(path)
+            except Exception as e:
+                print(f"  [Prefetch] Failed to load {path}: {e}")
+            finally:
+                failed = self._failed_key(path) if img is None else None
+                with self.cond:
+                    self.in_flight.pop(path, None)
+                    if failed is not None:
+                        self.failed.add(failed)
+                done.set()
+            if img is None:
+                print(f"  [Prefetch] Skipping unreadable {path} until it changes")
+
+    def get(self, index, timeout=5.0):
+        """Returns the background for order[index] and moves the prefetch window there."""
+        if not self.order:
+            return None
+        index = index % len(self.order)
+        path = self.order[index]
+        with self.cond:
+            self.position = index + 1 # Current one is needed now; prefetch what follows
+            self.version += 1
+            pending = self.in_flight.get(path)
+            self.cond.notify()
+
+        if pending is not None:
+            pending.wait(timeout)
+        elif not self.cache.contains(path):
+            self.stall_count += 1 # Prefetch didn't keep up: decode on this thread
+        return self.cache.get(path)
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        if self.thread:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+
+
+if __name__ == "__main__":
+    # Build the disk cache ahead of time: python background_cache.py [images]
+    folder = sys.argv[1] if len(sys.argv) > 1 else "images"
+    paths = sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(VALID_EXTS))
+    cache = BackgroundCache()
+    print(f"Caching {len(paths)} backgrounds at {cache.display_size[0]}x{cache.display_size[1]}...")
+    cache.warm(paths)
+    print("Done.")
@@ -0,0 +1,237 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from crop_images import VALID_EXTS
+
+# ==============================================================================
+# BATCHED PHOTOMETRIC AUGMENTATION
+# ==============================================================================
+# Works on a whole stack of frames at once: (N, H, W, 3) uint8, BGR.
+# Every random draw (jitter factors, noise pixels, cutout boxes) comes from a
+# counter-based hash of (sample seed, stream, index), so:
+#   - there is no per-image Python loop, everything is array math
+#   - a sample's result depends only on its own seed, not on batch order/size
+
+# Streams (one per random quantity)
+(S_BRIGHTNESS, S_CONTRAST, S_GAMMA, S_HUE, S_NOISE_SIGMA,
+ S_NOISE_1, S_NOISE_2, S_CUT_Y, S_CUT_X, S_CUT_P) = range(10)
+
+_M1 = np.uint32(0x7feb352d)
+_M2 = np.uint32(0x846ca68b)
+_GOLDEN = 0x9e3779b9
+
+
+def _hash32(x):
+    """lowbias32 integer hash, vectorized on uint32 arrays (wrap-around multiply)."""
+    x = x ^ (x >> np.uint32(16))
+    x = x * _M1
+    x = x ^ (x >> np.uint32(15))
+    x = x * _M2
+    x = x ^ (x >> np.uint32(16))
+    return x
+
+
+def _uniform(seeds, stream, count=1):
+    """
+    Uniform floats in (0, 1), shape (N, count): value j of sample i only
+    depends on (seeds[i], stream, j).
+    """
+    key = _hash32(seeds.astype(np.uint32) ^ np.uint32((stream * _GOLDEN) & 0xffffffff))
+    idx = np.arange(count, dtype=np.uint32)
+    bits = _hash32(key[:, None] + _hash32(idx + np.uint32(stream))[None, :])
+    return ((bits >> np.uint32(8)).astype(np.float32) + 0.5) * np.float32(1.0 / (1 << 24))
+
+
+def _per_sample(seeds, stream, low, high):
+    return low + (high - low) * _uniform(seeds, stream)[:, 0]
+
+
+def sample_seeds(base_seed, n, offset=0):
+    """Seeds for samples offset .. offset+n-1 of a run (stable across batch splits)."""
+    idx = np.arange(offset, offset + n, dtype=np.uint32)
+    return _hash32(idx ^ _hash32(np.full(n, base_seed, dtype=np.uint32)))
+
+
+# RGB<->YIQ; hue jitter = rotating the (I, Q) chroma plane
+_RGB2YIQ = np.array([[0.299, 0.587, 0.114],
+                     [0.596, -0.274, -0.322],
+                     [0.211, -0.523, 0.312]], dtype=np.float32)
+_YIQ2RGB = np.linalg.inv(_RGB2YIQ).astype(np.float32)
+_BGR = np.array([[0, 0, 1], [0, 1, 0], [1, 0, 0]], dtype=np.float32) # BGR<->RGB swap
+
+
+def _hue_matrices(theta):
+    """(N, 3, 3) BGR->BGR matrices rotating hue by theta (radians) per sample."""
+    n = theta.shape[0]
+    rot = np.zeros((n, 3, 3), dtype=np.float32)
+    c, s = np.cos(theta), np.sin(theta)
+    rot[:, 0, 0] = 1
+    rot[:, 1, 1] = c
+    rot[:, 1, 2] = -s
+    rot[:, 2, 1] = s
+    rot[:, 2, 2] = c
+    return _BGR @ _YIQ2RGB @ rot @ _RGB2YIQ @ _BGR
+
+
+class PhotometricAugment:
+    def __init__(self, brightness=0.2, contrast=0.25, gamma=(0.7, 1.4), hue=0.05,
+                 noise_sigma=6.0, cutout_size=0.2, cutout_prob=0.5):
+        """
+        :param brightness: max additive shift, fraction of 255
+        :param contrast: max contrast factor deviation from 1
+        :param gamma: (min, max) gamma; drawn log-uniformly
+        :param hue: max hue rotation, fraction of a full turn
+        :param noise_sigma: max Gaussian noise sigma in pixel levels (drawn per sample)
+        :param cutout_size: side of the cutout square, fraction of min(H, W); 0 disables
+        :param cutout_prob: probability a sample gets a cutout
+        """
+        self.brightness = brightness
+        self.contrast = contrast
+        self.gamma = gamma
+        self.hue = hue
+        self.noise_sigma = noise_sigma
+        self.cutout_size = cutout_size
+        self.cutout_prob = cutout_prob
+
+    def params(self, seeds):
+        """The per-sample parameters drawn for 'seeds' (useful for logging/replay)."""
+        seeds = np.asarray(seeds, dtype=np.uint32)
+        lg0, lg1 = np.log(self.gamma[0]), np.log(self.gamma[1])
+        return {
+            "brightness": _per_sample(seeds, S_BRIGHTNESS, -self.brightness, self.brightness) * 255,
+            "contrast": _per_sample(seeds, S_CONTRAST, 1 - self.contrast, 1 + self.contrast),
+            "gamma": np.exp(_per_sample(seeds, S_GAMMA, lg0, lg1)),
+            "hue": _per_sample(seeds, S_HUE, -self.hue, self.hue) * 2 * np.pi,
+            "noise_sigma": _per_sample(seeds, S_NOISE_SIGMA, 0, self.noise_sigma),
+            "cutout": _uniform(seeds, S_CUT_P)[:, 0] < self.cutout_prob,
+        }
+
+    def __call__(self, batch, seeds):
+        """
+        :param batch: (N, H, W, 3) uint8 BGR stack
+        :param seeds: (N,) per-sample seeds, e.g. from sample_seeds()
+        :returns: augmented (N, H, W, 3) uint8 stack
+        """
+        seeds = np.asarray(seeds, dtype=np.uint32)
+        n, h, w, ch = batch.shape
+        if ch != 3:
+            raise ValueError("PhotometricAugment expects (N, H, W, 3) BGR batches")
+        p = self.params(seeds)
+        x = batch.astype(np.float32)
+
+        # 1. Contrast around the per-image mean, then brightness shift
+        mean = x.mean(axis=(1, 2, 3), keepdims=True)
+        x -= mean
+        x *= p["contrast"].reshape(n, 1, 1, 1)
+        x += mean + p["brightness"].reshape(n, 1, 1, 1)
+
+        # 2. Hue rotation: one 3x3 matrix per sample
+        if self.hue > 0:
+            x = np.einsum("nhwc,ndc->nhwd", x, _hue_matrices(p["hue"]), optimize=True)
+
+        # 3. Gamma (on normalized values)
+        np.clip(x, 0, 255, out=x)
+        x *= np.float32(1 / 255)
+        np.power(x, p["gamma"].reshape(n, 1, 1, 1).astype(np.float32), out=x)
+        x *= np.float32(255)
+
+        # 4. Gaussian noise (Box-Muller on hashed uniforms)
+        if self.noise_sigma > 0:
+            count = h * w * ch
+            half = (count + 1) // 2
+            u1 = _uniform(seeds, S_NOISE_1, half)
+            u2 = _uniform(seeds, S_NOISE_2, half)
+            r = np.sqrt(-2 * np.log(u1))
+            u2 *= np.float32(2 * np.pi)
+            # Both Box-Muller outputs are used: half the hashing per pixel
+            noise = np.concatenate([r * np.cos(u2), r * np.sin(u2)], axis=1)[:, :count]
+            noise *= p["noise_sigma"].reshape(n, 1).astype(np.float32)
+            x += noise.reshape(n, h, w, ch)
+
+        # 5. Cutout: one square per selected sample, filled with the image mean
+        if self.cutout_size > 0:
+            side = max(1, int(self.cutout_size * min(h, w)))
+            y0 = (_uniform(seeds, S_CUT_Y)[:, 0] * (h - side + 1)).astype(np.int32)
+            x0 = (_uniform(seeds, S_CUT_X)[:, 0] * (w - side + 1)).astype(np.int32)
+            ys = np.arange(h)[None, :]
+            xs = np.arange(w)[None, :]
+            in_y = (ys >= y0[:, None]) & (ys < (y0 + side)[:, None])
+            in_x = (xs >= x0[:, None]) & (xs < (x0 + side)[:, None])
+            mask = in_y[:, :, None] & in_x[:, None, :] & p["cutout"][:, None, None]
+            x = np.where(mask[..., None], mean, x)
+
+        np.clip(x, 0, 255, out=x)
+        return x.astype(np.uint8)
+
+
+# ==============================================================================
+# BENCHMARK
+# ==============================================================================
+def benchmark(batch_size=32, shape=(336, 448, 3), iterations=10, augment=None):
+    """Runs 'augment' on random batches and returns throughput in images/sec."""
+    augment = augment or PhotometricAugment()
+    rng = np.random.default_rng(0)
+    batch = rng.integers(0, 256, size=(batch_size,) + tuple(shape), dtype=np.uint8)
+
+    augment(batch, sample_seeds(0, batch_size)) # Warm-up
+    start = time.perf_counter()
+    for i in range(iterations):
+        augment(batch, sample_seeds(0, batch_size, offset=i * batch_size))
+    elapsed = time.perf_counter() - start
+    return batch_size * iterations / elapsed
+
+
+def augment_folder(input_dir, output_dir, copies=1, seed=0, batch_size=16, augment=None):
+    """Writes 'copies' augmented versions of each image in 'input_dir' (batched by shape)."""
+    import cv2
+    augment = augment or PhotometricAugment()
+    files = sorted(f for f in os.listdir(input_dir) if f.lower().endswith(VALID_EXTS))
+    os.makedirs(output_dir, exist_ok=True)
+
+    groups = {}
+    for filename in files:
+        img = cv2.imread(os.path.join(input_dir, filename), cv2.IMREAD_COLOR)
+        if img is None:
+            print(f"  Skipping {filename} (Load Failed)")
+            continue
+        groups.setdefault(img.shape, []).append((filename, img))
+
+    written = 0
+    sample_idx = 0
+    for group in groups.values():
+        for start in range(0, len(group), batch_size):
+            chunk = group[start:start + batch_size]
+            batch = np.stack([img for _, img in chunk])
+            for copy in range(copies):
+                seeds = sample_seeds(seed, len(chunk), offset=sample_idx)
+                sample_idx += len(chunk)
+                out = augment(batch, seeds)
+                for (filename, _), img in zip(chunk, out):
+                    stem, ext = os.path.splitext(filename)
+                    cv2.imwrite(os.path.join(output_dir, f"{stem}_aug{copy}{ext}"), img)
+                    written += 1
+    print(f"Wrote {written} augmented images to {output_dir}")
+    return written
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Vectorized photometric augmentation on stacked frames.")
+    parser.add_argument("--bench", action="store_true", help="Print throughput in images/sec and exit")
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--input", default="Color")
+    parser.add_argument("--output", default=os.path.join("Augmented", "photometric"))
+    parser.add_argument("--copies", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    if args.bench:
+        rate = benchmark(batch_size=args.batch, iterations=args.iterations)
+        print(f"PhotometricAugment: {rate:.1f} images/sec (batch {args.batch}, 336x448x3)")
+    else:
+        augment_folder(args.input, args.output, copies=args.copies, seed=args.seed, batch_size=args.batch)
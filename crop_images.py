@@ -1,64 +1,218 @@
-
-import cv2
 import os
-import glob
+import sys
+import shutil
+import struct
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+TARGET_RATIO = 16 / 9
+# Image types every script picks up from a folder (compare lowercased)
+VALID_EXTS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+# ==============================================================================
+# HEADER-ONLY SIZE PROBE
+# ==============================================================================
+def _jpeg_orientation(app1):
+    """Returns the EXIF orientation (1-8) from an APP1 payload, or 1."""
+    if not app1.startswith(b'Exif\x00\x00'):
+        return 1
+    tiff = app1[6:]
+    if tiff[:2] == b'II':
+        endian = '<'
+    elif tiff[:2] == b'MM':
+        endian = '>'
+    else:
+        return 1
+    try:
+        ifd_offset = struct.unpack(endian + 'I', tiff[4:8])[0]
+        count = struct.unpack(endian + 'H', tiff[ifd_offset:ifd_offset + 2])[0]
+        for i in range(count):
+            entry = ifd_offset + 2 + i * 12
+            tag = struct.unpack(endian + 'H', tiff[entry:entry + 2])[0]
+            if tag == 0x0112:
+                return struct.unpack(endian + 'H', tiff[entry + 8:entry + 10])[0]
+    except struct.error:
+        pass
+    return 1
+
+def _jpeg_size(f):
+    f.seek(2)
+    orientation = 1
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        # Standalone markers (no length)
+        if code == 0xFF:
+            f.seek(-1, 1)
+            continue
+        if code in (0x01,) or 0xD0 <= code <= 0xD7:
+            continue
+        length = struct.unpack('>H', f.read(2))[0]
+        # SOF0..SOF15, except DHT (C4), JPG (C8), DAC (CC)
+        if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+            _, height, width = struct.unpack('>BHH', f.read(5))
+            # cv2.imread applies EXIF rotation: orientations 5-8 swap the axes
+            if orientation in (5, 6, 7, 8):
+                width, height = height, width
+            return width, height
+        if code == 0xE1:
+            orientation = _jpeg_orientation(f.read(length - 2))
+            continue
+        if code == 0xDA: # Start of scan without a frame header
+            return None
+        f.seek(length - 2, 1)
+
+def _png_size(header):
+    if header[12:16] != b'IHDR':
+        return None
+    return struct.unpack('>II', header[16:24])
+
+def _webp_size(header):
+    chunk = header[12:16]
+    if chunk == b'VP8 ':
+        width, height = struct.unpack('<HH', header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L':
+        b = header[21:25]
+        width = 1 + (((b[1] & 0x3F) << 8) | b[0])
+        height = 1 + (((b[3] & 0x0F) << 10) | (b[2] << 2) | ((b[1] & 0xC0) >> 6))
+        return width, height
+    if chunk == b'VP8X':
+        width = 1 + int.from_bytes(header[24:27], 'little')
+        height = 1 + int.from_bytes(header[27:30], 'little')
+        return width, height
+    return None
 
-def crop_to_16_9(image_path):
+def read_image_size(image_path):
     """
-    Reads an image, rotates it if portrait, crops to 16:9, and overwrites the file.
+    Returns (width, height) as cv2.imread would see them, reading only the
+    file header. Returns None if the format isn't recognised.
     """
+    try:
+        with open(image_path, 'rb') as f:
+            header = f.read(32)
+            if header[:2] == b'\xff\xd8':
+                return _jpeg_size(f)
+            if header[:8] == b'\x89PNG\r\n\x1a\n':
+                return _png_size(header)
+            if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+                return _webp_size(header)
+    except (OSError, struct.error):
+        pass
+    return None
+
+def is_compliant(width, height):
+    """True if the image is landscape and already 16:9 (to the pixel crop_to_16_9 would produce)."""
+    if height > width:
+        return False
+    return abs(width - int(height * TARGET_RATIO)) <= 1 or abs(height - int(width / TARGET_RATIO)) <= 1
+
+# ==============================================================================
+# CROP
+# ==============================================================================
+def crop_to_16_9(image_path, output_path=None):
+    """
+    Reads an image, rotates it if portrait, crops to 16:9 and writes it to
+    'output_path' (overwrites the source when output_path is None).
+    Returns a status string.
+    """
+    if output_path is None:
+        output_path = image_path
+
+    # Fast path: dimensions from the header, no decode, no re-encode
+    size = read_image_size(image_path)
+    if size is not None and is_compliant(*size):
+        if output_path != image_path:
+            shutil.copy2(image_path, output_path)
+        return "Already 16:9"
+
+    import cv2
     img = cv2.imread(image_path)
     if img is None:
-        print(f"Error: Could not read {image_path}")
-        return
+        return "Error: Could not read"
 
     height, width = img.shape[:2]
+    rotated = False
 
     # Rotate if portrait
     if height > width:
-        print(f"Rotating {os.path.basename(image_path)}...")
         img = cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE)
         height, width = img.shape[:2] # Update dimensions after rotation
+        rotated = True
 
     # Calculate target dimensions for 16:9
-    target_ratio = 16 / 9
     current_ratio = width / height
 
-    if current_ratio > target_ratio:
+    if current_ratio > TARGET_RATIO:
         # Image is too wide, crop width
-        new_width = int(height * target_ratio)
+        new_width = int(height * TARGET_RATIO)
         offset = (width - new_width) // 2
         img = img[:, offset:offset+new_width]
-    elif current_ratio < target_ratio:
+    elif current_ratio < TARGET_RATIO:
         # Image is too tall, crop height
-        new_height = int(width / target_ratio)
+        new_height = int(width / TARGET_RATIO)
         offset = (height - new_height) // 2
         img = img[offset:offset+new_height, :]
-    
-    # Save overwritten
-    cv2.imwrite(image_path, img)
-    print(f"Processed: {os.path.basename(image_path)}")
-
-def main():
-    images_dir = os.path.join(os.path.dirname(__file__), 'images')
-    
-    # Supports common image formats
-    extensions = ['*.jpg', '*.jpeg', '*.png', '*.webp']
-    image_files = []
-    
-    for ext in extensions:
-        # Case insensitive search might fail on unix with glob, relying on extensions list
-        # We'll just search for exact matches as provided
-        image_files.extend(glob.glob(os.path.join(images_dir, ext)))
-        image_files.extend(glob.glob(os.path.join(images_dir, ext.upper())))
 
+    if not cv2.imwrite(output_path, img):
+        return "Error: Could not write"
+    return "Rotated + Cropped" if rotated else "Cropped"
+
+def _is_cached(image_path, output_path):
+    return os.path.exists(output_path) and os.path.getmtime(output_path) >= os.path.getmtime(image_path)
+
+def cropped_path(image_path, output_dir):
+    """The 16:9 version of 'image_path' in 'output_dir' if it is up to date, else 'image_path' itself."""
+    out_path = os.path.join(output_dir, os.path.basename(image_path))
+    try:
+        return out_path if _is_cached(image_path, out_path) else image_path
+    except OSError:
+        return image_path
+
+def find_images(images_dir):
+    # Case-insensitive on every platform (.JPG, .Jpeg, .WebP, ...)
+    return sorted(os.path.join(images_dir, f) for f in os.listdir(images_dir)
+                  if f.lower().endswith(VALID_EXTS) and not f.startswith('.'))
+
+def main(argv=None):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Rotate portrait images and crop everything to 16:9.")
+    parser.add_argument("--input", default=os.path.join(base_dir, 'images'))
+    parser.add_argument("--output", default=os.path.join(base_dir, 'images_16_9'),
+                        help="Output cache folder (originals are left untouched)")
+    parser.add_argument("--in-place", action="store_true", help="Overwrite the originals instead (old behaviour)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    images_dir = args.input
+    output_dir = images_dir if args.in_place else args.output
+    os.makedirs(output_dir, exist_ok=True)
+
+    image_files = find_images(images_dir)
     print(f"Found {len(image_files)} images.")
 
+    jobs = []
     for img_path in image_files:
-        try:
-            crop_to_16_9(img_path)
-        except Exception as e:
-            print(f"Failed to process {img_path}: {e}")
+        out_path = os.path.join(output_dir, os.path.basename(img_path))
+        if not args.in_place and _is_cached(img_path, out_path):
+            continue
+        jobs.append((img_path, None if args.in_place else out_path))
+
+    print(f"{len(image_files) - len(jobs)} cached, {len(jobs)} to process.")
+    if not jobs:
+        return
+
+    workers = min(args.workers or os.cpu_count() or 1, len(jobs))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [(img_path, pool.submit(crop_to_16_9, img_path, out_path)) for img_path, out_path in jobs]
+        for img_path, future in futures:
+            try:
+                status = future.result()
+                print(f"{status}: {os.path.basename(img_path)}")
+            except Exception as e:
+                print(f"Failed to process {img_path}: {e}")
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
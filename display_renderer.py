@@ -0,0 +1,128 @@
+import time
+import threading
+
+# ==============================================================================
+# DISPLAY RENDERER
+# ==============================================================================
+# Owns the OpenCV window on its own thread: HighGUI calls (namedWindow,
+# imshow, waitKey) all happen here, and waitKey runs continuously so the
+# window stays responsive no matter what the control loop is blocked on.
+#
+# Double buffering: present() drops the new image into the back buffer
+# (latest wins) and the renderer swaps it to the front with a single
+# imshow + waitKey(1), so a background swap is one atomic present.
+
+
+class DisplayRenderer:
+    def __init__(self, window_name="Slideshow", fullscreen=True, poll_ms=15):
+        self.window_name = window_name
+        self.fullscreen = fullscreen
+        self.poll_ms = poll_ms
+        self.running = False
+        self.thread = None
+
+        self.cond = threading.Condition()
+        self.back = None            # Pending frame (back buffer)
+        self.back_id = 0
+        self.front = None           # Frame currently on screen
+        self.front_id = 0
+        self.present_time = 0.0     # time.monotonic() of the last swap
+        self.present_count = 0
+
+        self.quit_requested = threading.Event() # Set when 'q' is pressed in the window
+        self.last_key = -1
+        self.on_key = None          # Optional callback(key), runs on the renderer thread
+
+    def start(self):
+        if self.running: return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _open_window(self):
+        import cv2
+        cv2.namedWindow(self.window_name, cv2.WINDOW_NORMAL)
+        if self.fullscreen:
+            cv2.setWindowProperty(self.window_name, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+
+    def _run(self):
+        import cv2 # First use is on the renderer thread, off the startup path
+        window_open = False
+        while self.running:
+            # Swap: take the back buffer if there is one
+            with self.cond:
+                frame, frame_id = None, 0
+                if self.back_id != self.front_id:
+                    frame, frame_id = self.back, self.back_id
+
+            if frame is not None:
+                try:
+                    if not window_open:
+                        self._open_window()
+                        window_open = True
+                    cv2.imshow(self.window_name, frame)
+                    cv2.waitKey(1) # Flush to the display server
+                except Exception as e:
+                    print(f"  [Display] Present failed: {e}")
+                with self.cond:
+                    self.front, self.front_id = frame, frame_id
+                    self.present_time = time.monotonic()
+                    self.present_count += 1
+                    self.cond.notify_all()
+
+            # Keep the UI responsive (events + keys)
+            try:
+                key = cv2.waitKey(self.poll_ms) if window_open else -1
+            except Exception:
+                key = -1
+            if not window_open:
+                # No window yet: sleep until something is presented
+                with self.cond:
+                    if self.running and self.back_id == self.front_id:
+                        self.cond.wait(self.poll_ms / 1000.0)
+            if key != -1:
+                key &= 0xFF
+                self.last_key = key
+                if key == ord('q'):
+                    self.quit_requested.set()
+                if self.on_key:
+                    try: self.on_key(key)
+                    except Exception: pass
+
+        if window_open:
+            try:
+                cv2.destroyAllWindows()
+                for _ in range(5): cv2.waitKey(1)
+            except Exception:
+                pass
+
+    def present(self, img, timeout=1.0):
+        """
+        Queues 'img' for display. With timeout > 0, blocks until it is on
+        screen and returns the present time (time.monotonic()), or None on
+        timeout. With timeout == 0, returns immediately.
+        """
+        if img is None:
+            return None
+        with self.cond:
+            self.back_id += 1
+            self.back = img
+            my_id = self.back_id
+            self.cond.notify_all()
+            if timeout <= 0:
+                return None
+            deadline = time.monotonic() + timeout
+            while self.front_id < my_id and self.running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self.cond.wait(remaining)
+            return self.present_time if self.front_id >= my_id else None
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        if self.thread:
+            self.thread.join(timeout=2.0)
+            self.thread = None
@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import threading
+import numpy as np
+
+# ==============================================================================
+# RAW FRAME ARCHIVE (memory-mapped, zero-copy reads)
+# ==============================================================================
+# One archive per session and camera view:
+#
+#   <root>/<session>/<view>.frames       raw uint8 frames, back to back (N x H x W x C)
+#   <root>/<session>/<view>.json         header: shape, dtype, committed frame count
+#   <root>/<session>/<view>.index.jsonl  one line per frame (step, time, metadata)
+#
+# The writer appends frame bytes first and only then bumps 'count' in the
+# header (atomic rename), so concurrent readers never map a partial frame.
+
+HEADER_VERSION = 1
+
+
+def _paths(root, session, view):
+    base = os.path.join(root, session, view)
+    return base + ".frames", base + ".json", base + ".index.jsonl"
+
+
+def _write_header(path, header):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(header, f)
+    os.replace(tmp, path)
+
+
+def _truncate_index(path, count):
+    """Keeps the first 'count' complete lines of the index (drops records of uncommitted frames)."""
+    lines = []
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            for line in f:
+                if len(lines) == count or not line.endswith("\n"):
+                    break
+                lines.append(line)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.writelines(lines)
+    os.replace(tmp, path)
+
+
+def _read_header(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+class FrameArchiveWriter:
+    def __init__(self, root, session, view, frame_shape):
+        """
+        :param frame_shape: (H, W) or (H, W, C); every appended frame must match it
+        """
+        self.root = root
+        self.session = session
+        self.view = view
+        self.frame_shape = tuple(int(d) for d in frame_shape)
+        self.frame_bytes = int(np.prod(self.frame_shape))
+        self.lock = threading.Lock()
+
+        self.data_path, self.header_path, self.index_path = _paths(root, session, view)
+        os.makedirs(os.path.dirname(self.data_path), exist_ok=True)
+
+        if os.path.exists(self.header_path):
+            # Resume an existing archive (e.g. restarted session)
+            header = _read_header(self.header_path)
+            if tuple(header["shape"]) != self.frame_shape:
+                raise ValueError(f"Archive {self.header_path} has shape {header['shape']}, not {self.frame_shape}")
+            self.count = header["count"]
+            # Drop bytes of a frame that was never committed
+            with open(self.data_path, "ab") as f:
+                f.truncate(self.count * self.frame_bytes)
+            # ... and its index line (written before the header commit)
+            _truncate_index(self.index_path, self.count)
+        else:
+            self.count = 0
+            open(self.data_path, "wb").close()
+            open(self.index_path, "w").close()
+            self._commit_header()
+
+        self.data_file = open(self.data_path, "ab")
+        self.index_file = open(self.index_path, "a")
+
+    def _commit_header(self):
+        _write_header(self.header_path, {
+            "version": HEADER_VERSION,
+            "session": self.session,
+            "view": self.view,
+            "shape": list(self.frame_shape),
+            "dtype": "uint8",
+            "count": self.count,
+        })
+
+    def append(self, frame, metadata=None):
+        """Appends one frame; returns its index in the archive."""
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        if frame.shape != self.frame_shape:
+            raise ValueError(f"Frame shape {frame.shape} does not match archive shape {self.frame_shape}")
+
+        with self.lock:
+            idx = self.count
+            self.data_file.write(frame.data)
+            self.data_file.flush()
+
+            record = {"i": idx, "time": time.time()}
+            if metadata:
+                record.update(metadata)
+            self.index_file.write(json.dumps(record, sort_keys=True) + "\n")
+            self.index_file.flush()
+
+            self.count += 1
+            self._commit_header()
+        return idx
+
+    def close(self):
+        with self.lock:
+            try:
+                self.data_file.close()
+                self.index_file.close()
+            except Exception:
+                pass
+
+
+class FrameArchiveReader:
+    def __init__(self, root, session, view):
+        self.data_path, self.header_path, self.index_path = _paths(root, session, view)
+        self.frames = None
+        self.count = 0
+        self.refresh()
+
+    def refresh(self):
+        """Re-reads the header and remaps to include frames appended since the last call."""
+        header = _read_header(self.header_path)
+        self.frame_shape = tuple(header["shape"])
+        count = header["count"]
+        if count == self.count and self.frames is not None:
+            return self.count
+        self.count = count
+        if count == 0:
+            self.frames = np.empty((0,) + self.frame_shape, dtype=np.uint8)
+        else:
+            self.frames = np.memmap(self.data_path, dtype=np.uint8, mode="r",
+                                    shape=(count,) + self.frame_shape)
+        return self.count
+
+    def index(self):
+        """Returns the per-frame index records of the committed frames."""
+        records = []
+        with open(self.index_path, "r") as f:
+            for line in f:
+                if len(records) >= self.count:
+                    break
+                line = line.strip()
+                if line:
+                    records.append(json.loads(line))
+        return records
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, key):
+        # Slices of the memmap are views: no copy, no decode
+        return self.frames[key]
+
+    def batch(self, start, size):
+        return self.frames[start:start + size]
+
+    def iter_batches(self, size):
+        for start in range(0, self.count, size):
+            yield self.frames[start:start + size]
+
+
+def list_archives(root):
+    """Returns {session: [view, ...]} for every archive under 'root'."""
+    result = {}
+    if not os.path.isdir(root):
+        return result
+    for session in sorted(os.listdir(root)):
+        session_dir = os.path.join(root, session)
+        if not os.path.isdir(session_dir):
+            continue
+        views = sorted(f[:-len(".frames")] for f in os.listdir(session_dir) if f.endswith(".frames"))
+        if views:
+            result[session] = views
+    return result
+
+
+if __name__ == "__main__":
+    import sys
+    root = sys.argv[1] if len(sys.argv) > 1 else "Archive"
+    for session, views in list_archives(root).items():
+        for view in views:
+            reader = FrameArchiveReader(root, session, view)
+            print(f"{session}/{view}: {len(reader)} frames of {reader.frame_shape}")
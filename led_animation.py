@@ -0,0 +1,179 @@
+import time
+import threading
+import numpy as np
+
+# ==============================================================================
+# LED ANIMATION ENGINE
+# ==============================================================================
+# A single thread ticks at a fixed rate on absolute deadlines
+# (start + k * period, so sleep overshoot never accumulates). Each tick every
+# strip's active animation writes its frame buffer, and only strips whose
+# rendered output actually changed are pushed with show().
+
+
+class Animation:
+    """Base class: update(now) writes the strip buffer and returns True once finished."""
+    def __init__(self):
+        self.done = threading.Event() # Set after the final frame has been shown
+        self.done_time = None         # time.monotonic() when that happened
+
+    def update(self, strip, now):
+        raise NotImplementedError
+
+
+class Fade(Animation):
+    """Cross-fades the strip from its current buffer to (rgb, level) over 'duration' seconds."""
+    def __init__(self, rgb, level, duration=0.3):
+        super().__init__()
+        self.target_rgb = np.asarray(rgb, dtype=np.float32)
+        self.target_level = np.asarray(level, dtype=np.float32)
+        self.duration = max(0.0, duration)
+        self.start_time = None
+        self.from_rgb = None
+        self.from_level = None
+
+    def update(self, strip, now):
+        if self.start_time is None:
+            self.start_time = now
+            self.from_rgb = strip.rgb.copy()
+            self.from_level = strip.level.copy()
+            # Dark LEDs fade in with the target color instead of from black
+            dark = self.from_level <= 0
+            self.from_rgb[dark] = self.target_rgb[dark]
+
+        t = 1.0 if self.duration == 0 else min(1.0, (now - self.start_time) / self.duration)
+        # Smoothstep easing
+        k = np.float32(t * t * (3 - 2 * t))
+        strip.rgb[:] = self.from_rgb + (self.target_rgb - self.from_rgb) * k
+        strip.level[:] = self.from_level + (self.target_level - self.from_level) * k
+        return t >= 1.0
+
+
+class LEDAnimator:
+    def __init__(self, strips, fps=60.0, show_strips=None):
+        """
+        :param strips: list of LEDFrameBuffer
+        :param fps: tick rate
+        :param show_strips: optional callable(list of strips) that pushes several
+                            strips at once; default calls show_if_changed() on each
+        """
+        self.strips = list(strips)
+        self.period = 1.0 / fps
+        self.show_strips = show_strips
+        self.animations = [None] * len(self.strips)
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.running = False
+        self.thread = None
+
+        # Metrics
+        self.ticks = 0
+        self.overruns = 0                 # Deadlines skipped because a tick ran late
+        self.shows = [0] * len(self.strips)
+        self.jitter = []                  # Wake-up lateness vs. deadline (s), bounded window
+        self.window = 600
+        self.active_time = 0.0            # Time spent animating (idle gaps excluded)
+        self.active_ticks = 0
+        self.last_tick = None
+
+    def start(self):
+        if self.running: return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def play(self, index, animation):
+        """Replaces strip 'index''s animation (takes effect on the next tick). Returns the animation."""
+        with self.lock:
+            self.animations[index] = animation
+        self.wake.set()
+        return animation
+
+    def fade_to(self, index, rgb, level, duration=0.3):
+        return self.play(index, Fade(rgb, level, duration))
+
+    def is_idle(self):
+        with self.lock:
+            return all(a is None for a in self.animations)
+
+    def _tick(self, now):
+        finished = []
+        with self.lock:
+            for i, anim in enumerate(self.animations):
+                if anim is None:
+                    continue
+                if anim.update(self.strips[i], now):
+                    self.animations[i] = None
+                    finished.append(anim)
+
+        if self.show_strips is not None:
+            sent = self.show_strips(self.strips)
+        else:
+            sent = [strip.show_if_changed() for strip in self.strips]
+        for i, was_sent in enumerate(sent):
+            if was_sent:
+                self.shows[i] += 1
+
+        now = time.monotonic()
+        for anim in finished:
+            anim.done_time = now
+            anim.done.set()
+
+    def _run(self):
+        deadline = time.monotonic()
+        while self.running:
+            # Idle: nothing animating, sleep until play() is called
+            if self.is_idle():
+                self.wake.wait()
+                self.wake.clear()
+                if not self.running:
+                    break
+                deadline = time.monotonic()
+                self.last_tick = None
+
+            now = time.monotonic()
+            self.jitter.append(now - deadline)
+            if self.last_tick is not None:
+                self.active_time += now - self.last_tick
+                self.active_ticks += 1
+            self.last_tick = now
+            if len(self.jitter) > self.window:
+                del self.jitter[0]
+
+            try:
+                self._tick(now)
+            except Exception as e:
+                print(f"  [LED] Animation tick failed: {e}")
+            self.ticks += 1
+
+            # Next absolute deadline; skip missed ones instead of bursting
+            deadline += self.period
+            now = time.monotonic()
+            if now > deadline:
+                missed = int((now - deadline) / self.period) + 1
+                self.overruns += missed
+                deadline += missed * self.period
+            delay = deadline - now
+            if delay > 0:
+                time.sleep(delay)
+
+    def stats(self):
+        """Achieved tick rate while animating, and wake-up jitter (ms) over the recent window."""
+        jit = np.array(self.jitter) * 1000 if self.jitter else np.zeros(1)
+        return {
+            "target_fps": round(1.0 / self.period, 1),
+            "ticks": self.ticks,
+            "fps": round(self.active_ticks / self.active_time, 1) if self.active_time > 0 else 0.0,
+            "overruns": self.overruns,
+            "shows": list(self.shows),
+            "jitter_ms_mean": round(float(jit.mean()), 3),
+            "jitter_ms_p95": round(float(np.percentile(jit, 95)), 3),
+            "jitter_ms_max": round(float(jit.max()), 3),
+        }
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
+        if self.thread:
+            self.thread.join(timeout=2.0)
+            self.thread = None
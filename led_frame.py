@@ -0,0 +1,233 @@
+import time
+import threading
+import numpy as np
+
+# ==============================================================================
+# LED FRAME BUFFER
+# ==============================================================================
+# One NumPy frame buffer per NeoPixel strip:
+#   rgb   (N, 3) float32  colors, 0-255
+#   level (N,)   float32  per-LED brightness, 0-1 (linear duty = current)
+#
+# render() = gamma-correct the colors, scale by level (capped at the strip's
+# max_brightness = current limit), convert to uint8. show() pushes the whole
+# strip with one bulk buffer write + one transfer.
+#
+# The NeoPixel object's own 'brightness' is kept at 1.0: it is strip-wide,
+# so per-seed brightness has to live in the buffer.
+
+DEFAULT_GAMMA = 2.2
+
+
+def gamma_table(gamma=DEFAULT_GAMMA):
+    """256-entry float LUT mapping a perceptual 0-255 value to linear 0-255 PWM."""
+    return (np.linspace(0.0, 1.0, 256, dtype=np.float32) ** gamma) * 255.0
+
+
+def _bulk_write(pixels, data):
+    """
+    Copies an (N, 3) uint8 RGB array into a NeoPixel buffer in one go.
+    Fast path writes the adafruit_pixelbuf byte buffer directly (channel order
+    applied with NumPy); anything else falls back to one slice assignment.
+    """
+    n = data.shape[0]
+    post = getattr(pixels, "_post_brightness_buffer", None)
+    order = getattr(pixels, "_byteorder", None)
+    bpp = getattr(pixels, "_bpp", None)
+    if (post is not None and order is not None and bpp == 3
+            and not getattr(pixels, "_dotstar_mode", False)
+            and getattr(pixels, "brightness", 1.0) == 1.0):
+        out = np.empty((n, 3), dtype=np.uint8)
+        out[:, order[0]] = data[:, 0]
+        out[:, order[1]] = data[:, 1]
+        out[:, order[2]] = data[:, 2]
+        raw = out.tobytes()
+        offset = getattr(pixels, "_offset", 0)
+        post[offset:offset + len(raw)] = raw
+        pre = getattr(pixels, "_pre_brightness_buffer", None)
+        if pre is not None:
+            pre[offset:offset + len(raw)] = raw
+        return
+    pixels[0:n] = [tuple(px) for px in data.tolist()]
+
+
+class LEDFrameBuffer:
+    def __init__(self, pixels, count, max_brightness=1.0, gamma=DEFAULT_GAMMA):
+        self.pixels = pixels
+        self.count = count
+        self.max_brightness = max_brightness
+        self.lut = gamma_table(gamma)
+        self.rgb = np.zeros((count, 3), dtype=np.float32)
+        self.level = np.zeros(count, dtype=np.float32)
+        self.last_sent = None # uint8 frame of the last show(), for dirty tracking
+        self.show_count = 0
+        try:
+            self.pixels.brightness = 1.0
+        except Exception:
+            pass
+
+    def clear(self):
+        self.rgb[:] = 0
+        self.level[:] = 0
+
+    def set(self, rgb, level):
+        self.rgb[:] = rgb
+        self.level[:] = level
+
+    def render(self):
+        """Returns the (N, 3) uint8 values that will be sent to the strip."""
+        idx = np.clip(self.rgb, 0, 255).astype(np.uint8)
+        scale = np.clip(self.level, 0.0, self.max_brightness)
+        out = self.lut[idx] * scale[:, None]
+        return (out + 0.5).astype(np.uint8)
+
+    def show(self, frame=None):
+        frame = self.render() if frame is None else frame
+        _bulk_write(self.pixels, frame)
+        self.pixels.show()
+        self.last_sent = frame
+        self.show_count += 1
+
+    def show_if_changed(self):
+        """Pushes the buffer only if it renders differently from what the strip shows. Returns True if sent."""
+        frame = self.render()
+        if self.last_sent is not None and np.array_equal(frame, self.last_sent):
+            return False
+        self.show(frame)
+        return True
+
+    def off(self):
+        self.clear()
+        self.show()
+
+
+# ==============================================================================
+# SEED PATTERNS (vectorized)
+# ==============================================================================
+def render_seeds(count, positions, lengths, colors, levels):
+    """
+    Lights 'lengths[i]' LEDs to the right of 'positions[i]' (no wrap) with
+    colors[i] at levels[i]. Later seeds overwrite earlier ones where they
+    overlap, same as the original per-pixel loop.
+    Returns (rgb (count, 3), level (count,)).
+    """
+    positions = np.asarray(positions)
+    lengths = np.asarray(lengths)
+    idx = np.arange(count)
+    covered = (idx[None, :] >= positions[:, None]) & (idx[None, :] < (positions + lengths)[:, None])
+
+    # Highest seed index covering each LED (-1 = dark)
+    seed_ids = np.arange(len(positions))[:, None]
+    owner = np.where(covered, seed_ids, -1).max(axis=0) if len(positions) else np.full(count, -1)
+    lit = owner >= 0
+
+    rgb = np.zeros((count, 3), dtype=np.float32)
+    level = np.zeros(count, dtype=np.float32)
+    rgb[lit] = np.asarray(colors, dtype=np.float32)[owner[lit]]
+    level[lit] = np.asarray(levels, dtype=np.float32)[owner[lit]]
+    return rgb, level
+
+
+# ==============================================================================
+# PARALLEL SHOW
+# ==============================================================================
+class ParallelShow:
+    """
+    Pushes several strips at once, one persistent worker thread per strip.
+    Each strip's transfer time is measured (EMA). With align_latch, shorter
+    transfers start later by the difference so every strip finishes (and
+    latches) at the same moment, and the cameras never see half the lighting
+    updated.
+
+    Callable as LEDAnimator's show_strips hook: returns one 'sent' flag per strip.
+    """
+    def __init__(self, strips, align_latch=True, ema=0.2):
+        self.strips = list(strips)
+        self.align_latch = align_latch
+        self.ema = ema
+        self.transfer_time = [0.0] * len(self.strips) # seconds, smoothed
+        self.last_transfer = [0.0] * len(self.strips)
+        self.latch_skew = 0.0                           # spread of finish times in the last push (s)
+        self.running = True
+
+        self.jobs = [None] * len(self.strips) # (frame, start_delay) per worker
+        self.finish = [0.0] * len(self.strips)
+        self.go = [threading.Event() for _ in self.strips]
+        self.done = [threading.Event() for _ in self.strips]
+        self.threads = []
+        for i in range(len(self.strips)):
+            t = threading.Thread(target=self._worker, args=(i,), daemon=True)
+            t.start()
+            self.threads.append(t)
+
+    def _worker(self, i):
+        strip = self.strips[i]
+        while True:
+            self.go[i].wait()
+            self.go[i].clear()
+            if not self.running:
+                self.done[i].set() # Don't strand a push that raced with stop()
+                return
+            frame, delay = self.jobs[i]
+            if delay > 0:
+                time.sleep(delay)
+            start = time.perf_counter()
+            try:
+                strip.show(frame)
+            except Exception as e:
+                print(f"  [LED] Strip {i} show failed: {e}")
+            end = time.perf_counter()
+            elapsed = end - start
+            self.last_transfer[i] = elapsed
+            if self.transfer_time[i] == 0.0:
+                self.transfer_time[i] = elapsed
+            else:
+                self.transfer_time[i] += self.ema * (elapsed - self.transfer_time[i])
+            self.finish[i] = end
+            self.done[i].set()
+
+    def __call__(self, strips=None):
+        # Render + dirty check on the caller's thread
+        changed = {}
+        for i, strip in enumerate(self.strips):
+            frame = strip.render()
+            if strip.last_sent is None or not np.array_equal(frame, strip.last_sent):
+                changed[i] = frame
+        if not changed:
+            return [False] * len(self.strips)
+
+        if not self.running:
+            # Workers are gone (stopped): push on the caller's thread, one after the other
+            for i, frame in changed.items():
+                try:
+                    self.strips[i].show(frame)
+                except Exception as e:
+                    print(f"  [LED] Strip {i} show failed: {e}")
+            return [i in changed for i in range(len(self.strips))]
+
+        longest = max(self.transfer_time[i] for i in changed)
+        for i, frame in changed.items():
+            delay = (longest - self.transfer_time[i]) if self.align_latch else 0.0
+            # Sub-millisecond sleeps aren't reliable; not worth delaying for
+            self.jobs[i] = (frame, delay if delay > 0.0005 else 0.0)
+            self.done[i].clear()
+            self.go[i].set()
+        for i in changed:
+            self.done[i].wait()
+
+        finish = [self.finish[i] for i in changed]
+        self.latch_skew = max(finish) - min(finish)
+        return [i in changed for i in range(len(self.strips))]
+
+    def stats(self):
+        return {
+            "transfer_ms": [round(t * 1000, 3) for t in self.transfer_time],
+            "latch_skew_ms": round(self.latch_skew * 1000, 3),
+        }
+
+    def stop(self):
+        self.running = False
+        for ev in self.go:
+            ev.set()
+        for t in self.threads:
+            t.join(timeout=1.0)
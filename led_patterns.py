@@ -0,0 +1,169 @@
+import threading
+from collections import deque
+import numpy as np
+from led_frame import render_seeds
+
+# ==============================================================================
+# LED PATTERN LIBRARY
+# ==============================================================================
+# Every lighting condition is identified by a pattern ID "<kind>/<seed>".
+# The ID alone is enough to re-render it exactly (all randomness comes from
+# a numpy Generator seeded with (seed, strip index)), so snapshots only need
+# to record the ID to be replayable.
+#
+# Patterns are rendered ahead of time (frame buffer arrays for every strip)
+# by a background thread, so picking the next lighting is a queue pop.
+
+# Palette used by the box: Yellow(255,255,0) -> White(255,255,255)
+def _palette(rng, n):
+    colors = np.empty((n, 3), dtype=np.float32)
+    colors[:, 0] = 255
+    colors[:, 1] = 255
+    colors[:, 2] = rng.integers(0, 256, size=n)
+    return colors
+
+
+def gen_seeds(rng, count, max_level):
+    """1-3 blobs: random position and length, own color and brightness (the original look)."""
+    num_seeds = int(rng.integers(1, 4))
+    max_lit = max(1, count // num_seeds)
+    positions = rng.integers(0, count, size=num_seeds)
+    lengths = rng.integers(1, max_lit + 1, size=num_seeds)
+    levels = rng.uniform(0.1, max_level, size=num_seeds)
+    return render_seeds(count, positions, lengths, _palette(rng, num_seeds), levels)
+
+
+def gen_gradient(rng, count, max_level):
+    """Linear ramp of color and brightness between two random end points."""
+    t = np.linspace(0.0, 1.0, count, dtype=np.float32)[:, None]
+    ends = _palette(rng, 2)
+    rgb = ends[0] + (ends[1] - ends[0]) * t
+    lv = rng.uniform(0.0, max_level, size=2).astype(np.float32)
+    level = lv[0] + (lv[1] - lv[0]) * t[:, 0]
+    return rgb, level
+
+
+def gen_noise(rng, count, max_level):
+    """Smooth value noise: random knots every few LEDs, linearly interpolated."""
+    knots = int(rng.integers(3, 9))
+    xk = np.linspace(0, count - 1, knots)
+    x = np.arange(count)
+    level = np.interp(x, xk, rng.uniform(0.0, max_level, size=knots)).astype(np.float32)
+    blue = np.interp(x, xk, rng.integers(0, 256, size=knots)).astype(np.float32)
+    rgb = np.stack([np.full(count, 255, np.float32), np.full(count, 255, np.float32), blue], axis=1)
+    return rgb, level
+
+
+def gen_sweep(rng, count, max_level):
+    """One frame of a sweep: a soft bright band at a random phase along the strip."""
+    center = rng.uniform(0, count)
+    width = rng.uniform(2, max(3, count / 4))
+    d = np.abs(np.arange(count) - center)
+    d = np.minimum(d, count - d) # Strips/rings wrap visually
+    level = (max_level * np.exp(-0.5 * (d / width) ** 2)).astype(np.float32)
+    rgb = np.repeat(_palette(rng, 1), count, axis=0)
+    return rgb, level
+
+
+GENERATORS = {
+    "seeds": gen_seeds,
+    "gradient": gen_gradient,
+    "noise": gen_noise,
+    "sweep": gen_sweep,
+}
+
+
+def pattern_id(kind, seed):
+    return f"{kind}/{int(seed)}"
+
+
+def parse_pattern_id(pid):
+    kind, seed = pid.split("/", 1)
+    if kind not in GENERATORS:
+        raise ValueError(f"Unknown pattern kind '{kind}'")
+    return kind, int(seed)
+
+
+def render_pattern(pid, strips):
+    """
+    Renders pattern 'pid' for every strip.
+    :param strips: list of (count, max_level) per strip
+    :returns: list of (rgb, level) arrays, one per strip
+    """
+    kind, seed = parse_pattern_id(pid)
+    gen = GENERATORS[kind]
+    frames = []
+    for i, (count, max_level) in enumerate(strips):
+        rng = np.random.default_rng([seed, i])
+        rgb, level = gen(rng, count, max_level)
+        frames.append((np.asarray(rgb, np.float32), np.minimum(np.asarray(level, np.float32), max_level)))
+    return frames
+
+
+class PatternLibrary:
+    """
+    Hands out pre-rendered patterns in a reproducible order: pattern i of a
+    library uses seed base_seed + i and a kind picked from that seed.
+    """
+    def __init__(self, strips, kinds=None, base_seed=0, ahead=8):
+        self.strips = list(strips)
+        self.kinds = list(kinds or GENERATORS)
+        self.base_seed = int(base_seed)
+        self.ahead = ahead
+        self.index = 0            # Next pattern number to render
+        self.ready = deque()      # (pid, frames) rendered ahead
+        self.cond = threading.Condition()
+        self.running = False
+        self.thread = None
+
+    def pattern_for(self, i):
+        seed = (self.base_seed + i) & 0xFFFFFFFF
+        kind = self.kinds[np.random.default_rng(seed).integers(len(self.kinds))]
+        return pattern_id(kind, seed)
+
+    def start(self):
+        if self.running: return
+        self.running = True
+        self.thread = threading.Thread(target=self._fill, daemon=True)
+        self.thread.start()
+
+    def _fill(self):
+        while True:
+            with self.cond:
+                while self.running and len(self.ready) >= self.ahead:
+                    self.cond.wait()
+                if not self.running:
+                    return
+                i = self.index
+                self.index += 1
+            pid = self.pattern_for(i)
+            frames = render_pattern(pid, self.strips)
+            with self.cond:
+                self.ready.append((pid, frames))
+                self.cond.notify_all()
+
+    def next(self, timeout=1.0):
+        """Returns the next (pattern_id, frames); renders inline only if the filler fell behind."""
+        with self.cond:
+            if not self.ready and self.running:
+                self.cond.wait(timeout)
+            if self.ready:
+                item = self.ready.popleft()
+                self.cond.notify_all()
+                return item
+            i = self.index
+            self.index += 1
+        pid = self.pattern_for(i)
+        return pid, render_pattern(pid, self.strips)
+
+    def get(self, pid):
+        """Re-renders a specific pattern (replay)."""
+        return pid, render_pattern(pid, self.strips)
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        if self.thread:
+            self.thread.join(timeout=1.0)
+            self.thread = None
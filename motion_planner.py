@@ -0,0 +1,265 @@
+import math
+import time
+import threading
+import numpy as np
+
+# ==============================================================================
+# SERVO MOTION PLANNER
+# ==============================================================================
+# Moves are planned as velocity profiles and executed by one thread on
+# absolute deadlines (start + k * period). Each tick commands the position
+# the profile has at the *actual* wake-up time, so sleep overshoot shows up
+# as a little jitter instead of stretching the move.
+#
+# Profiles:
+#   trapezoid - constant acceleration up to the cruise speed, cruise, decelerate
+#   scurve    - same phases but with sinusoidal (jerk-limited) acceleration
+#               ramps; less ringing at start/stop for a slightly longer ramp
+
+
+class TrapezoidProfile:
+    """Distance 'dist' (>= 0) with speed limit v_max and acceleration limit a_max."""
+    def __init__(self, dist, v_max, a_max):
+        self.dist = abs(dist)
+        v_max = max(1e-6, v_max)
+        a_max = max(1e-6, a_max)
+        # Ramp time/distance to reach v_max
+        t_ramp = self._ramp_time(v_max, a_max)
+        d_ramp = 0.5 * v_max * t_ramp
+        if 2 * d_ramp > self.dist:
+            # Triangle: never reaches v_max
+            v_max = self._peak_speed(a_max)
+            t_ramp = self._ramp_time(v_max, a_max)
+            d_ramp = self.dist / 2
+        self.v = v_max
+        self.t_ramp = t_ramp
+        self.d_ramp = d_ramp
+        self.t_cruise = (self.dist - 2 * d_ramp) / v_max if v_max > 0 else 0.0
+        self.duration = 2 * t_ramp + self.t_cruise
+
+    def _ramp_time(self, v, a):
+        return v / a
+
+    def _peak_speed(self, a):
+        return math.sqrt(self.dist * a)
+
+    def _ramp(self, t):
+        """Distance covered t seconds into the acceleration ramp."""
+        return 0.5 * (self.v / self.t_ramp) * t * t if self.t_ramp > 0 else 0.0
+
+    def position(self, t):
+        """Distance travelled at time t (clamped to [0, duration])."""
+        if t <= 0 or self.dist == 0:
+            return 0.0
+        if t >= self.duration:
+            return self.dist
+        if t < self.t_ramp:
+            return self._ramp(t)
+        t -= self.t_ramp
+        if t < self.t_cruise:
+            return self.d_ramp + self.v * t
+        t -= self.t_cruise
+        # Deceleration mirrors the acceleration ramp
+        return self.dist - self._ramp(self.t_ramp - t)
+
+
+class SCurveProfile(TrapezoidProfile):
+    """
+    Velocity ramps follow v(t) = v/2 * (1 - cos(pi t / T)), so acceleration
+    rises and falls smoothly (finite jerk). Peak acceleration = a_max.
+    """
+    def _ramp_time(self, v, a):
+        return math.pi * v / (2 * a)
+
+    def _peak_speed(self, a):
+        # dist = 2 * (v * T / 2) with T = pi v / (2a)  ->  v = sqrt(2 a dist / pi)
+        return math.sqrt(2 * a * self.dist / math.pi)
+
+    def _ramp(self, t):
+        if self.t_ramp <= 0:
+            return 0.0
+        w = math.pi / self.t_ramp
+        return 0.5 * self.v * (t - math.sin(w * t) / w)
+
+
+PROFILES = {
+    "trapezoid": TrapezoidProfile,
+    "scurve": SCurveProfile,
+}
+
+
+class Move:
+    """Handle for one planned move; 'done' is set once the target has been commanded."""
+    def __init__(self, start, target, profile):
+        self.start = start
+        self.target = target
+        self.profile = profile
+        self.planned = profile.duration # seconds
+        self.actual = None              # seconds, once finished
+        self.cancelled = False          # True if replaced by a newer move before finishing
+        self.start_time = None
+        self.done = threading.Event()
+
+    def angle_at(self, t):
+        sign = 1.0 if self.target >= self.start else -1.0
+        return self.start + sign * self.profile.position(t)
+
+    def wait(self, timeout=None):
+        """Blocks until the move finished. Returns True if it did."""
+        return self.done.wait(timeout)
+
+    def __repr__(self):
+        actual = f"{self.actual * 1000:.0f}" if self.actual is not None else "-"
+        return (f"Move({self.start:.1f}->{self.target:.1f} deg, "
+                f"planned {self.planned * 1000:.0f} ms, actual {actual} ms)")
+
+
+class MotionPlanner:
+    def __init__(self, set_angle, position=0.0, rate=100.0, profile="scurve",
+                 accel=360.0, limits=(0.0, 180.0)):
+        """
+        :param set_angle: callable(angle) that commands the servo
+        :param position: current servo angle (deg)
+        :param rate: command rate (Hz)
+        :param profile: key of PROFILES
+        :param accel: acceleration limit (deg/s^2)
+        :param limits: allowed angle range
+        """
+        self.set_angle = set_angle
+        self.position = float(position)
+        self.period = 1.0 / rate
+        self.profile = PROFILES[profile]
+        self.accel = accel
+        self.limits = limits
+        self.current = None
+        self.cond = threading.Condition()
+        self.running = False
+        self.thread = None
+
+        # Metrics
+        self.moves = 0
+        self.overrun = []     # actual - planned (s), bounded window
+        self.window = 200
+
+    def start(self):
+        if self.running: return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def move_to(self, target, speed, accel=None):
+        """
+        Plans a move from the current commanded position and returns its Move
+        immediately. A move still in progress is replaced (its handle is
+        marked cancelled and released).
+        """
+        lo, hi = self.limits
+        target = max(lo, min(hi, float(target)))
+        with self.cond:
+            start = self.position
+            profile = self.profile(target - start, speed, accel or self.accel)
+            move = Move(start, target, profile)
+            old, self.current = self.current, move
+            self.cond.notify_all()
+        if old is not None and not old.done.is_set():
+            old.cancelled = True
+            old.done.set()
+        return move
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while self.running and self.current is None:
+                    self.cond.wait()
+                if not self.running:
+                    return
+                move = self.current
+
+            move.start_time = t0 = time.monotonic()
+            k = 0
+            while True:
+                with self.cond:
+                    if self.current is not move or not self.running:
+                        break # Replaced; the new move starts from self.position
+                now = time.monotonic()
+                t = now - t0
+                finished = t >= move.planned
+                angle = move.target if finished else move.angle_at(t)
+                try:
+                    self.set_angle(angle)
+                except Exception as e:
+                    print(f"  [Servo] Command failed: {e}")
+                with self.cond:
+                    self.position = angle
+                if finished:
+                    move.actual = time.monotonic() - t0
+                    self.moves += 1
+                    self.overrun.append(move.actual - move.planned)
+                    if len(self.overrun) > self.window:
+                        del self.overrun[0]
+                    with self.cond:
+                        if self.current is move:
+                            self.current = None
+                    move.done.set()
+                    break
+
+                # Next absolute deadline (skip missed ones), never past the end of the move
+                k += 1
+                deadline = t0 + k * self.period
+                now = time.monotonic()
+                if now > deadline:
+                    k += int((now - deadline) / self.period) + 1
+                    deadline = t0 + k * self.period
+                deadline = min(deadline, t0 + move.planned)
+                delay = deadline - now
+                if delay > 0:
+                    time.sleep(delay)
+
+    def wait_idle(self, timeout=None):
+        move = self.current
+        return move.wait(timeout) if move is not None else True
+
+    def stats(self):
+        """Actual minus planned move duration (ms) over the recent window."""
+        over = np.array(self.overrun) * 1000 if self.overrun else np.zeros(1)
+        return {
+            "moves": self.moves,
+            "overrun_ms_mean": round(float(over.mean()), 3),
+            "overrun_ms_max": round(float(over.max()), 3),
+        }
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            move, self.current = self.current, None
+            self.cond.notify_all()
+        if move is not None and not move.done.is_set():
+            # Never finishes now; release whoever waits on it
+            move.cancelled = True
+            move.done.set()
+        if self.thread:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Print or dry-run servo motion profiles.")
+    parser.add_argument("--dist", type=float, default=90.0, help="Move distance (deg)")
+    parser.add_argument("--speed", type=float, default=36.0, help="Speed limit (deg/s)")
+    parser.add_argument("--accel", type=float, default=360.0, help="Acceleration limit (deg/s^2)")
+    parser.add_argument("--run", action="store_true", help="Execute the move against a dummy servo")
+    args = parser.parse_args()
+
+    for name, cls in PROFILES.items():
+        p = cls(args.dist, args.speed, args.accel)
+        print(f"{name:10s} duration {p.duration:.3f} s (linear: {args.dist / args.speed:.3f} s), "
+              f"peak {p.v:.1f} deg/s, ramp {p.t_ramp * 1000:.0f} ms")
+
+    if args.run:
+        planner = MotionPlanner(lambda a: None, accel=args.accel)
+        planner.start()
+        m = planner.move_to(args.dist, args.speed)
+        m.wait()
+        print(m, planner.stats())
+        planner.stop()
@@ -0,0 +1,268 @@
+import time
+import queue
+import threading
+
+# ==============================================================================
+# EVENT-DRIVEN ORCHESTRATOR
+# ==============================================================================
+# Everything that can change what the box does is an event on one queue:
+#   button.press / button.hold / button.release   (gpiozero callbacks; a press
+#                                                  is a release without a hold)
+#   api.start / api.stop / api.pause / api.resume / api.next   (HTTP)
+#   ui.quit                                        (renderer key callback)
+#   budget.expired, ...                            (timers, call_later)
+#   session.done, step.persisted, ...              (subsystem completions)
+#
+# A single consumer thread applies them to the state machine below. The
+# session code blocks on a Condition (no polling) until the state it needs,
+# so it reacts as soon as the event is dispatched and uses no CPU meanwhile.
+#
+#   IDLE --press/api.start--> RUNNING --step done (attended)--> WAITING
+#   WAITING --press/api.next--> RUNNING
+#   RUNNING --press (unattended)/api.pause--> PAUSED --press/api.resume--> RUNNING
+#   any --hold/api.stop/budget.expired--> STOPPING --session.done--> IDLE
+#   any --ui.quit--> QUIT
+
+IDLE = "idle"
+RUNNING = "running"
+WAITING = "waiting"   # Attended: step done, waiting for the button to advance
+PAUSED = "paused"
+STOPPING = "stopping"
+QUIT = "quit"
+
+
+class Event:
+    __slots__ = ("kind", "data", "time", "handled", "transition")
+
+    def __init__(self, kind, data, handled=None):
+        self.kind = kind
+        self.data = data
+        self.time = time.monotonic()
+        self.handled = handled    # Optional threading.Event, set once dispatched
+        self.transition = None    # (old state, new state) after dispatch
+
+    def __repr__(self):
+        return f"Event({self.kind}, {self.data})"
+
+
+class Orchestrator:
+    # (state, event kind) -> new state. '*' matches any state not listed explicitly.
+    TRANSITIONS = {
+        (IDLE, "button.press"): RUNNING,
+        (IDLE, "api.start"): RUNNING,
+        (WAITING, "button.press"): RUNNING,
+        (WAITING, "api.next"): RUNNING,
+        (RUNNING, "api.pause"): PAUSED,
+        (WAITING, "api.pause"): PAUSED,
+        (PAUSED, "button.press"): RUNNING,
+        (PAUSED, "api.resume"): RUNNING,
+        (PAUSED, "api.next"): RUNNING,
+        ("*", "button.hold"): STOPPING,
+        ("*", "api.stop"): STOPPING,
+        ("*", "budget.expired"): STOPPING,
+        ("*", "ui.quit"): QUIT,
+    }
+    ACTIVE = (RUNNING, WAITING, PAUSED) # States in which a session is in progress
+
+    def __init__(self):
+        self.events = queue.Queue()
+        self.cond = threading.Condition()
+        self.state = IDLE
+        self.stop_reason = None
+        self.pause_on_press = False # Unattended: a press while running pauses
+        self.listeners = []         # callables(event, old_state, new_state), run on the consumer thread
+        self.timers = []
+        self.button_held = False    # The current button press turned into a hold
+        self.running = False
+        self.thread = None
+
+        # Metrics
+        self.dispatched = 0
+        self.latency = []           # Post -> dispatch (s), bounded window
+        self.window = 500
+
+    # ------------------------------------------------------------------
+    # Producers (any thread)
+    # ------------------------------------------------------------------
+    def post(self, kind, **data):
+        self.events.put(Event(kind, data))
+
+    def request(self, kind, timeout=1.0, **data):
+        """
+        Posts 'kind' and waits until it has been dispatched. Returns
+        (old state, new state), or None if the consumer didn't get to it in time.
+        """
+        event = Event(kind, data, threading.Event())
+        self.events.put(event)
+        if not event.handled.wait(timeout):
+            return None
+        return event.transition
+
+    def call_later(self, delay, kind, **data):
+        """Posts 'kind' after 'delay' seconds. Returns the timer (cancel() to drop it)."""
+        timer = threading.Timer(delay, self.post, args=(kind,), kwargs=data)
+        timer.daemon = True
+        timer.start()
+        self.timers.append(timer)
+        return timer
+
+    def cancel_timers(self):
+        for timer in self.timers:
+            timer.cancel()
+        self.timers = []
+
+    def attach_button(self, button, hold_time=2.0):
+        """
+        Feeds gpiozero callbacks into the queue. 'button.press' is posted on
+        release, and only if the press didn't become a hold, so holding to stop
+        never advances or pauses the session on the way.
+        """
+        button.hold_time = hold_time
+        button.when_pressed = self._button_down
+        button.when_held = self._button_held
+        button.when_released = self._button_up
+
+    def _button_down(self):
+        self.button_held = False
+
+    def _button_held(self):
+        self.button_held = True
+        self.post("button.hold")
+
+    def _button_up(self):
+        self.post("button.release")
+        if not self.button_held:
+            self.post("button.press")
+        self.button_held = False
+
+    def attach_renderer(self, renderer):
+        """'q' in the slideshow window -> ui.quit."""
+        previous = renderer.on_key
+
+        def on_key(key):
+            if key == ord('q'):
+                self.post("ui.quit")
+            if previous:
+                previous(key)
+        renderer.on_key = on_key
+
+    # ------------------------------------------------------------------
+    # Consumer
+    # ------------------------------------------------------------------
+    def start(self):
+        if self.running: return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            event = self.events.get()
+            if event is None:
+                return
+            self.latency.append(time.monotonic() - event.time)
+            if len(self.latency) > self.window:
+                del self.latency[0]
+            self.dispatched += 1
+            try:
+                self.dispatch(event)
+            except Exception as e:
+                print(f"  [Orchestrator] {event} failed: {e}")
+
+    def _next_state(self, kind):
+        new = self.TRANSITIONS.get((self.state, kind))
+        if new is None:
+            new = self.TRANSITIONS.get(("*", kind))
+        if kind == "button.press" and self.state == RUNNING and self.pause_on_press:
+            new = PAUSED
+        if self.state == QUIT:
+            return None # Terminal
+        if new == STOPPING and self.state not in self.ACTIVE:
+            return None # Nothing to stop
+        return new
+
+    def dispatch(self, event):
+        with self.cond:
+            old = self.state
+            new = self._next_state(event.kind)
+            if new is not None and new != old:
+                self.state = new
+                if new == STOPPING:
+                    self.stop_reason = event.data.get("reason") or event.kind
+                self.cond.notify_all()
+        event.transition = (old, self.state)
+        if event.handled is not None:
+            event.handled.set()
+        if new is not None and new != old:
+            print(f"  [Orchestrator] {old} -> {new} ({event.kind})")
+        for listener in list(self.listeners):
+            try:
+                listener(event, old, self.state)
+            except Exception as e:
+                print(f"  [Orchestrator] Listener failed on {event}: {e}")
+
+    # ------------------------------------------------------------------
+    # Session side (blocking, event-driven)
+    # ------------------------------------------------------------------
+    def _wait(self, predicate, timeout=None):
+        with self.cond:
+            self.cond.wait_for(lambda: predicate() or self.state == QUIT, timeout)
+            if self.state == QUIT:
+                raise KeyboardInterrupt
+            return self.state
+
+    def wait_start(self, timeout=None):
+        """Blocks until a session is requested (button / API). Returns True if one was."""
+        return self._wait(lambda: self.state != IDLE, timeout) != IDLE
+
+    def begin(self, pause_on_press=False):
+        """Marks a session as running (if it started without a start event)."""
+        with self.cond:
+            self.pause_on_press = pause_on_press
+            self.stop_reason = None
+            if self.state == IDLE:
+                self.state = RUNNING
+                self.cond.notify_all()
+
+    def step_done(self):
+        """Attended: enter WAITING and block until the next step is requested. Returns False if stopping."""
+        with self.cond:
+            if self.state == RUNNING:
+                self.state = WAITING
+                self.cond.notify_all()
+        return self._wait(lambda: self.state in (RUNNING, STOPPING)) == RUNNING
+
+    def checkpoint(self):
+        """
+        Called between steps: blocks while PAUSED. Returns the stop reason if
+        the session should end, else None.
+        """
+        state = self._wait(lambda: self.state != PAUSED)
+        return self.stop_reason if state == STOPPING else None
+
+    def end(self):
+        """Session finished: back to IDLE (unless quitting)."""
+        self.cancel_timers()
+        with self.cond:
+            if self.state != QUIT:
+                self.state = IDLE
+            self.pause_on_press = False
+            self.cond.notify_all()
+        self.post("session.done")
+
+    def stats(self):
+        lat = sorted(self.latency)
+        return {
+            "state": self.state,
+            "events": self.dispatched,
+            "latency_ms_p50": round(lat[len(lat) // 2] * 1000, 3) if lat else 0.0,
+            "latency_ms_max": round(lat[-1] * 1000, 3) if lat else 0.0,
+        }
+
+    def stop(self):
+        self.cancel_timers()
+        self.running = False
+        self.events.put(None)
+        if self.thread:
+            self.thread.join(timeout=1.0)
+            self.thread = None
@@ -0,0 +1,240 @@
+import time
+import numpy as np
+
+# ==============================================================================
+# SCENE CHANGE CONFIRMATION
+# ==============================================================================
+# Cheap per-camera frame signatures (small grayscale thumbnail + coarse
+# histogram) used to check that a change we caused (new background on the
+# display) is actually visible to the cameras before we capture.
+
+THUMB_SIZE = (32, 24)
+HIST_BINS = 16
+
+
+def frame_signature(frame):
+    """Returns (thumbnail, histogram) of a BGR frame; a few microseconds at 32x24."""
+    import cv2
+    small = cv2.resize(frame, THUMB_SIZE, interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    thumb = small.astype(np.float32)
+    hist = np.bincount((small >> 4).ravel(), minlength=HIST_BINS).astype(np.float32)
+    hist /= hist.sum()
+    return thumb, hist
+
+
+def signature_distance(a, b):
+    """Mean absolute thumbnail difference (0-255) plus the histogram L1 distance scaled to the same range."""
+    thumb_d = float(np.mean(np.abs(a[0] - b[0])))
+    hist_d = float(np.sum(np.abs(a[1] - b[1]))) * 127.5
+    return max(thumb_d, hist_d)
+
+
+def _frame_info(cam):
+    if hasattr(cam, "get_frame_info"):
+        return cam.get_frame_info()
+    return cam.get_frame(), time.monotonic(), None
+
+
+class ConfirmResult:
+    def __init__(self, confirmed, latency, cameras):
+        self.confirmed = confirmed # True if the change was seen before the timeout
+        self.latency = latency     # Seconds from arm() to confirmation (or timeout)
+        self.cameras = cameras     # camera name -> distance from the baseline
+
+    def __repr__(self):
+        state = "confirmed" if self.confirmed else "TIMEOUT"
+        return f"ConfirmResult({state}, {self.latency * 1000:.0f} ms)"
+
+
+class DisplayConfirmer:
+    """
+    Usage:
+        token = confirmer.arm()              # baseline = what cameras see now
+        cv2.imshow(...); cv2.waitKey(1)
+        result = confirmer.wait(token)       # blocks until the new scene is seen
+    A camera confirms when a frame captured after arm() differs from the
+    baseline by more than 'threshold' and the next fresh frame agrees with it
+    (within 'stable_threshold'), i.e. the display finished switching.
+    """
+    def __init__(self, cameras, threshold=6.0, stable_threshold=3.0, min_cameras=1,
+                 timeout=1.5, poll_interval=0.005):
+        self.cameras = cameras # dict name -> camera stream (live dict, may change)
+        self.threshold = threshold
+        self.stable_threshold = stable_threshold
+        self.min_cameras = min_cameras
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.latencies = []
+        self.timeouts = 0
+
+    def arm(self):
+        """Records the baseline signature of every camera. Call right before presenting."""
+        baseline = {}
+        for name, cam in list(self.cameras.items()):
+            frame, _, _ = _frame_info(cam)
+            if frame is not None:
+                baseline[name] = frame_signature(frame)
+        return {"time": time.monotonic(), "baseline": baseline}
+
+    def wait(self, token, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        start = token["time"]
+        deadline = start + timeout
+        baseline = token["baseline"]
+        needed = min(self.min_cameras, len(baseline))
+
+        last_seen = {name: start for name in baseline} # capture time of last frame checked
+        candidate = {} # name -> signature of a changed frame awaiting a stable follow-up
+        distances = {}
+        confirmed = set()
+
+        while needed > 0:
+            for name in baseline:
+                if name in confirmed or name not in self.cameras:
+                    continue
+                frame, frame_time, _ = _frame_info(self.cameras[name])
+                if frame is None or frame_time <= last_seen[name]:
+                    continue # No fresh frame since the last check
+                last_seen[name] = frame_time
+
+                sig = frame_signature(frame)
+                dist = signature_distance(sig, baseline[name])
+                distances[name] = round(dist, 2)
+                if dist < self.threshold:
+                    candidate.pop(name, None)
+                    continue
+                prev = candidate.get(name)
+                if prev is not None and signature_distance(sig, prev) < self.stable_threshold:
+                    confirmed.add(name)
+                else:
+                    candidate[name] = sig
+
+            if len(confirmed) >= needed:
+                break
+            if time.monotonic() >= deadline:
+                self.timeouts += 1
+                return ConfirmResult(False, time.monotonic() - start, distances)
+            time.sleep(self.poll_interval)
+
+        latency = time.monotonic() - start
+        self.latencies.append(latency)
+        return ConfirmResult(True, latency, distances)
+
+    def stats(self):
+        """Summary of confirmation latencies so far (seconds)."""
+        if not self.latencies:
+            return {"count": 0, "timeouts": self.timeouts}
+        lat = np.array(self.latencies)
+        return {
+            "count": len(lat),
+            "timeouts": self.timeouts,
+            "mean": float(lat.mean()),
+            "p95": float(np.percentile(lat, 95)),
+            "max": float(lat.max()),
+        }
+
+
+# ==============================================================================
+# LIGHTING / POSE SETTLE
+# ==============================================================================
+def frame_luminance(frame):
+    """Mean luminance (0-255) of a frame, measured on its 32x24 thumbnail."""
+    return float(frame_signature(frame)[0].mean())
+
+
+class LightingConfirmer:
+    """
+    Usage:
+        token = confirmer.arm()                  # before the LED update
+        ... LEDs fade, servo moves ...
+        result = confirmer.wait(token, since)    # since = when LEDs latched / servo stopped
+    A camera is settled once 'stable_frames' consecutive frames captured after
+    'since' agree on mean luminance (within 'stable_tolerance') and on their
+    thumbnail (within 'still_threshold', i.e. nothing is moving any more) and
+    the luminance differs from the baseline by at least 'change_threshold'
+    (the new lighting is visible, not just the old one holding still). Pass
+    expect_change=False when the lighting didn't change (same pattern): then
+    stability alone confirms. The result reports, per camera, how much the
+    luminance moved from the baseline.
+    """
+    def __init__(self, cameras, stable_tolerance=1.0, still_threshold=2.5, stable_frames=2,
+                 change_threshold=2.0, timeout=2.0, poll_interval=0.005):
+        self.cameras = cameras
+        self.stable_tolerance = stable_tolerance
+        self.still_threshold = still_threshold
+        self.stable_frames = stable_frames
+        self.change_threshold = change_threshold
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.latencies = []
+        self.timeouts = 0
+
+    def arm(self):
+        """Records the baseline luminance of every camera. Call right before the LED update."""
+        baseline = {}
+        for name, cam in list(self.cameras.items()):
+            frame, _, _ = _frame_info(cam)
+            if frame is not None:
+                baseline[name] = frame_luminance(frame)
+        return {"time": time.monotonic(), "baseline": baseline}
+
+    def wait(self, token, since=None, timeout=None, expect_change=True):
+        """
+        Blocks until every camera is settled on frames captured after 'since'
+        (defaults to now) showing the new lighting. Latency is measured from 'since'.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        since = time.monotonic() if since is None else since
+        deadline = time.monotonic() + timeout
+        baseline = token["baseline"]
+
+        last_seen = {name: since for name in baseline}
+        prev = {}       # name -> (luminance, signature) of the previous fresh frame
+        run = {name: 0 for name in baseline}
+        report = {}
+        settled = set()
+
+        while len(settled) < len(baseline):
+            for name in baseline:
+                if name in settled:
+                    continue
+                cam = self.cameras.get(name)
+                if cam is None:
+                    settled.add(name) # Camera went away; don't block on it
+                    continue
+                frame, frame_time, _ = _frame_info(cam)
+                if frame is None or frame_time <= last_seen[name]:
+                    continue
+                last_seen[name] = frame_time
+
+                sig = frame_signature(frame)
+                lum = float(sig[0].mean())
+                p = prev.get(name)
+                if p is not None and abs(lum - p[0]) < self.stable_tolerance \
+                        and signature_distance(sig, p[1]) < self.still_threshold:
+                    run[name] += 1
+                else:
+                    run[name] = 1
+                prev[name] = (lum, sig)
+
+                delta = lum - baseline[name]
+                changed = abs(delta) >= self.change_threshold
+                report[name] = {"luminance": round(lum, 1), "delta": round(delta, 1),
+                                "changed": changed}
+                if run[name] >= self.stable_frames and (changed or not expect_change):
+                    settled.add(name)
+
+            if len(settled) >= len(baseline):
+                break
+            if time.monotonic() >= deadline:
+                self.timeouts += 1
+                return ConfirmResult(False, time.monotonic() - since, report)
+            time.sleep(self.poll_interval)
+
+        latency = max(0.0, time.monotonic() - since)
+        self.latencies.append(latency)
+        return ConfirmResult(True, latency, report)
+
+    stats = DisplayConfirmer.stats
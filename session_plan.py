@@ -0,0 +1,210 @@
+import os
+import json
+import datetime
+from led_patterns import GENERATORS, pattern_id
+from crop_images import VALID_EXTS
+
+# ==============================================================================
+# SESSION PLAN
+# ==============================================================================
+# The whole session (servo angle, background, LED pattern per step) is
+# generated up front from a Halton sequence, so angle x background x
+# lighting is covered evenly instead of by a random walk. Sessions continue
+# the same sequence (a plan with 'index' i and n steps uses points
+# i+1 .. i+n), so every new session fills the gaps left by the previous ones.
+# A session that stops early records how many steps it executed; the points
+# it never reached are planned again, first thing, by the next session.
+#
+# Within a session the steps are then ordered by angle (one sweep), which is
+# the minimum servo travel for points on a line.
+
+HALTON_BASES = (2, 3, 5) # angle, background, lighting kind
+PLAN_VERSION = 1
+
+
+def radical_inverse(i, base):
+    """Van der Corput radical inverse of integer i in 'base', in [0, 1)."""
+    inv = 1.0 / base
+    f = inv
+    r = 0.0
+    while i > 0:
+        i, digit = divmod(i, base)
+        r += digit * f
+        f *= inv
+    return r
+
+
+def halton(i, bases=HALTON_BASES):
+    return [radical_inverse(i, b) for b in bases]
+
+
+def _pattern_seed(point):
+    """Distinct, reproducible LED pattern seed per sequence point."""
+    return (point * 104729 + 1) & 0x7FFFFFFF
+
+
+def sweep_order(angles, start=0.0, end=None):
+    """
+    Indices of 'angles' in visiting order with the least total travel from
+    'start' (and back to 'end' if given): one pass up or down, whichever
+    end is reached first.
+    """
+    asc = sorted(range(len(angles)), key=lambda i: angles[i])
+    desc = asc[::-1]
+
+    def travel(order):
+        pos, total = start, 0.0
+        for i in order:
+            total += abs(angles[i] - pos)
+            pos = angles[i]
+        if end is not None:
+            total += abs(end - pos)
+        return total
+
+    return asc if travel(asc) <= travel(desc) else desc
+
+
+class SessionPlan:
+    def __init__(self, steps, index=0, created=None, params=None, executed=None):
+        self.steps = steps     # list of dicts: step, angle, background, led_pattern, halton
+        self.index = index     # Sequence position the plan starts after
+        self.executed = executed # Steps actually run (None = all of them)
+        self.created = created or datetime.datetime.now().isoformat(timespec="seconds")
+        self.params = params or {}
+
+    def __len__(self):
+        return len(self.steps)
+
+    def travel(self, start=0.0, end=0.0):
+        """Total servo travel (deg) to execute the plan."""
+        pos, total = start, 0.0
+        for s in self.steps:
+            total += abs(s["angle"] - pos)
+            pos = s["angle"]
+        return total + (abs(end - pos) if end is not None else 0.0)
+
+    @property
+    def end_index(self):
+        """Sequence position the next plan should start at."""
+        return max([self.index] + [s["halton"] for s in self.steps if "halton" in s])
+
+    @property
+    def done_steps(self):
+        return self.steps if self.executed is None else self.steps[:self.executed]
+
+    @property
+    def skipped_steps(self):
+        return [] if self.executed is None else self.steps[self.executed:]
+
+    def extend(self, other):
+        """Appends another plan's steps (renumbered), e.g. the next sweep of an open-ended run."""
+        for s in other.steps:
+            step = dict(s)
+            step["step"] = len(self.steps) + 1
+            self.steps.append(step)
+
+    def to_dict(self):
+        return {"version": PLAN_VERSION, "index": self.index, "created": self.created,
+                "params": self.params, "executed": self.executed, "steps": self.steps}
+
+    def save(self, path):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=1)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            d = json.load(f)
+        return cls(d["steps"], index=d.get("index", 0), created=d.get("created"), params=d.get("params"),
+                   executed=d.get("executed"))
+
+
+def make_plan(num_steps, backgrounds, index=0, kinds=None, angle_range=(0.0, 180.0),
+              angle_decimals=1, start_angle=0.0, end_angle=0.0, pending=()):
+    """
+    Builds a plan of the sequence points index+1 .. index+num_steps.
+    :param backgrounds: list of background image paths (may be empty)
+    :param kinds: LED pattern kinds to draw from (default: all generators)
+    :param pending: earlier points that were planned but never run; they
+                    come first and the sequence continues after 'index'
+    """
+    kinds = list(kinds or GENERATORS)
+    lo, hi = angle_range
+    reused = list(pending)[:num_steps]
+    first = index + 1 # Halton point 0 is the all-zeros point; skip it
+    sequence = reused + list(range(first, first + num_steps - len(reused)))
+
+    points = []
+    for i in sequence:
+        u_angle, u_bg, u_light = halton(i)
+        points.append({
+            "angle": round(lo + u_angle * (hi - lo), angle_decimals),
+            "background": backgrounds[int(u_bg * len(backgrounds))] if backgrounds else None,
+            "led_pattern": pattern_id(kinds[int(u_light * len(kinds))], _pattern_seed(i)),
+            "halton": i,
+        })
+
+    order = sweep_order([p["angle"] for p in points], start_angle, end_angle)
+    steps = []
+    for n, i in enumerate(order, start=1):
+        step = dict(points[i])
+        step["step"] = n
+        steps.append(step)
+
+    params = {"num_steps": num_steps, "kinds": kinds, "angle_range": [lo, hi], "reused": len(reused),
+              "num_backgrounds": len(backgrounds), "start_angle": start_angle, "end_angle": end_angle}
+    return SessionPlan(steps, index=index, params=params)
+
+
+def load_plans(folder):
+    """Every readable plan saved in 'folder'."""
+    if not os.path.isdir(folder):
+        return []
+    plans = []
+    for f in sorted(os.listdir(folder)):
+        if not f.endswith("_plan.json"):
+            continue
+        try:
+            plans.append(SessionPlan.load(os.path.join(folder, f)))
+        except Exception as e:
+            print(f"  [Plan] Skipping unreadable {f}: {e}")
+    return plans
+
+
+def next_plan_index(folder):
+    """First sequence position not used by the plans saved in 'folder' (so the next session continues)."""
+    return max([0] + [p.end_index for p in load_plans(folder)])
+
+
+def pending_points(folder):
+    """Sequence points planned by stopped sessions in 'folder' that no session has run yet."""
+    plans = load_plans(folder)
+    done = {s["halton"] for p in plans for s in p.done_steps if "halton" in s}
+    skipped = {s["halton"] for p in plans for s in p.skipped_steps if "halton" in s}
+    return sorted(skipped - done)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate a low-discrepancy session plan.")
+    parser.add_argument("--steps", type=int, default=10, help="Steps per session")
+    parser.add_argument("--index", type=int, default=0, help="Sequence position to start after")
+    parser.add_argument("--images", default="images", help="Background folder")
+    parser.add_argument("--output", default=None, help="Write the plan JSON here")
+    args = parser.parse_args()
+
+    bgs = []
+    if os.path.isdir(args.images):
+        bgs = sorted(os.path.join(args.images, f) for f in os.listdir(args.images)
+                     if f.lower().endswith(VALID_EXTS) and f not in ("Start.jpeg", "Finished.jpeg"))
+
+    plan = make_plan(args.steps, bgs, index=args.index)
+    for s in plan.steps:
+        print(f"  {s['step']:3d}  {s['angle']:6.1f} deg  {s['led_pattern']:18s}  {s['background']}")
+    print(f"Servo travel: {plan.travel():.1f} deg")
+    if args.output:
+        print(f"Saved {plan.save(args.output)}")
@@ -0,0 +1,199 @@
+import io
+import os
+import json
+import time
+import tarfile
+import threading
+
+# ==============================================================================
+# TAR SHARD SINK (WebDataset layout)
+# ==============================================================================
+# One sample = all camera views captured at one step, stored as consecutive
+# tar members sharing the same key:
+#
+#   <key>.json        metadata (step, angle, cameras, crops, ...)
+#   <key>.usb0.jpg    one member per camera view
+#   <key>.csi45.jpg
+#   <key>.csi90.jpg
+#
+# Shards are size-bounded and written as '<name>.tar.tmp' first, then renamed
+# to '<name>.tar' on rollover/close, so readers never see a half-written shard.
+
+DEFAULT_MAX_SHARD_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_SHARD_SAMPLES = 1000
+TAR_BLOCK = 512
+
+
+def _tar_size(nbytes):
+    """Bytes a member of 'nbytes' occupies in the archive (header + padded data)."""
+    return TAR_BLOCK + ((nbytes + TAR_BLOCK - 1) // TAR_BLOCK) * TAR_BLOCK
+
+
+class TarShardWriter:
+    def __init__(self, output_dir="Shards", prefix="dab",
+                 max_bytes=DEFAULT_MAX_SHARD_BYTES, max_samples=DEFAULT_MAX_SHARD_SAMPLES):
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_samples = max_samples
+        self.lock = threading.Lock()
+
+        self.shard_index = 0
+        self.tar = None
+        self.tmp_path = None
+        self.final_path = None
+        self.shard_bytes = 0
+        self.shard_samples = 0
+        self.total_samples = 0
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        # Continue numbering after shards left by earlier sessions
+        while os.path.exists(self._shard_path(self.shard_index)):
+            self.shard_index += 1
+
+    def _shard_path(self, index):
+        return os.path.join(self.output_dir, f"{self.prefix}-{index:06d}.tar")
+
+    def _open_shard(self):
+        self.final_path = self._shard_path(self.shard_index)
+        self.tmp_path = self.final_path + ".tmp"
+        self.tar = tarfile.open(self.tmp_path, mode="w", format=tarfile.USTAR_FORMAT)
+        self.shard_bytes = 0
+        self.shard_samples = 0
+
+    def _close_shard(self):
+        if self.tar is None:
+            return
+        self.tar.close()
+        os.replace(self.tmp_path, self.final_path)
+        print(f"  [Shard] Closed {self.final_path} ({self.shard_samples} samples, {self.shard_bytes} bytes)")
+        self.tar = None
+        self.shard_index += 1
+
+    def _add_member(self, name, data, mtime):
+        info = tarfile.TarInfo(name=name)
+        info.size = len(data)
+        info.mtime = mtime
+        info.mode = 0o644
+        self.tar.addfile(info, io.BytesIO(data))
+
+    def write_sample(self, key, views, metadata=None):
+        """
+        Appends one sample to the current shard.
+
+        :param key: Sample key, e.g. '20261019-091654_000003' (must not contain '.')
+        :param views: dict of view name -> encoded image bytes, e.g. {'usb0.jpg': b'...'}
+        :param metadata: JSON-serialisable dict stored as '<key>.json'
+        """
+        if "." in key or "/" in key:
+            raise ValueError(f"Invalid sample key '{key}' (no '.' or '/' allowed)")
+
+        members = []
+        if metadata is not None:
+            members.append(("json", json.dumps(metadata, sort_keys=True).encode("utf-8")))
+        for ext in sorted(views):
+            members.append((ext, bytes(views[ext])))
+
+        sample_bytes = sum(_tar_size(len(data)) for _, data in members)
+        mtime = int(time.time())
+
+        with self.lock:
+            # Roll over before the sample would overflow the shard (a single
+            # oversized sample still gets a shard of its own)
+            if self.tar is not None and self.shard_samples > 0:
+                if (self.shard_bytes + sample_bytes > self.max_bytes
+                        or self.shard_samples >= self.max_samples):
+                    self._close_shard()
+            if self.tar is None:
+                self._open_shard()
+
+            for ext, data in members:
+                self._add_member(f"{key}.{ext}", data, mtime)
+
+            self.shard_bytes += sample_bytes
+            self.shard_samples += 1
+            self.total_samples += 1
+
+    def close(self):
+        with self.lock:
+            self._close_shard()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# ==============================================================================
+# STREAMING READER
+# ==============================================================================
+def list_shards(shard_dir, prefix="dab"):
+    """Returns the finished shards in 'shard_dir' in write order (skips '.tmp')."""
+    if not os.path.isdir(shard_dir):
+        return []
+    names = [f for f in os.listdir(shard_dir) if f.startswith(prefix + "-") and f.endswith(".tar")]
+    return [os.path.join(shard_dir, f) for f in sorted(names)]
+
+
+def _split_member_name(name):
+    base = os.path.basename(name)
+    if "." not in base:
+        return base, ""
+    key, ext = base.split(".", 1)
+    return key, ext
+
+
+def iter_samples(shards, decode_json=True):
+    """
+    Streams samples out of one or more shards, reading each tar sequentially.
+
+    :param shards: a shard path, a directory of shards, or a list of shard paths
+    :yields: dict with '__key__', '__shard__', 'json' (decoded metadata) and one
+             entry of raw bytes per view, e.g. sample['usb0.jpg']
+    """
+    if isinstance(shards, str):
+        shards = list_shards(shards) if os.path.isdir(shards) else [shards]
+
+    for shard_path in shards:
+        current = None
+        # 'r|' = pure streaming mode, no seeking
+        with tarfile.open(shard_path, mode="r|") as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                key, ext = _split_member_name(member.name)
+                data = tar.extractfile(member).read()
+
+                if current is not None and current["__key__"] != key:
+                    yield current
+                    current = None
+                if current is None:
+                    current = {"__key__": key, "__shard__": shard_path}
+
+                if ext == "json" and decode_json:
+                    current["json"] = json.loads(data.decode("utf-8"))
+                else:
+                    current[ext] = data
+        if current is not None:
+            yield current
+
+
+def decode_view(data, flags=None):
+    """Decodes one view's JPEG bytes into a BGR (or grayscale) numpy array."""
+    import cv2
+    import numpy as np
+    if flags is None:
+        flags = cv2.IMREAD_COLOR
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flags)
+
+
+if __name__ == "__main__":
+    import sys
+    target = sys.argv[1] if len(sys.argv) > 1 else "Shards"
+    count = 0
+    for sample in iter_samples(target):
+        views = [k for k in sample if not k.startswith("__") and k != "json"]
+        print(f"{sample['__key__']}: {', '.join(views)}")
+        count += 1
+    print(f"{count} samples.")
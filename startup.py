@@ -0,0 +1,120 @@
+import time
+import threading
+
+# ==============================================================================
+# CONCURRENT STARTUP
+# ==============================================================================
+# Independent subsystems (LCD, servo driver, LEDs, each camera, web server...)
+# initialize on their own threads at the same time, each with a timeout, so
+# one slow or hanging device neither delays the others nor blocks startup.
+# Tasks may depend on other tasks ('after='). A task that finishes after its
+# timeout has its result handed to 'on_late' (e.g. stop a camera that came up
+# too late) instead of being used.
+
+
+class InitTask:
+    def __init__(self, name, fn, timeout, after=(), on_late=None):
+        self.name = name
+        self.fn = fn
+        self.timeout = timeout
+        self.after = list(after)
+        self.on_late = on_late
+        self.result = None
+        self.error = None
+        self.status = "pending" # ok / absent (returned None) / failed / timeout / skipped
+        self.start_time = None
+        self.end_time = None
+        self.done = threading.Event()
+        self.expired = False
+        self.lock = threading.Lock()
+
+    @property
+    def elapsed(self):
+        if self.start_time is None:
+            return 0.0
+        return (self.end_time or time.monotonic()) - self.start_time
+
+
+class Startup:
+    def __init__(self, default_timeout=10.0):
+        self.default_timeout = default_timeout
+        self.tasks = {}
+        self.origin = time.monotonic()
+
+    def add(self, name, fn, timeout=None, after=(), on_late=None):
+        """Registers fn() as subsystem 'name'. Its return value becomes the task result. Dependencies must be added first."""
+        for dep in after:
+            if dep not in self.tasks:
+                raise ValueError(f"Startup task '{name}' depends on unknown task '{dep}'")
+        self.tasks[name] = InitTask(name, fn, timeout or self.default_timeout, after, on_late)
+        return self.tasks[name]
+
+    def _run_task(self, task):
+        for dep in task.after:
+            d = self.tasks[dep]
+            d.done.wait()
+            if d.status != "ok":
+                with task.lock:
+                    task.status = "skipped"
+                    task.error = f"needs {dep} ({d.status})"
+                task.done.set()
+                return
+        task.start_time = time.monotonic()
+        try:
+            result, error = task.fn(), None
+        except (Exception, SystemExit) as e: # Some driver modules exit() when a library is missing
+            result, error = None, e
+        with task.lock:
+            task.end_time = time.monotonic()
+            late = task.expired
+            if not late:
+                task.result, task.error = result, error
+                if error is not None:
+                    task.status = "failed"
+                else:
+                    task.status = "ok" if result is not None else "absent"
+        task.done.set()
+        if late and result is not None and task.on_late:
+            try:
+                task.on_late(result)
+            except Exception as e:
+                print(f"  [Startup] {task.name}: cleanup of late result failed: {e}")
+
+    def run(self):
+        """Starts every task at once and waits for each up to its timeout. Returns {name: result}."""
+        for task in self.tasks.values():
+            threading.Thread(target=self._run_task, args=(task,), daemon=True,
+                             name=f"init-{task.name}").start()
+        for task in self.tasks.values():
+            # Timeouts count from when the task could start (dependencies are
+            # earlier in the dict, so they have finished or expired by now)
+            started = task.start_time or time.monotonic()
+            if not task.done.wait(max(0.0, started + task.timeout - time.monotonic())):
+                with task.lock:
+                    if not task.done.is_set():
+                        task.expired = True
+                        task.status = "timeout"
+                        task.end_time = time.monotonic()
+                        task.done.set() # Dependents see the timeout and skip
+        return {name: t.result for name, t in self.tasks.items()}
+
+    def ok(self, name):
+        task = self.tasks.get(name)
+        return task is not None and task.status == "ok"
+
+    def result(self, name):
+        task = self.tasks.get(name)
+        return task.result if task is not None else None
+
+    def report(self):
+        """Prints the readiness report: status and init time per subsystem."""
+        total = time.monotonic() - self.origin
+        print("\n" + "="*40); print("       STARTUP READINESS"); print("="*40)
+        for task in sorted(self.tasks.values(), key=lambda t: t.elapsed):
+            detail = f" ({task.error})" if task.error else ""
+            print(f"  {task.name:14s} {task.status:8s} {task.elapsed * 1000:7.0f} ms{detail}")
+        print(f"  {'total':14s} {'':8s} {total * 1000:7.0f} ms")
+        print("="*40 + "\n")
+        return {name: {"status": t.status, "ms": round(t.elapsed * 1000, 1),
+                       "error": str(t.error) if t.error else None}
+                for name, t in self.tasks.items()}
@@ -0,0 +1,162 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
+
+# ==============================================================================
+# STEP SCHEDULER
+# ==============================================================================
+# Runs the stages of consecutive steps as a small dependency graph so
+# independent work overlaps:
+#
+#   step N:    display -> move/light -> settle -> capture -> [persist N]
+#   step N+1:  [prepare N+1] ...................-> display -> ...
+#
+# Bracketed stages run on worker threads; the rest run inline on the control
+# thread. Dependencies are explicit ('after=' futures), e.g. persist N after
+# persist N-1 so samples stay in order. Every stage is recorded on a
+# Timeline, which can be exported as JSON (also loadable in chrome://tracing
+# / Perfetto via its "traceEvents").
+
+
+class Timeline:
+    def __init__(self):
+        self.origin = time.monotonic()
+        self.spans = []   # dicts: step, stage, start, end, thread (seconds since origin)
+        self.lock = threading.Lock()
+
+    def record(self, step, stage, start, end):
+        with self.lock:
+            self.spans.append({
+                "step": step,
+                "stage": stage,
+                "start": round(start - self.origin, 6),
+                "end": round(end - self.origin, 6),
+                "thread": threading.current_thread().name,
+            })
+
+    @contextmanager
+    def span(self, step, stage):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(step, stage, start, time.monotonic())
+
+    def summary(self):
+        """Per stage: count, mean and total duration (s)."""
+        by_stage = {}
+        with self.lock:
+            for s in self.spans:
+                by_stage.setdefault(s["stage"], []).append(s["end"] - s["start"])
+        return {stage: {"count": len(d), "mean": round(float(np.mean(d)), 4),
+                        "total": round(float(np.sum(d)), 4)}
+                for stage, d in by_stage.items()}
+
+    def export(self, path):
+        """Writes spans, summary and Chrome trace events to 'path' (JSON)."""
+        with self.lock:
+            spans = list(self.spans)
+        threads = {}
+        events = []
+        for s in spans:
+            tid = threads.setdefault(s["thread"], len(threads))
+            events.append({"name": s["stage"], "cat": "step", "ph": "X", "pid": 0, "tid": tid,
+                           "ts": s["start"] * 1e6, "dur": (s["end"] - s["start"]) * 1e6,
+                           "args": {"step": s["step"]}})
+        for name, tid in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": 0, "tid": tid, "args": {"name": name}})
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"spans": spans, "summary": self.summary(), "traceEvents": events}, f, indent=1)
+        return path
+
+
+class StepScheduler:
+    def __init__(self, workers=2, timeline=None):
+        self.timeline = timeline or Timeline()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="step")
+        self.pending = set()
+        self.lock = threading.Lock()
+
+    def run(self, step, stage, fn, *args, **kwargs):
+        """Runs a stage inline on the calling thread (recorded on the timeline)."""
+        with self.timeline.span(step, stage):
+            return fn(*args, **kwargs)
+
+    def submit(self, step, stage, fn, *args, after=(), **kwargs):
+        """
+        Runs a stage on a worker once every future in 'after' has finished
+        (successfully or not: dependencies order stages, a failed write must
+        not cancel the next one). Returns a Future.
+        """
+        result = Future()
+        deps = [f for f in after if f is not None]
+        remaining = [len(deps)]
+        with self.lock:
+            self.pending.add(result)
+        result.add_done_callback(self._discard)
+
+        def launch():
+            try:
+                self.pool.submit(self._execute, result, step, stage, fn, args, kwargs)
+            except RuntimeError as e: # Pool already shut down
+                result.set_exception(e)
+
+        def dep_done(_):
+            with self.lock:
+                remaining[0] -= 1
+                ready = remaining[0] == 0
+            if ready:
+                launch()
+
+        if not deps:
+            launch()
+        for dep in deps:
+            dep.add_done_callback(dep_done)
+        return result
+
+    def _execute(self, result, step, stage, fn, args, kwargs):
+        if not result.set_running_or_notify_cancel():
+            return
+        start = time.monotonic()
+        try:
+            value = fn(*args, **kwargs)
+        except BaseException as e:
+            self.timeline.record(step, stage, start, time.monotonic())
+            print(f"  [Scheduler] Step {step} {stage} failed: {e}")
+            result.set_exception(e)
+        else:
+            self.timeline.record(step, stage, start, time.monotonic())
+            result.set_result(value)
+
+    def _discard(self, future):
+        with self.lock:
+            self.pending.discard(future)
+
+    def drain(self, timeout=None):
+        """Waits for every submitted stage. Returns True if none are left."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                pending = list(self.pending)
+            if not pending:
+                return True
+            for f in pending:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    f.exception(timeout=remaining)
+                except Exception:
+                    return False
+
+    def shutdown(self, timeout=None):
+        """Drains (up to 'timeout') and stops the workers. Returns True if everything finished."""
+        drained = self.drain(timeout)
+        self.pool.shutdown(wait=False)
+        return drained
@@ -0,0 +1,145 @@
+import json
+import time
+import queue
+import threading
+from collections import deque
+
+# ==============================================================================
+# LIVE TELEMETRY (Server-Sent Events)
+# ==============================================================================
+# One sampler thread builds a telemetry snapshot (a JSON-able dict from the
+# 'sample' callable) every 'interval' seconds and hands it to every connected
+# SSE client. Clients each get a small queue; a slow client loses old
+# snapshots instead of holding up the sampler. Nothing is sampled while no
+# client is connected. publish_now() pushes an extra snapshot right away
+# (e.g. on a state change) instead of waiting for the next tick.
+
+
+class RollingStat:
+    """Recent durations (s) of something, e.g. JPEG encodes. add() is O(1)."""
+    def __init__(self, window=200):
+        self.values = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, value):
+        self.values.append(value)
+        self.count += 1
+
+    def summary(self):
+        values = list(self.values)
+        if not values:
+            return {"count": self.count, "mean_ms": 0.0, "max_ms": 0.0}
+        return {"count": self.count,
+                "mean_ms": round(sum(values) / len(values) * 1000, 2),
+                "max_ms": round(max(values) * 1000, 2)}
+
+
+class FrameRateMeter:
+    """Capture rate per camera from its frame counter, measured between samples."""
+    def __init__(self):
+        self.last = {} # name -> (frame count, time)
+
+    def update(self, name, count, now=None):
+        now = time.monotonic() if now is None else now
+        prev = self.last.get(name)
+        self.last[name] = (count, now)
+        if prev is None or now <= prev[1]:
+            return 0.0
+        return max(0, count - prev[0]) / (now - prev[1])
+
+
+class Telemetry:
+    def __init__(self, sample, interval=1.0, client_queue=4):
+        """
+        :param sample: callable() -> dict, called on the sampler thread
+        :param interval: seconds between snapshots
+        :param client_queue: snapshots buffered per client before old ones are dropped
+        """
+        self.sample = sample
+        self.interval = interval
+        self.client_queue = client_queue
+        self.clients = []
+        self.latest = None
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.running = False
+        self.thread = None
+
+        # Metrics
+        self.published = 0
+        self.dropped = 0
+
+    def start(self):
+        if self.running: return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=self.client_queue)
+        with self.lock:
+            self.clients.append(q)
+        self.wake.set() # Send the first snapshot right away
+        return q
+
+    def unsubscribe(self, q):
+        with self.lock:
+            if q in self.clients:
+                self.clients.remove(q)
+
+    def publish_now(self):
+        self.wake.set()
+
+    def _run(self):
+        while self.running:
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            if not self.running:
+                return
+            with self.lock:
+                clients = list(self.clients)
+            if not clients:
+                continue
+            try:
+                data = self.sample()
+            except Exception as e:
+                print(f"  [Telemetry] Sample failed: {e}")
+                continue
+            self.latest = data
+            message = json.dumps(data, default=str)
+            for q in clients:
+                try:
+                    q.put_nowait(message)
+                except queue.Full:
+                    # Slow client: drop its oldest snapshot
+                    try: q.get_nowait()
+                    except queue.Empty: pass
+                    self.dropped += 1
+                    try: q.put_nowait(message)
+                    except queue.Full: pass
+            self.published += 1
+
+    def stream(self, keepalive=15.0):
+        """Generator of SSE messages for one client (use as a streaming HTTP response)."""
+        q = self.subscribe()
+        try:
+            yield f"retry: {int(self.interval * 2000)}\n\n"
+            while self.running:
+                try:
+                    message = q.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ": keepalive\n\n" # Comment line; keeps proxies from closing the connection
+                    continue
+                yield f"event: telemetry\ndata: {message}\n\n"
+        finally:
+            self.unsubscribe(q)
+
+    def stats(self):
+        return {"clients": len(self.clients), "published": self.published, "dropped": self.dropped}
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
+        if self.thread:
+            self.thread.join(timeout=1.0)
+            self.thread = None
@@ -0,0 +1,16 @@
+import pytest
+from augment_pipeline import Pipeline, DEFAULT_PIPELINE
+
+
+def test_color_stage_after_grayscale_fails_at_build_time():
+    with pytest.raises(ValueError, match="photometric"):
+        Pipeline({"out": [{"stage": "grayscale"}, {"stage": "photometric"}]})
+
+
+def test_grayscale_chain_without_color_stages_builds():
+    Pipeline({"out": [{"stage": "grayscale"}, {"stage": "noise", "sigma": 2}]})
+
+
+def test_default_pipeline_does_not_write_to_colortobw_output():
+    assert not any(out.split("/")[0] == "BlackAndWhite" for out in DEFAULT_PIPELINE)
+    Pipeline(DEFAULT_PIPELINE)
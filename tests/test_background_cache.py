@@ -0,0 +1,50 @@
+import os
+import time
+import cv2
+import numpy as np
+from background_cache import BackgroundCache, BackgroundPrefetcher
+
+
+def test_prefetcher_does_not_retry_unreadable_source(tmp_path):
+    good = str(tmp_path / "good.png")
+    bad = str(tmp_path / "bad.jpg")
+    cv2.imwrite(good, np.full((36, 64, 3), 80, np.uint8))
+    with open(bad, "wb") as f:
+        f.write(b"not an image")
+
+    cache = BackgroundCache(display_size=(64, 36), cache_dir=str(tmp_path / "cache"))
+    calls = []
+    get = cache.get
+    cache.get = lambda path: calls.append(path) or get(path)
+
+    prefetcher = BackgroundPrefetcher(cache, [bad, good], depth=2)
+    prefetcher.start()
+    time.sleep(0.3)
+    try:
+        assert calls.count(bad) == 1
+        assert cache.contains(good)
+
+        # A changed file is tried again
+        st = os.stat(bad)
+        os.utime(bad, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        prefetcher.set_order([bad, good])
+        time.sleep(0.3)
+        assert calls.count(bad) == 2
+    finally:
+        prefetcher.stop()
+
+
+def test_warm_async_fills_the_disk_cache(tmp_path):
+    paths = []
+    for i in range(3):
+        path = str(tmp_path / f"bg{i}.png")
+        cv2.imwrite(path, np.full((72, 128, 3), 40 * i, np.uint8))
+        paths.append(path)
+
+    cache = BackgroundCache(display_size=(64, 36), cache_dir=str(tmp_path / "cache"), max_items=2)
+    cache.warm_async(paths).join(timeout=5.0)
+
+    fresh = BackgroundCache(display_size=(64, 36), cache_dir=str(tmp_path / "cache"))
+    fresh.decode = lambda path: None # Only the disk cache can answer
+    assert all(fresh.get(p) is not None for p in paths)
+    assert cache.contains(paths[0]) and not cache.contains(paths[2])
@@ -0,0 +1,25 @@
+import json
+import numpy as np
+from frame_archive import FrameArchiveWriter, FrameArchiveReader
+
+
+def test_resume_drops_index_line_of_uncommitted_frame(tmp_path):
+    root = str(tmp_path)
+    writer = FrameArchiveWriter(root, "s1", "cam", (4, 4, 3))
+    writer.append(np.zeros((4, 4, 3), np.uint8), {"step": 1})
+    # Crash after the index write but before the header commit
+    writer.data_file.write(np.ones((4, 4, 3), np.uint8).data)
+    writer.index_file.write(json.dumps({"i": 1, "step": 2}) + "\n")
+    writer.close()
+
+    writer = FrameArchiveWriter(root, "s1", "cam", (4, 4, 3))
+    assert writer.count == 1
+    writer.append(np.full((4, 4, 3), 7, np.uint8), {"step": 3})
+    writer.close()
+
+    reader = FrameArchiveReader(root, "s1", "cam")
+    index = reader.index()
+    assert len(reader) == 2
+    assert [r["i"] for r in index] == [0, 1]
+    assert [r["step"] for r in index] == [1, 3]
+    assert reader[1][0, 0, 0] == 7
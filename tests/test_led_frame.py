@@ -0,0 +1,32 @@
+import threading
+import numpy as np
+from led_frame import LEDFrameBuffer, ParallelShow
+
+
+class FakePixels:
+    def __init__(self, count):
+        self.data = [(0, 0, 0)] * count
+        self.brightness = 1.0
+        self.shows = 0
+
+    def __setitem__(self, index, value):
+        self.data[index] = value
+
+    def show(self):
+        self.shows += 1
+
+
+def test_show_after_stop_pushes_inline():
+    strips = [LEDFrameBuffer(FakePixels(4), 4), LEDFrameBuffer(FakePixels(6), 6)]
+    pusher = ParallelShow(strips)
+    pusher.stop()
+
+    strips[0].set(np.full((4, 3), 255, np.float32), np.ones(4, np.float32))
+    result = []
+    t = threading.Thread(target=lambda: result.append(pusher()), daemon=True)
+    t.start()
+    t.join(timeout=2.0)
+    assert not t.is_alive()
+    assert result == [[True, True]] # Both never sent before
+    assert strips[0].pixels.shows == 1
+    assert pusher() == [False, False]
@@ -0,0 +1,25 @@
+import time
+from motion_planner import MotionPlanner
+
+
+def test_stop_releases_move_in_flight():
+    planner = MotionPlanner(lambda angle: None, rate=200.0)
+    planner.start()
+    move = planner.move_to(180.0, speed=30.0) # ~6 s
+    time.sleep(0.05)
+    planner.stop()
+    assert move.wait(timeout=1.0)
+    assert move.cancelled
+    assert planner.current is None
+
+
+def test_move_completes():
+    planner = MotionPlanner(lambda angle: None, rate=200.0)
+    planner.start()
+    move = planner.move_to(10.0, speed=200.0, accel=2000.0)
+    try:
+        assert move.wait(timeout=2.0)
+        assert not move.cancelled
+        assert planner.position == 10.0
+    finally:
+        planner.stop()
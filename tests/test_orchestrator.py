@@ -0,0 +1,48 @@
+import types
+from orchestrator import Orchestrator, RUNNING, STOPPING, WAITING
+
+
+def attached():
+    orch = Orchestrator()
+    button = types.SimpleNamespace()
+    orch.attach_button(button, hold_time=2.0)
+    states = []
+    orch.listeners.append(lambda event, old, new: states.append(new) if new != old else None)
+    return orch, button, states
+
+
+def test_hold_stops_without_advancing():
+    orch, button, states = attached()
+    orch.state = WAITING
+    button.when_pressed()
+    button.when_held()
+    button.when_released()
+    orch.start()
+    orch.request("sync")
+    orch.stop()
+    assert states == [STOPPING]
+    assert orch.stop_reason == "button.hold"
+
+
+def test_short_press_advances_on_release():
+    orch, button, states = attached()
+    orch.state = WAITING
+    orch.start()
+    button.when_pressed()
+    assert orch.request("sync") == (WAITING, WAITING)
+    button.when_released()
+    orch.request("sync")
+    orch.stop()
+    assert states == [RUNNING]
+
+
+def test_unattended_hold_does_not_pause():
+    orch, button, states = attached()
+    orch.begin(pause_on_press=True)
+    button.when_pressed()
+    button.when_held()
+    button.when_released()
+    orch.start()
+    orch.request("sync")
+    orch.stop()
+    assert states == [STOPPING]
@@ -0,0 +1,42 @@
+import time
+import numpy as np
+from scene_confirm import LightingConfirmer
+
+
+class FakeCamera:
+    """Returns a uniform frame of 'level'; every call is a fresh capture."""
+    def __init__(self, level):
+        self.level = level
+        self.count = 0
+
+    def get_frame_info(self):
+        self.count += 1
+        frame = np.full((48, 64, 3), self.level, np.uint8)
+        return frame, time.monotonic(), self.count
+
+
+def test_lighting_wait_times_out_when_frames_are_stable_but_unchanged():
+    cam = FakeCamera(100)
+    confirmer = LightingConfirmer({"cam": cam}, timeout=0.1)
+    token = confirmer.arm()
+    result = confirmer.wait(token)
+    assert not result.confirmed
+    assert result.cameras["cam"]["changed"] is False
+    assert confirmer.timeouts == 1
+
+
+def test_lighting_wait_confirms_new_stable_lighting():
+    cam = FakeCamera(100)
+    confirmer = LightingConfirmer({"cam": cam}, timeout=1.0)
+    token = confirmer.arm()
+    cam.level = 140
+    result = confirmer.wait(token)
+    assert result.confirmed
+    assert result.cameras["cam"]["changed"] is True
+
+
+def test_lighting_wait_without_expected_change_confirms_on_stability():
+    cam = FakeCamera(100)
+    confirmer = LightingConfirmer({"cam": cam}, timeout=1.0)
+    token = confirmer.arm()
+    assert confirmer.wait(token, expect_change=False).confirmed
@@ -0,0 +1,25 @@
+from session_plan import make_plan, next_plan_index, pending_points
+
+
+def test_stopped_session_points_are_planned_again(tmp_path):
+    first = make_plan(5, [], index=0)
+    first.executed = 2 # Stopped after two steps
+    first.save(str(tmp_path / "a_plan.json"))
+    skipped = sorted(s["halton"] for s in first.steps[2:])
+
+    assert pending_points(str(tmp_path)) == skipped
+    second = make_plan(5, [], index=next_plan_index(str(tmp_path)), pending=pending_points(str(tmp_path)))
+    points = sorted(s["halton"] for s in second.steps)
+    assert points == skipped + [6, 7]
+    assert second.end_index == 7
+
+    second.save(str(tmp_path / "b_plan.json"))
+    assert pending_points(str(tmp_path)) == []
+    assert next_plan_index(str(tmp_path)) == 7
+
+
+def test_complete_plans_leave_nothing_pending(tmp_path):
+    plan = make_plan(4, [], index=3)
+    plan.save(str(tmp_path / "a_plan.json")) # executed=None: every step ran
+    assert pending_points(str(tmp_path)) == []
+    assert next_plan_index(str(tmp_path)) == 7